@@ -0,0 +1,126 @@
+import os
+import tempfile
+from dotenv import load_dotenv
+
+# Load settings from a local .env file if one is present
+load_dotenv()
+
+# Calculation engine: "numpy" evaluates every request as one matrix product,
+# "python" is the pure-Python path (used automatically if NumPy is missing) and
+# "reference" is the original year x asset loop, kept for verification
+CALCULATOR_ENGINE = os.getenv("CALCULATOR_ENGINE", "numpy").lower()
+
+# Maximum number of properties accepted by a single /calculate/batch call
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "10000"))
+
+# Largest grid and number of full results returned by one /calculate/sweep call
+SWEEP_MAX_CELLS = int(os.getenv("SWEEP_MAX_CELLS", "100000"))
+SWEEP_MAX_BREAKDOWNS = int(os.getenv("SWEEP_MAX_BREAKDOWNS", "100"))
+
+# Incremental calculation sessions (/calculate/sessions), kept in each worker's
+# memory: at most MAX_SESSIONS sessions of MAX_ASSETS assets, dropped after
+# TTL_SECONDS unused
+CALC_SESSION_MAX_SESSIONS = int(os.getenv("CALC_SESSION_MAX_SESSIONS", "1000"))
+CALC_SESSION_MAX_ASSETS = int(os.getenv("CALC_SESSION_MAX_ASSETS", "2000"))
+CALC_SESSION_TTL_SECONDS = float(os.getenv("CALC_SESSION_TTL_SECONDS", "1800"))
+
+# Longest single NDJSON line accepted by /calculate/stream before it is rejected
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", str(1024 * 1024)))
+
+# Email and PDF report endpoints; calculator-only deployments turn them off to
+# skip importing the email stack (and WeasyPrint) at startup
+EMAIL_ENABLED = os.getenv("EMAIL_ENABLED", "true").lower() == "true"
+
+# Result cache in front of calculate_depreciation
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "2048"))
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+# "memory" keeps the cache per worker, "sqlite" adds an on-disk tier shared by all workers
+RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "memory").lower()
+RESULT_CACHE_SQLITE_PATH = os.getenv(
+    "RESULT_CACHE_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "depreciation_result_cache.sqlite3")
+)
+RESULT_CACHE_SQLITE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_SQLITE_MAX_ENTRIES", "100000"))
+
+# Effective lives (1 .. N years) whose unit depreciation curves are precomputed at startup
+CURVE_TABLE_WARM_MAX_LIFE = int(os.getenv("CURVE_TABLE_WARM_MAX_LIFE", "40"))
+# Longest effective life whose curve is kept; longer (client-supplied) lives are computed per call
+CURVE_TABLE_MAX_LIFE = int(os.getenv("CURVE_TABLE_MAX_LIFE", "100"))
+
+# Worker processes for large /calculate/batch calls (0 calculates in the server
+# process). Each server worker gets its own pool, so keep
+# SERVER_WORKERS * CALC_POOL_WORKERS around the number of cores.
+CALC_POOL_WORKERS = int(os.getenv("CALC_POOL_WORKERS", "0"))
+# Items per chunk sent to a worker, and the batch size below which the pool isn't used
+CALC_POOL_CHUNK_SIZE = int(os.getenv("CALC_POOL_CHUNK_SIZE", "500"))
+CALC_POOL_SERIAL_THRESHOLD = int(os.getenv("CALC_POOL_SERIAL_THRESHOLD", "200"))
+
+# PDF rendering worker pool (0 workers renders in the thread pool instead)
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+PDF_RENDER_MAX_QUEUE = int(os.getenv("PDF_RENDER_MAX_QUEUE", "100"))
+PDF_RENDER_TIMEOUT_SECONDS = float(os.getenv("PDF_RENDER_TIMEOUT_SECONDS", "60"))
+
+# Pooled SMTP delivery
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "4"))
+SMTP_POOL_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_POOL_MAX_MESSAGES_PER_CONNECTION", "100"))
+SMTP_POOL_IDLE_TIMEOUT_SECONDS = float(os.getenv("SMTP_POOL_IDLE_TIMEOUT_SECONDS", "60"))
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "30"))
+
+# Durable email/report job queue and its worker process (python -m app.worker)
+JOB_QUEUE_URL = os.getenv("JOB_QUEUE_URL", "sqlite:///./email_jobs.sqlite3")
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "30"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "3600"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+JOB_WORKER_POLL_SECONDS = float(os.getenv("JOB_WORKER_POLL_SECONDS", "1"))
+
+# Templates: dev mode re-checks template files on every render (hot reload);
+# a precompiled directory stores the compiled Python modules of the templates
+TEMPLATES_DEV_MODE = os.getenv("TEMPLATES_DEV_MODE", "false").lower() == "true"
+TEMPLATES_PRECOMPILED_DIR = os.getenv("TEMPLATES_PRECOMPILED_DIR", "")
+
+# Cache of rendered PDF reports: in-memory LRU plus an optional on-disk tier
+# shared by every process on the host (empty PDF_CACHE_DIR disables the disk tier)
+PDF_CACHE_ENABLED = os.getenv("PDF_CACHE_ENABLED", "true").lower() == "true"
+PDF_CACHE_MEMORY_MAX_BYTES = int(os.getenv("PDF_CACHE_MEMORY_MAX_BYTES", str(64 * 1024 * 1024)))
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "depreciation_pdf_cache"))
+PDF_CACHE_DISK_MAX_BYTES = int(os.getenv("PDF_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# PDF backend: "weasyprint" lays out the HTML template (high fidelity),
+# "direct" writes the fixed report layout straight to PDF (milliseconds per report)
+PDF_BACKEND = os.getenv("PDF_BACKEND", "weasyprint").lower()
+
+# Bulk mailing campaigns (sent by the worker process)
+CAMPAIGN_MAX_RECIPIENTS = int(os.getenv("CAMPAIGN_MAX_RECIPIENTS", "10000"))
+# Messages per second handed to the SMTP server (providers throttle bulk senders), 0 for no limit
+CAMPAIGN_RATE_LIMIT_PER_SECOND = float(os.getenv("CAMPAIGN_RATE_LIMIT_PER_SECOND", "10"))
+# Distinct reports rendered or being delivered at once (bounds the PDFs held in memory)
+CAMPAIGN_RENDER_CONCURRENCY = int(os.getenv("CAMPAIGN_RENDER_CONCURRENCY", "8"))
+
+# Production server (python -m app.server); workers default to the CPU count
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "0")) or (os.cpu_count() or 1)
+# Keep idle client connections open longer than a load balancer's idle timeout
+SERVER_KEEPALIVE_SECONDS = int(os.getenv("SERVER_KEEPALIVE_SECONDS", "75"))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+# Seconds to let in-flight requests finish on SIGTERM before closing them
+SERVER_GRACEFUL_TIMEOUT_SECONDS = int(os.getenv("SERVER_GRACEFUL_TIMEOUT_SECONDS", "30"))
+# Per-request access log lines cost noticeable throughput at high request rates
+SERVER_ACCESS_LOG = os.getenv("SERVER_ACCESS_LOG", "false").lower() == "true"
+SERVER_DEV_MODE = os.getenv("SERVER_DEV_MODE", "false").lower() == "true"
+
+# Prometheus metrics at /metrics (request latency per route, hot-path timers, cache and queue counters)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# On-demand profiling (admin only, off by default): /api/v1/admin/profiling
+# sessions profile the next N requests to a route or one PDF render
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+# Sent as X-Admin-Token; profiling endpoints refuse every request while it is empty
+PROFILING_ADMIN_TOKEN = os.getenv("PROFILING_ADMIN_TOKEN", "")
+# Staging only: profile single requests that carry X-Profile: cprofile|sampler
+PROFILING_HEADER_MODE = os.getenv("PROFILING_HEADER_MODE", "false").lower() == "true"
+PROFILING_SAMPLE_INTERVAL_SECONDS = float(os.getenv("PROFILING_SAMPLE_INTERVAL_SECONDS", "0.005"))
+PROFILING_MAX_REQUESTS = int(os.getenv("PROFILING_MAX_REQUESTS", "1000"))
+PROFILING_KEEP_SESSIONS = int(os.getenv("PROFILING_KEEP_SESSIONS", "20"))
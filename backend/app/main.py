@@ -1,6 +1,20 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import calculator, email
+from app.routers import calculator
+from app.responses import FastJSONResponse
+from app.services.calculator import unit_curves
+from app.services.parallel import calculation_pool
+from app.services.metrics import metrics, MetricsMiddleware, register_service_collectors, CONTENT_TYPE
+from app.services.profiling import ProfilingMiddleware
+from app.config import (
+    CURVE_TABLE_WARM_MAX_LIFE,
+    EMAIL_ENABLED,
+    METRICS_ENABLED,
+    PROFILING_ENABLED,
+    PROFILING_ADMIN_TOKEN,
+    PROFILING_HEADER_MODE,
+    PROFILING_SAMPLE_INTERVAL_SECONDS,
+)
 import logging
 
 # Configure logging
@@ -18,7 +32,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Tax Depreciation Calculator API",
     description="API for calculating tax depreciation for properties",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # Configure CORS
@@ -30,6 +45,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Admin-only profiling; without PROFILING_ENABLED neither the middleware nor the routes exist
+if PROFILING_ENABLED:
+    from app.routers import profiling
+
+    app.add_middleware(
+        ProfilingMiddleware,
+        registry=profiling.profilers,
+        admin_token=PROFILING_ADMIN_TOKEN,
+        header_mode=PROFILING_HEADER_MODE,
+        interval=PROFILING_SAMPLE_INTERVAL_SECONDS,
+    )
+    app.include_router(profiling.router, prefix="/api/v1")
+
+# Request latency and in-flight metrics, outermost so they cover every middleware
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    register_service_collectors(email=EMAIL_ENABLED)
+
+    @app.get("/metrics", include_in_schema=False)
+    def prometheus_metrics():
+        """Metrics of this worker process in the Prometheus text format"""
+        return Response(metrics.expose(), media_type=CONTENT_TYPE)
+
 # Debug route to see what paths are being received
 @app.get("/debug")
 async def debug_route(request: Request):
@@ -50,9 +88,49 @@ async def api_v1_debug_route(request: Request):
         "method": request.method
     }
 
+@app.on_event("startup")
+async def warm_unit_curves():
+    """Precompute the unit depreciation curves for common effective lives"""
+    unit_curves.warm(range(1, CURVE_TABLE_WARM_MAX_LIFE + 1))
+    stats = unit_curves.stats()
+    logger.info(f"Unit curve table warmed: {stats['curves']} curves, {stats['memory_bytes']} bytes")
+
+@app.on_event("startup")
+def start_calculation_pool():
+    """Spawn the batch calculation workers before the first large batch"""
+    calculation_pool.start()
+
+@app.on_event("shutdown")
+def stop_calculation_pool():
+    """Let running chunks finish, then stop the calculation worker processes"""
+    calculation_pool.shutdown(wait=True)
+
 # Include routers
 app.include_router(calculator.router, prefix="/api/v1")
-app.include_router(email.router, prefix="/api/v1")
+
+# The email/PDF stack (templates, SMTP, job queue; WeasyPrint on first render) is
+# only imported when enabled, so calculator-only deployments start much faster
+if EMAIL_ENABLED:
+    from app.routers import email
+    from app.services.email_service import pdf_render_pool, smtp_pool
+    from app.services.templates import templates
+
+    app.include_router(email.router, prefix="/api/v1")
+
+    @app.on_event("startup")
+    def load_templates():
+        """Compile the email and PDF templates once, before the first request"""
+        templates.load()
+
+    @app.on_event("shutdown")
+    def stop_pdf_render_pool():
+        """Let in-flight PDF jobs finish, then stop the worker processes"""
+        pdf_render_pool.shutdown(wait=True)
+
+    @app.on_event("shutdown")
+    async def close_smtp_pool():
+        """Close pooled SMTP connections cleanly"""
+        await smtp_pool.close()
 
 @app.get("/")
 async def root():
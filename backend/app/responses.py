@@ -0,0 +1,260 @@
+import importlib.util
+import json
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+from app.schemas.calculator import ScenarioSweepResponse
+from app.services.schedule import DepreciationSchedule
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the standard json module
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # MessagePack responses are optional
+    msgpack = None
+
+# Arrow and Parquet responses are optional too; pyarrow is only imported on
+# first use, it would add noticeably to startup
+ARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+# Default response class of the app: orjson is several times faster at
+# serializing the large float-heavy calculation results
+FastJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+# Layouts of the yearly breakdown in calculation results
+ROWS = "rows"  # a list of {"year", "diminishing_value", ...} objects, as before
+COLUMNS = "columns"  # one array per field, e.g. {"year": [1, 2, ...], "total": [...]}
+BREAKDOWN_FORMATS = (ROWS, COLUMNS)
+
+# Result encodings chosen by the Accept header
+JSON = "application/json"
+MSGPACK = "application/msgpack"  # same content as the JSON, for service-to-service calls
+ARROW = "application/vnd.apache.arrow.stream"  # Arrow IPC stream, one row per property and year
+PARQUET = "application/vnd.apache.parquet"  # the same table as a Parquet file
+MEDIA_TYPE_ALIASES = {
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+    "application/x-parquet": PARQUET,
+}
+# Responses depend on the Accept header, so shared caches must key on it
+VARY = {"Vary": "Accept"}
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize plain JSON content (dicts, lists, numbers, strings) to bytes.
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":")).encode("utf-8")
+
+
+def depreciation_payload(schedule: DepreciationSchedule, breakdown: str = ROWS) -> Dict[str, Any]:
+    """
+    A calculation result as plain JSON content, read straight from the schedule.
+
+    Results come from the calculator, so unlike FastAPI's response_model path
+    they are not turned into models and validated before serializing.
+    """
+    if breakdown != COLUMNS:
+        return schedule.to_dict()
+    return {
+        "property_type": schedule.property_type.value,
+        "purchase_price": schedule.purchase_price,
+        "total_depreciable_amount": schedule.total_depreciable_amount,
+        "yearly_breakdown": {
+            "year": schedule.years.tolist(),
+            "diminishing_value": schedule.diminishing_value.tolist(),
+            "prime_cost": schedule.prime_cost.tolist(),
+            "capital_works": schedule.capital_works.tolist(),
+            "total": schedule.total.tolist(),
+        },
+        "first_year_depreciation": schedule.first_year_depreciation,
+        "five_year_depreciation": schedule.five_year_depreciation,
+    }
+
+
+def batch_payload(
+    outcomes: List[Tuple[Optional[DepreciationSchedule], Optional[str]]], breakdown: str = ROWS
+) -> Dict[str, Any]:
+    """
+    A BatchDepreciationResponse as plain JSON content, from (result, error) per item.
+    """
+    results = [
+        {
+            "index": index,
+            "result": depreciation_payload(result, breakdown) if result is not None else None,
+            "error": error,
+        }
+        for index, (result, error) in enumerate(outcomes)
+    ]
+    failed = sum(1 for _, error in outcomes if error is not None)
+    return {"results": results, "succeeded": len(outcomes) - failed, "failed": failed}
+
+
+def session_payload(
+    session_id: str, asset_ids: List[int], added_asset_ids: List[int], expires_in_seconds: float,
+    result: DepreciationSchedule, breakdown: str = ROWS
+) -> Dict[str, Any]:
+    """
+    A CalculationSessionResponse as plain JSON content.
+    """
+    return {
+        "session_id": session_id,
+        "asset_ids": asset_ids,
+        "added_asset_ids": added_asset_ids,
+        "expires_in_seconds": expires_in_seconds,
+        "result": depreciation_payload(result, breakdown),
+    }
+
+
+def sweep_payload(response: ScenarioSweepResponse, breakdown: str = ROWS) -> Dict[str, Any]:
+    """
+    A ScenarioSweepResponse as plain JSON content.
+    """
+    return {
+        "axes": response.axes,
+        "shape": response.shape,
+        "first_year_depreciation": response.first_year_depreciation,
+        "five_year_depreciation": response.five_year_depreciation,
+        "total_depreciation": response.total_depreciation,
+        "breakdowns": [
+            {
+                "cell": item.cell,
+                "coordinates": item.coordinates,
+                "result": depreciation_payload(item.result, breakdown),
+            }
+            for item in response.breakdowns
+        ],
+    }
+
+
+def available_media_types() -> List[str]:
+    media_types = [JSON]
+    if msgpack is not None:
+        media_types.append(MSGPACK)
+    if ARROW_AVAILABLE:
+        media_types.extend([ARROW, PARQUET])
+    return media_types
+
+
+def negotiate(accept: Optional[str]) -> Optional[str]:
+    """
+    The encoding to answer with: the available media type with the highest
+    quality in the Accept header (earlier wins ties). No header or */* means
+    JSON; None means nothing acceptable is available.
+    """
+    if not accept:
+        return JSON
+    candidates = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *parameters = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            media_type = media_type.lower()
+            candidates.append((-quality, position, MEDIA_TYPE_ALIASES.get(media_type, media_type)))
+
+    available = available_media_types()
+    for _, _, media_type in sorted(candidates):
+        if media_type in ("*/*", "application/*"):
+            return JSON
+        if media_type in available:
+            return media_type
+    return None
+
+
+def encode_result(schedule: DepreciationSchedule, media_type: str, breakdown: str = ROWS) -> Response:
+    """
+    A /calculate response in the negotiated encoding.
+    """
+    if media_type in (ARROW, PARQUET):
+        return _table_response([(0, schedule)], [], media_type)
+    return _payload_response(depreciation_payload(schedule, breakdown), media_type)
+
+
+def encode_batch(
+    outcomes: List[Tuple[Optional[DepreciationSchedule], Optional[str]]], media_type: str, breakdown: str = ROWS
+) -> Response:
+    """
+    A /calculate/batch response in the negotiated encoding.
+    """
+    if media_type in (ARROW, PARQUET):
+        results = [(index, result) for index, (result, _) in enumerate(outcomes) if result is not None]
+        errors = [{"index": index, "error": error} for index, (_, error) in enumerate(outcomes) if error is not None]
+        return _table_response(results, errors, media_type)
+    return _payload_response(batch_payload(outcomes, breakdown), media_type)
+
+
+def _payload_response(content: Dict[str, Any], media_type: str) -> Response:
+    if media_type == MSGPACK:
+        return Response(msgpack.packb(content), media_type=MSGPACK, headers=VARY)
+    return FastJSONResponse(content, headers=VARY)
+
+
+def _table_response(
+    results: List[Tuple[int, DepreciationSchedule]], errors: List[Dict[str, Any]], media_type: str
+) -> Response:
+    """
+    Arrow IPC or Parquet with one row per property and year: index (position
+    in the request), year, diminishing_value, prime_cost, capital_works and
+    total. The per-property values and any errors are JSON in the schema
+    metadata under "results" and "errors".
+    """
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    # Concatenate the schedules' column arrays; Arrow then wraps the buffers without copying
+    columns = {"index": array("i"), "year": array("i")}
+    for name in ("diminishing_value", "prime_cost", "capital_works", "total"):
+        columns[name] = array("d")
+    for index, schedule in results:
+        columns["index"].extend(array("i", [index]) * len(schedule.years))
+        columns["year"].extend(schedule.years)
+        columns["diminishing_value"].extend(schedule.diminishing_value)
+        columns["prime_cost"].extend(schedule.prime_cost)
+        columns["capital_works"].extend(schedule.capital_works)
+        columns["total"].extend(schedule.total)
+    arrays = [
+        pyarrow.Array.from_buffers(
+            pyarrow.int32() if values.typecode == "i" else pyarrow.float64(),
+            len(values),
+            [None, pyarrow.py_buffer(values)],
+        )
+        for values in columns.values()
+    ]
+
+    metadata = {
+        "results": dumps([
+            {
+                "index": index,
+                "property_type": schedule.property_type.value,
+                "purchase_price": schedule.purchase_price,
+                "total_depreciable_amount": schedule.total_depreciable_amount,
+                "first_year_depreciation": schedule.first_year_depreciation,
+                "five_year_depreciation": schedule.five_year_depreciation,
+            }
+            for index, schedule in results
+        ]),
+        "errors": dumps(errors),
+    }
+    table = pyarrow.Table.from_arrays(arrays, names=list(columns), metadata=metadata)
+
+    sink = pyarrow.BufferOutputStream()
+    if media_type == PARQUET:
+        pyarrow.parquet.write_table(table, sink)
+    else:
+        with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return Response(sink.getvalue().to_pybytes(), media_type=media_type, headers=VARY)
@@ -1,16 +1,340 @@
-from fastapi import APIRouter, HTTPException
-from app.schemas.calculator import DepreciationRequest, DepreciationResponse
-from app.services.calculator import calculate_depreciation
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from typing import Any, AsyncIterator, List, Optional, Tuple
+from app.schemas.calculator import (
+    DepreciationRequest,
+    DepreciationResponse,
+    BatchDepreciationResponse,
+    ScenarioSweepRequest,
+    ScenarioSweepResponse,
+    CalculationSessionResponse,
+    SessionPatchRequest,
+)
+from app.services import calculator as calculator_service
+from app.services.calculator import calculate_depreciation, calculate_outcomes
+from app.services.parallel import calculation_pool
+from app.services.scenarios import grid_shape, sweep_scenarios
+from app.services.sessions import CalculationSession, SessionLimitError, calculation_sessions
+from app.responses import (
+    FastJSONResponse,
+    BREAKDOWN_FORMATS,
+    ROWS,
+    ARROW,
+    MSGPACK,
+    PARQUET,
+    available_media_types,
+    depreciation_payload,
+    encode_batch,
+    encode_result,
+    dumps,
+    negotiate,
+    session_payload,
+    sweep_payload,
+)
+from app.config import BATCH_MAX_SIZE, STREAM_MAX_LINE_BYTES, SWEEP_MAX_CELLS, SWEEP_MAX_BREAKDOWNS
+import math
 
 router = APIRouter(tags=["calculator"])
 
-@router.post("/calculate", response_model=DepreciationResponse)
-async def calculate(request: DepreciationRequest):
+def _check_breakdown(breakdown: str):
+    if breakdown not in BREAKDOWN_FORMATS:
+        raise HTTPException(status_code=400, detail=f"breakdown must be one of {', '.join(BREAKDOWN_FORMATS)}")
+
+
+def _negotiate(accept: Optional[str]) -> str:
+    media_type = negotiate(accept)
+    if media_type is None:
+        raise HTTPException(
+            status_code=406,
+            detail=f"Results are available as {', '.join(available_media_types())}"
+        )
+    return media_type
+
+
+# Documented alternative encodings of /calculate and /calculate/batch
+ENCODED_RESPONSES = {
+    200: {
+        "content": {
+            MSGPACK: {},
+            ARROW: {},
+            PARQUET: {},
+        },
+        "description": "JSON, or MessagePack / Arrow IPC / Parquet depending on the Accept header",
+    }
+}
+
+
+@router.post("/calculate", response_model=DepreciationResponse, responses=ENCODED_RESPONSES)
+async def calculate(request: DepreciationRequest, breakdown: str = ROWS, accept: Optional[str] = Header(None)):
     """
-    Calculate tax depreciation based on property information
+    Calculate tax depreciation based on property information.
+
+    `breakdown=columns` returns the yearly breakdown as one array per field.
+    `Accept: application/msgpack` returns the same content as MessagePack;
+    Arrow IPC and Parquet return a table with one row per year.
     """
+    _check_breakdown(breakdown)
+    media_type = _negotiate(accept)
     try:
         result = calculate_depreciation(request)
-        return result
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+    # Returned as a response so FastAPI doesn't validate and copy the result again
+    return encode_result(result, media_type, breakdown)
+
+@router.post("/calculate/batch", response_model=BatchDepreciationResponse, responses=ENCODED_RESPONSES)
+async def calculate_batch(items: List[Any], breakdown: str = ROWS, accept: Optional[str] = Header(None)):
+    """
+    Calculate tax depreciation for a list of properties in one call.
+
+    Results are returned in the same order as the input. Items that fail
+    validation or calculation get an error entry instead of a result.
+    Arrow IPC and Parquet responses have one row per property and year,
+    with the item's position in the `index` column.
+    """
+    _check_breakdown(breakdown)
+    media_type = _negotiate(accept)
+    if len(items) > BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch contains {len(items)} items, the maximum is {BATCH_MAX_SIZE}"
+        )
+
+    # Large batches are split across the calculation worker processes
+    outcomes = await run_in_threadpool(calculation_pool.calculate_items, items)
+
+    # Serialized directly; rebuilding BatchDepreciationResponse would copy every result twice
+    return encode_batch(outcomes, media_type, breakdown)
+
+@router.get("/calculate/batch/pool")
+async def calculation_pool_stats():
+    """
+    Worker processes, chunking settings and counters of the batch calculation pool
+    """
+    return calculation_pool.stats()
+
+
+@router.post("/calculate/sweep", response_model=ScenarioSweepResponse)
+async def calculate_sweep(request: ScenarioSweepRequest, breakdown: str = ROWS):
+    """
+    What-if sweep: calculate every combination of the axes around a base request.
+
+    Returns first-year, five-year and total depreciation per cell as flat
+    row-major lists over `shape`, plus full results for `breakdown_cells`.
+    """
+    _check_breakdown(breakdown)
+    cells = math.prod(grid_shape(request.axes))
+    if cells > SWEEP_MAX_CELLS:
+        raise HTTPException(status_code=413, detail=f"Sweep has {cells} cells, the maximum is {SWEEP_MAX_CELLS}")
+    if len(request.breakdown_cells) > SWEEP_MAX_BREAKDOWNS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{len(request.breakdown_cells)} breakdown cells requested, the maximum is {SWEEP_MAX_BREAKDOWNS}"
+        )
+    try:
+        # CPU-bound for large grids, keep it off the event loop
+        result = await run_in_threadpool(sweep_scenarios, request)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(sweep_payload(result, breakdown))
+
+
+def _session_response(session: CalculationSession, added_asset_ids: List[int], breakdown: str) -> FastJSONResponse:
+    return FastJSONResponse(session_payload(
+        session.id,
+        list(session.assets),
+        added_asset_ids,
+        calculation_sessions.expires_in(session),
+        session.result(),
+        breakdown,
+    ))
+
+
+def _get_session(session_id: str) -> CalculationSession:
+    session = calculation_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Calculation session {session_id} not found or expired")
+    return session
+
+
+@router.post("/calculate/sessions", response_model=CalculationSessionResponse)
+async def create_session(request: DepreciationRequest, breakdown: str = ROWS):
+    """
+    Calculate a property and keep it on the server for incremental edits.
+
+    Each asset gets an ID (in `asset_ids`, in request order) that PATCH
+    operations refer to. Sessions expire after CALC_SESSION_TTL_SECONDS unused.
+    """
+    _check_breakdown(breakdown)
+    try:
+        session = calculation_sessions.create(request)
+    except SessionLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _session_response(session, list(session.assets), breakdown)
+
+@router.get("/calculate/sessions/stats")
+async def session_stats():
+    """
+    Live calculation sessions, their memory use and eviction/expiry counters
+    """
+    return calculation_sessions.stats()
+
+@router.get("/calculate/sessions/{session_id}", response_model=CalculationSessionResponse)
+async def get_session(session_id: str, breakdown: str = ROWS):
+    """
+    The current result of a calculation session
+    """
+    _check_breakdown(breakdown)
+    return _session_response(_get_session(session_id), [], breakdown)
+
+@router.patch("/calculate/sessions/{session_id}", response_model=CalculationSessionResponse)
+async def edit_session(session_id: str, patch: SessionPatchRequest, breakdown: str = ROWS):
+    """
+    Add, remove or modify assets and return the updated result.
+
+    Only the edited assets are recalculated, so an edit costs the same for a
+    schedule of 3 or 3,000 assets. Operations apply in order and all or none
+    of them are applied.
+    """
+    _check_breakdown(breakdown)
+    session = _get_session(session_id)
+    try:
+        added_asset_ids = calculation_sessions.edit(session, patch.operations)
+    except SessionLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _session_response(session, added_asset_ids, breakdown)
+
+@router.delete("/calculate/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """
+    Drop a calculation session
+    """
+    if not calculation_sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"Calculation session {session_id} not found or expired")
+    return {"status": "success", "message": "Calculation session deleted"}
+
+
+@router.get("/calculate/cache/stats")
+async def cache_stats():
+    """
+    Hit/miss/eviction counters for the calculation result cache
+    """
+    if calculator_service.result_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **calculator_service.result_cache.stats()}
+
+@router.get("/calculate/curves/stats")
+async def curve_table_stats():
+    """
+    Size and memory footprint of the memoized unit depreciation curves
+    """
+    return calculator_service.unit_curves.stats()
+
+@router.delete("/calculate/cache")
+async def clear_cache():
+    """
+    Drop every cached calculation result
+    """
+    if calculator_service.result_cache is not None:
+        calculator_service.result_cache.clear()
+    return {"status": "success", "message": "Result cache cleared"}
+
+
+@router.post("/calculate/stream")
+async def calculate_stream(request: Request):
+    """
+    Calculate tax depreciation for newline-delimited JSON input.
+
+    Each input line is a DepreciationRequest and produces one output line: the
+    DepreciationResponse, or {"line": n, "error": "..."} if that line failed.
+    Input is read and results are written incrementally, so memory use does
+    not grow with the size of the upload.
+    """
+    return NDJSONStreamingResponse(_stream_calculations(request))
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streaming response that lets the body generator keep reading the request.
+
+    StreamingResponse normally listens for client disconnects on receive(),
+    which would compete with request.stream() for the upload. Here the
+    generator owns receive() and sees disconnects itself, and each chunk is
+    only produced after the previous send() completes (back-pressure).
+    """
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def _ndjson_error(line_number: int, error: str) -> bytes:
+    return dumps({"line": line_number, "error": error}) + b"\n"
+
+
+def _calculate_ndjson_lines(lines: List[Tuple[int, bytes]]) -> bytes:
+    """
+    Turn a group of numbered NDJSON input lines into their output lines, in order.
+    """
+    outputs = [b""] * len(lines)
+    valid_positions = []
+    valid_requests = []
+    for position, (line_number, line) in enumerate(lines):
+        if len(line) > STREAM_MAX_LINE_BYTES:
+            outputs[position] = _ndjson_error(line_number, f"Line exceeds {STREAM_MAX_LINE_BYTES} bytes")
+            continue
+        try:
+            valid_requests.append(DepreciationRequest.parse_raw(line))
+            valid_positions.append(position)
+        except ValidationError as e:
+            outputs[position] = _ndjson_error(line_number, str(e))
+
+    for position, (result, error) in zip(valid_positions, calculate_outcomes(valid_requests)):
+        line_number = lines[position][0]
+        outputs[position] = dumps(depreciation_payload(result)) + b"\n" if error is None else _ndjson_error(line_number, error)
+
+    return b"".join(outputs)
+
+
+async def _stream_calculations(request: Request) -> AsyncIterator[bytes]:
+    """
+    Read the request body chunk by chunk and yield NDJSON results as they are ready.
+
+    All complete lines in a received chunk are calculated together as one small
+    batch in the thread pool, keeping the event loop free for other requests.
+    """
+    buffer = b""
+    line_number = 0
+    discarding = False  # True while skipping the rest of an oversized line
+
+    async for chunk in request.stream():
+        *lines, buffer = (buffer + chunk).split(b"\n")
+
+        pending = []
+        for line in lines:
+            line_number += 1
+            if discarding:
+                # Tail of an oversized line that has already been reported
+                discarding = False
+            elif line.strip():
+                pending.append((line_number, line))
+
+        if pending:
+            yield await run_in_threadpool(_calculate_ndjson_lines, pending)
+
+        if len(buffer) > STREAM_MAX_LINE_BYTES:
+            if not discarding:
+                yield _ndjson_error(line_number + 1, f"Line exceeds {STREAM_MAX_LINE_BYTES} bytes")
+                discarding = True
+            buffer = b""
+
+    if buffer.strip() and not discarding:
+        yield await run_in_threadpool(_calculate_ndjson_lines, [(line_number + 1, buffer)])
@@ -1,8 +1,16 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Request
+from fastapi import APIRouter, HTTPException, Query, Request
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, EmailStr
 from typing import Optional, Dict, Any, List
-from app.services.email_service import send_email_with_report
+import json
+import math
+from app.services.email_service import send_email_with_report, pdf_render_pool, pdf_cache, smtp_pool
+from app.services.job_queue import email_job_queue
+from app.services.campaign import campaign_store
+from app.services.templates import templates
 from app.schemas.calculator import DepreciationResponse, DepreciationYearDetail
+from app.services.schedule import DepreciationSchedule
+from app.config import CAMPAIGN_MAX_RECIPIENTS, CAMPAIGN_RATE_LIMIT_PER_SECOND
 import logging
 
 router = APIRouter(
@@ -17,6 +25,10 @@ class EmailReportRequest(BaseModel):
     report: DepreciationResponse
     includeAttachment: bool = True
 
+class CampaignRequest(BaseModel):
+    recipients: List[EmailReportRequest]
+    rateLimitPerSecond: Optional[float] = None
+
 @router.get("/test")
 async def test_email_route(request: Request):
     """Test endpoint to verify the email router is working"""
@@ -26,26 +38,137 @@ async def test_email_route(request: Request):
         "full_url": str(request.url)
     }
 
+@router.get("/pdf-pool/stats")
+async def pdf_pool_stats():
+    """Queue depth, throughput and render latency of the PDF worker pool"""
+    return pdf_render_pool.stats()
+
+@router.get("/pdf-cache/stats")
+async def pdf_cache_stats():
+    """Hit rate and bytes saved by the rendered PDF cache"""
+    if pdf_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **pdf_cache.stats()}
+
+@router.delete("/pdf-cache")
+async def clear_pdf_cache():
+    """Drop every cached PDF, e.g. after changing the report layout"""
+    if pdf_cache is not None:
+        await run_in_threadpool(pdf_cache.clear)
+    return {"status": "success", "message": "PDF cache cleared"}
+
+@router.get("/templates/stats")
+async def template_stats():
+    """Template registry state: loaded templates, dev mode and render count"""
+    return templates.stats()
+
+@router.get("/smtp-pool/stats")
+async def smtp_pool_stats():
+    """Connection reuse and delivery counters of the SMTP connection pool"""
+    return smtp_pool.stats()
+
 @router.post("/send-report")
-async def send_report(request: EmailReportRequest, background_tasks: BackgroundTasks):
+async def send_report(request: EmailReportRequest):
     try:
         # Log request for debugging
         logging.info(f"Received email request for: {request.to}")
         
-        # Process the email in the background so we don't hold up the response
-        background_tasks.add_task(
-            send_email_with_report,
-            to_email=request.to,
-            name=request.name,
-            report=request.report,
-            include_attachment=request.includeAttachment
+        # Store the email in the durable job queue; the worker process (python -m app.worker) delivers it
+        job_id = await run_in_threadpool(
+            email_job_queue.enqueue,
+            "send_report",
+            {
+                "to": request.to,
+                "name": request.name,
+                "report": json.loads(request.report.json()),
+                "include_attachment": request.includeAttachment
+            }
         )
         
-        return {"status": "success", "message": "Email queued for delivery"}
+        return {"status": "success", "message": "Email queued for delivery", "job_id": job_id}
     except Exception as e:
         logging.error(f"Error sending email: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to send email: {str(e)}")
 
+@router.get("/jobs/stats")
+async def job_queue_stats():
+    """Queue depth per state plus recent throughput and latency"""
+    return await run_in_threadpool(email_job_queue.stats)
+
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Delivery status of a queued email"""
+    job = await run_in_threadpool(email_job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@router.post("/campaigns")
+async def create_campaign(request: CampaignRequest):
+    """
+    Queue a bulk mailing: each distinct report is rendered once and delivered to
+    all of its recipients by the worker, paced by the campaign's rate limit.
+    """
+    if not request.recipients:
+        raise HTTPException(status_code=400, detail="Campaign has no recipients")
+    if len(request.recipients) > CAMPAIGN_MAX_RECIPIENTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Campaign has {len(request.recipients)} recipients, the maximum is {CAMPAIGN_MAX_RECIPIENTS}"
+        )
+    rate_limit = request.rateLimitPerSecond if request.rateLimitPerSecond is not None else CAMPAIGN_RATE_LIMIT_PER_SECOND
+    # 0 is the only way to ask for no limit; a negative or non-finite rate is a mistake
+    if not (math.isfinite(rate_limit) and rate_limit >= 0):
+        raise HTTPException(
+            status_code=400,
+            detail=f"rateLimitPerSecond must be 0 (no limit) or a positive number, got {rate_limit}"
+        )
+    try:
+        campaign = await run_in_threadpool(
+            campaign_store.create,
+            [
+                {
+                    "to": entry.to,
+                    "name": entry.name,
+                    "report": entry.report,
+                    "include_attachment": entry.includeAttachment
+                }
+                for entry in request.recipients
+            ],
+            rate_limit
+        )
+        job_id = await run_in_threadpool(
+            email_job_queue.enqueue, "send_campaign", {"campaign_id": campaign["campaign_id"]}
+        )
+        logging.info(
+            f"Campaign {campaign['campaign_id']} queued: {campaign['total']} recipients, "
+            f"{campaign['unique_reports']} distinct reports"
+        )
+        return {"status": "success", "message": "Campaign queued for delivery", "job_id": job_id, **campaign}
+    except Exception as e:
+        logging.error(f"Error creating campaign: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to create campaign: {str(e)}")
+
+@router.get("/campaigns/{campaign_id}")
+async def campaign_status(campaign_id: str):
+    """Progress of a campaign: recipients pending, sent and failed, rate and ETA"""
+    campaign = await run_in_threadpool(campaign_store.get, campaign_id)
+    if campaign is None:
+        raise HTTPException(status_code=404, detail=f"Campaign {campaign_id} not found")
+    return campaign
+
+@router.get("/campaigns/{campaign_id}/recipients")
+async def campaign_recipients(
+    campaign_id: str,
+    status: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Per-recipient delivery status, optionally filtered by state (pending/sent/failed)"""
+    if not await run_in_threadpool(campaign_store.exists, campaign_id):
+        raise HTTPException(status_code=404, detail=f"Campaign {campaign_id} not found")
+    return await run_in_threadpool(campaign_store.recipients, campaign_id, status, offset, limit)
+
 @router.get("/send-test-email")
 async def send_test_email(email: Optional[str] = None, include_attachment: bool = True):
     """
@@ -87,7 +210,7 @@ async def send_test_email(email: Optional[str] = None, include_attachment: bool
         await send_email_with_report(
             to_email=to_email,
             name="Test User",
-            report=test_report,
+            report=DepreciationSchedule.from_response(test_report),
             include_attachment=include_attachment
         )
         
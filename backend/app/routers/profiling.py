@@ -0,0 +1,158 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from typing import Optional
+import json
+from app.schemas.calculator import DepreciationResponse
+from app.services.schedule import DepreciationSchedule
+from app.services.profiling import (
+    ProfilerRegistry,
+    ProfileSession,
+    MODES,
+    SAMPLER,
+    FORMATS,
+    profile_call,
+    token_matches,
+)
+from app.config import (
+    PROFILING_ADMIN_TOKEN,
+    PROFILING_SAMPLE_INTERVAL_SECONDS,
+    PROFILING_MAX_REQUESTS,
+    PROFILING_KEEP_SESSIONS,
+)
+import logging
+
+
+def require_admin(x_admin_token: str = Header("")):
+    """Only callers presenting PROFILING_ADMIN_TOKEN may profile"""
+    if not token_matches(x_admin_token, PROFILING_ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+router = APIRouter(
+    prefix="/admin/profiling",
+    tags=["admin"],
+    dependencies=[Depends(require_admin)],
+    responses={404: {"description": "Not found"}},
+)
+
+# Profiling sessions of this worker process
+profilers = ProfilerRegistry(PROFILING_KEEP_SESSIONS)
+
+# Accepted sampling intervals: shorter ones spin the sampler thread holding
+# the GIL, longer ones barely sample
+MIN_SAMPLE_INTERVAL_SECONDS = 0.001
+MAX_SAMPLE_INTERVAL_SECONDS = 1.0
+
+class ProfileRequest(BaseModel):
+    path: str
+    method: Optional[str] = None
+    requests: int = 10
+    mode: str = SAMPLER
+    intervalSeconds: Optional[float] = None
+
+class PdfProfileRequest(BaseModel):
+    report: DepreciationResponse
+    mode: str = SAMPLER
+    format: Optional[str] = None
+    intervalSeconds: Optional[float] = None
+
+
+def _check_mode(mode: str, format: Optional[str] = None):
+    if mode not in MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(MODES)}")
+    if format is not None and format not in FORMATS[mode]:
+        raise HTTPException(status_code=400, detail=f"{mode} profiles can be returned as {', '.join(FORMATS[mode])}")
+
+
+def _sample_interval(interval: Optional[float]) -> float:
+    if interval is None:
+        return PROFILING_SAMPLE_INTERVAL_SECONDS
+    if not MIN_SAMPLE_INTERVAL_SECONDS <= interval <= MAX_SAMPLE_INTERVAL_SECONDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"intervalSeconds must be between {MIN_SAMPLE_INTERVAL_SECONDS} and {MAX_SAMPLE_INTERVAL_SECONDS}"
+        )
+    return interval
+
+
+def _profile_response(session: ProfileSession, format: Optional[str]) -> Response:
+    content, media_type = session.output(format)
+    if media_type == "application/json":
+        content = json.dumps(content)
+    return Response(
+        content,
+        media_type=media_type,
+        headers={"X-Profile-Id": session.id, "Content-Disposition": f'attachment; filename="profile-{session.id}"'},
+    )
+
+@router.get("")
+async def profiling_stats():
+    """The active profiling session and the finished ones available for download"""
+    return profilers.stats()
+
+@router.post("/sessions")
+async def start_profile(request: ProfileRequest):
+    """
+    Profile the next `requests` requests to `path` (e.g. /api/v1/calculate) in this worker.
+    """
+    _check_mode(request.mode)
+    interval = _sample_interval(request.intervalSeconds)
+    if not 1 <= request.requests <= PROFILING_MAX_REQUESTS:
+        raise HTTPException(status_code=400, detail=f"requests must be between 1 and {PROFILING_MAX_REQUESTS}")
+    session = ProfileSession(
+        request.mode,
+        request.path,
+        request.requests,
+        interval,
+        request.method,
+    )
+    if not profilers.start(session):
+        session.finish()
+        raise HTTPException(status_code=409, detail="Another profiling session is running")
+    logging.info(f"Profiling the next {request.requests} requests to {request.path} ({request.mode})")
+    return session.to_dict()
+
+@router.get("/sessions/{session_id}")
+async def get_profile(session_id: str, format: Optional[str] = None):
+    """
+    Progress of a session, or the profile once it has finished (speedscope or
+    collapsed stacks for the sampler, pstats or text for cProfile).
+    """
+    session = profilers.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Profiling session not found")
+    if not session.done:
+        return session.to_dict()
+    _check_mode(session.mode, format)
+    return _profile_response(session, format)
+
+@router.delete("/sessions")
+async def stop_profile():
+    """Stop the active session early; what was collected so far can still be downloaded"""
+    session = profilers.cancel()
+    if session is None:
+        raise HTTPException(status_code=404, detail="No profiling session is running")
+    return session.to_dict()
+
+@router.post("/pdf")
+async def profile_pdf(request: PdfProfileRequest):
+    """
+    Profile one generate_pdf_report call for the given report, rendered in this
+    process (not the render pool) and bypassing the PDF cache.
+    """
+    from app.services.email_service import generate_pdf_report
+
+    _check_mode(request.mode, request.format)
+    session = ProfileSession(request.mode, None, 1, _sample_interval(request.intervalSeconds))
+    if not profilers.start(session):
+        session.finish()
+        raise HTTPException(status_code=409, detail="Another profiling session is running")
+    try:
+        await run_in_threadpool(
+            profile_call, session, generate_pdf_report, DepreciationSchedule.from_response(request.report)
+        )
+    except Exception as e:
+        logging.error(f"Error profiling PDF generation: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to profile PDF generation: {str(e)}")
+    return _profile_response(session, request.format)
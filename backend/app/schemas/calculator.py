@@ -26,6 +26,21 @@ class DepreciationRequest(BaseModel):
     is_new_property: bool
     assets: List[AssetItem] = Field(default_factory=list)
 
+class AssetOperationType(str, Enum):
+    ADD = "add"
+    REMOVE = "remove"
+    MODIFY = "modify"
+
+class AssetOperation(BaseModel):
+    op: AssetOperationType
+    # Session asset ID to remove or modify (IDs are assigned by the server)
+    asset_id: Optional[int] = None
+    # The new or replacement asset for add and modify
+    asset: Optional[AssetItem] = None
+
+class SessionPatchRequest(BaseModel):
+    operations: List[AssetOperation]
+
 class DepreciationYearDetail(BaseModel):
     year: int
     diminishing_value: float
@@ -39,4 +54,56 @@ class DepreciationResponse(BaseModel):
     total_depreciable_amount: float
     yearly_breakdown: List[DepreciationYearDetail]
     first_year_depreciation: float
-    five_year_depreciation: float 
\ No newline at end of file
+    five_year_depreciation: float 
+
+class CalculationSessionResponse(BaseModel):
+    session_id: str
+    # IDs of the session's assets, in the order they were added
+    asset_ids: List[int]
+    # IDs given to the assets added by this call
+    added_asset_ids: List[int]
+    expires_in_seconds: float
+    result: DepreciationResponse
+
+class BatchItemResult(BaseModel):
+    index: int
+    result: Optional[DepreciationResponse] = None
+    error: Optional[str] = None
+
+class BatchDepreciationResponse(BaseModel):
+    results: List[BatchItemResult]
+    succeeded: int
+    failed: int
+
+class ScenarioAxes(BaseModel):
+    """
+    Values to try for each varied field of the base request. Omitted fields
+    keep the base value; the grid is the cartesian product of the given axes,
+    in the order below.
+    """
+    purchase_price: Optional[List[float]] = None
+    purchase_date: Optional[List[date]] = None
+    construction_date: Optional[List[date]] = None
+    is_new_property: Optional[List[bool]] = None
+    property_type: Optional[List[PropertyType]] = None
+    assets: Optional[List[List[AssetItem]]] = None
+
+class ScenarioSweepRequest(BaseModel):
+    base: DepreciationRequest
+    axes: ScenarioAxes
+    # Flat (row-major) indexes of the cells to return full results for
+    breakdown_cells: List[int] = Field(default_factory=list)
+
+class ScenarioBreakdown(BaseModel):
+    cell: int
+    coordinates: List[int]
+    result: DepreciationResponse
+
+class ScenarioSweepResponse(BaseModel):
+    axes: List[str]
+    shape: List[int]
+    # One value per cell, flattened in row-major order (the last axis varies fastest)
+    first_year_depreciation: List[float]
+    five_year_depreciation: List[float]
+    total_depreciation: List[float]
+    breakdowns: List[ScenarioBreakdown]
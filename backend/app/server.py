@@ -0,0 +1,70 @@
+import argparse
+import importlib.util
+import logging
+import uvicorn
+from app.config import (
+    SERVER_HOST,
+    SERVER_PORT,
+    SERVER_WORKERS,
+    SERVER_KEEPALIVE_SECONDS,
+    SERVER_BACKLOG,
+    SERVER_GRACEFUL_TIMEOUT_SECONDS,
+    SERVER_ACCESS_LOG,
+    SERVER_DEV_MODE,
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+
+APP = "app.main:app"
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def run(dev: bool = SERVER_DEV_MODE, workers: int = SERVER_WORKERS, host: str = SERVER_HOST, port: int = SERVER_PORT):
+    """
+    Start the API.
+
+    Production mode runs `workers` processes with uvloop and httptools when
+    they are installed, long keep-alive and a deep accept backlog. On SIGTERM
+    each worker stops accepting connections, lets in-flight requests finish
+    (up to SERVER_GRACEFUL_TIMEOUT_SECONDS) and then runs the app's shutdown
+    handlers, which drain the PDF render pool and close pooled SMTP
+    connections. Queued emails are delivered by the separate worker process
+    (python -m app.worker), which drains its own jobs the same way.
+
+    Dev mode is a single process with auto-reload.
+    """
+    if dev:
+        logging.info(f"Starting development server on {host}:{port} with auto-reload")
+        uvicorn.run(APP, host=host, port=port, reload=True)
+        return
+
+    loop = "uvloop" if _available("uvloop") else "asyncio"
+    http = "httptools" if _available("httptools") else "h11"
+    logging.info(f"Starting {workers} workers on {host}:{port} (loop: {loop}, http: {http})")
+    uvicorn.run(
+        APP,
+        host=host,
+        port=port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        timeout_keep_alive=SERVER_KEEPALIVE_SECONDS,
+        backlog=SERVER_BACKLOG,
+        timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        access_log=SERVER_ACCESS_LOG,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Tax Depreciation Calculator API")
+    parser.add_argument("--dev", action="store_true", default=SERVER_DEV_MODE, help="single process with auto-reload")
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    args = parser.parse_args()
+    run(dev=args.dev, workers=args.workers, host=args.host, port=args.port)
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from app.schemas.calculator import DepreciationRequest
+from app.services.schedule import DepreciationSchedule
+
+# Bump when the calculation rules change so old cached results are never served
+CACHE_KEY_VERSION = 2
+
+
+def request_cache_key(request: DepreciationRequest, engine: str) -> str:
+    """
+    Build a canonical, content-addressed key for a calculation request.
+
+    Asset names don't affect the result, so assets are reduced to their
+    category, value and effective life. Their order is kept: the yearly sums
+    are added up in asset order, and reordering can change the last bit. The
+    engine is part of the key so a shared cache never mixes engines' results.
+    """
+    assets = [
+        (asset.category.value, asset.value, asset.effective_life or 0)
+        for asset in request.assets
+    ]
+    canonical = json.dumps(
+        [
+            CACHE_KEY_VERSION,
+            engine,
+            request.property_type.value,
+            request.construction_date.isoformat(),
+            request.purchase_date.isoformat(),
+            request.purchase_price,
+            request.is_new_property,
+            assets,
+        ],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SQLiteCacheBackend:
+    """
+    Shared on-disk cache tier, so hits are shared across uvicorn workers.
+
+    Values are stored as response JSON with an absolute expiry time. The table
+    is trimmed back to `max_entries` (oldest expiry first) every
+    `prune_interval` writes.
+    """
+
+    def __init__(self, path: str, max_entries: int, prune_interval: int = 256):
+        self.path = path
+        self.max_entries = max_entries
+        self.prune_interval = prune_interval
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS result_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM result_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str, ttl_seconds: float):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO result_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl_seconds),
+            )
+            self._writes += 1
+            if self._writes % self.prune_interval == 0:
+                self._prune()
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM result_cache")
+
+    def size(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM result_cache").fetchone()[0]
+
+    def _prune(self):
+        self._connection.execute("DELETE FROM result_cache WHERE expires_at <= ?", (time.time(),))
+        self._connection.execute(
+            "DELETE FROM result_cache WHERE key IN ("
+            "SELECT key FROM result_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+
+class ResultCache:
+    """
+    Size-bounded LRU cache of depreciation results with a time-to-live.
+
+    An optional shared backend sits behind the in-process LRU: misses fall
+    through to it and its hits are promoted into the LRU.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, backend: Optional[SQLiteCacheBackend] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.backend_hits = 0
+
+    def get(self, key: str) -> Optional[DepreciationSchedule]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+
+        if self.backend is not None:
+            try:
+                stored = self.backend.get(key)
+            except sqlite3.Error as e:
+                logging.warning(f"Result cache backend read failed: {str(e)}")
+                stored = None
+            if stored is not None:
+                value = DepreciationSchedule.from_json(stored)
+                self._store(key, value)
+                with self._lock:
+                    self.hits += 1
+                    self.backend_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: DepreciationSchedule):
+        self._store(key, value)
+        if self.backend is not None:
+            try:
+                self.backend.set(key, value.to_json(), self.ttl_seconds)
+            except sqlite3.Error as e:
+                logging.warning(f"Result cache backend write failed: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "backend": "sqlite" if self.backend is not None else "memory",
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "backend_hits": self.backend_hits,
+            }
+        if self.backend is not None:
+            stats["backend_entries"] = self.backend.size()
+        return stats
+
+    def _store(self, key: str, value: DepreciationSchedule):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
@@ -1,41 +1,268 @@
-from app.schemas.calculator import DepreciationRequest, DepreciationResponse, DepreciationYearDetail, AssetCategory
+from app.schemas.calculator import DepreciationRequest, AssetCategory
+from pydantic import ValidationError
+from app.config import (
+    CALCULATOR_ENGINE,
+    CURVE_TABLE_MAX_LIFE,
+    RESULT_CACHE_ENABLED,
+    RESULT_CACHE_MAX_ENTRIES,
+    RESULT_CACHE_TTL_SECONDS,
+    RESULT_CACHE_BACKEND,
+    RESULT_CACHE_SQLITE_PATH,
+    RESULT_CACHE_SQLITE_MAX_ENTRIES,
+)
+from app.services.cache import ResultCache, SQLiteCacheBackend, request_cache_key
+from app.services.curves import UnitCurveTable
+from app.services.metrics import calculated_properties, function_seconds, timed
+from app.services.schedule import DepreciationSchedule
+from array import array
+from typing import Any, Iterable, List, Optional, Tuple
 import datetime
+import logging
 
-def calculate_depreciation(request: DepreciationRequest) -> DepreciationResponse:
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, fall back to the pure-Python engine
+    np = None
+
+# Constants
+CAPITAL_WORKS_RATE = 0.025  # 2.5% per year
+YEARS_TO_CALCULATE = 40  # Calculate for 40 years max
+DEPRECIABLE_SHARE = 0.8  # Assuming 80% of purchase price is depreciable
+BUILDING_SHARE = 0.7  # Assuming 70% of property value is the building
+# In Australia, residential properties built after September 1985 can claim 2.5% depreciation
+CAPITAL_WORKS_START_DATE = datetime.date(1985, 9, 15)
+
+
+def _build_result_cache() -> Optional[ResultCache]:
+    """
+    Create the result cache described by the configuration, or None if disabled.
+    """
+    if not RESULT_CACHE_ENABLED:
+        return None
+    backend = None
+    if RESULT_CACHE_BACKEND == "sqlite":
+        backend = SQLiteCacheBackend(RESULT_CACHE_SQLITE_PATH, RESULT_CACHE_SQLITE_MAX_ENTRIES)
+    return ResultCache(RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_TTL_SECONDS, backend)
+
+
+# Shared result cache (None when caching is disabled)
+result_cache = _build_result_cache()
+
+# Memoized diminishing value factors per effective life, shared by both engines
+unit_curves = UnitCurveTable(YEARS_TO_CALCULATE, CURVE_TABLE_MAX_LIFE)
+
+
+def calculate_depreciation(request: DepreciationRequest) -> DepreciationSchedule:
     """
     Calculate tax depreciation based on property information.
     """
-    # Constants
-    CAPITAL_WORKS_RATE = 0.025  # 2.5% per year
-    years_to_calculate = 40  # Calculate for 40 years max
-    
-    # Initialize results
-    yearly_breakdown = []
-    total_depreciable_amount = request.purchase_price * 0.8  # Assuming 80% of purchase price is depreciable
-    
-    # Capital works component (building structure)
-    # In Australia, residential properties built after September 1985 can claim 2.5% depreciation
-    capital_works_deduction = 0
-    building_value = request.purchase_price * 0.7  # Assuming 70% of property value is the building
-    
-    # Check if property was built after 1985
-    if request.construction_date >= datetime.date(1985, 9, 15):
-        capital_works_deduction = building_value * CAPITAL_WORKS_RATE
-    
+    return calculate_depreciation_batch([request])[0]
+
+
+@timed(function_seconds, "calculate_depreciation")
+def calculate_depreciation_batch(requests: List[DepreciationRequest]) -> List[DepreciationSchedule]:
+    """
+    Calculate tax depreciation for many properties at once.
+
+    Results already in the result cache are reused. The remaining distinct
+    requests are evaluated together in a single asset x year matrix, and
+    results are returned in request order.
+    """
+    if result_cache is None:
+        return _calculate_uncached(requests)
+
+    engine = active_engine()
+    keys = [request_cache_key(request, engine) for request in requests]
+    cached = [result_cache.get(key) for key in keys]
+
+    # Calculate each distinct missing request once
+    pending = {}
+    for key, result, request in zip(keys, cached, requests):
+        if result is None and key not in pending:
+            pending[key] = request
+    computed = dict(zip(pending, _calculate_uncached(list(pending.values()))))
+    for key, response in computed.items():
+        result_cache.set(key, response)
+
+    return [result if result is not None else computed[key] for key, result in zip(keys, cached)]
+
+
+def calculate_outcomes(requests: List[DepreciationRequest]) -> List[Tuple[Optional[DepreciationSchedule], Optional[str]]]:
+    """
+    Calculate a list of validated requests, returning (result, error) per request.
+    """
+    try:
+        return [(response, None) for response in calculate_depreciation_batch(requests)]
+    except Exception as e:
+        # Fall back to one calculation per item so a bad item only fails itself
+        logging.warning(f"Batch calculation failed, retrying items individually: {str(e)}")
+        outcomes = []
+        for request in requests:
+            try:
+                outcomes.append((calculate_depreciation(request), None))
+            except Exception as item_error:
+                outcomes.append((None, str(item_error)))
+        return outcomes
+
+
+def calculate_items(items: List[Any]) -> List[Tuple[Optional[DepreciationSchedule], Optional[str]]]:
+    """
+    Validate and calculate raw request items (e.g. from a batch body),
+    returning (result, error) per item in order. Items that aren't objects
+    get an error like any other invalid item.
+    """
+    # (result, error) per item
+    outcomes: List[Tuple[Optional[DepreciationSchedule], Optional[str]]] = [(None, None)] * len(items)
+
+    # Validate every item in one pass, keeping the valid ones for the engine
+    valid_indexes = []
+    valid_requests = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            outcomes[index] = (None, "Item must be a JSON object")
+            continue
+        try:
+            valid_requests.append(DepreciationRequest.parse_obj(item))
+            valid_indexes.append(index)
+        except ValidationError as e:
+            outcomes[index] = (None, str(e))
+
+    for index, outcome in zip(valid_indexes, calculate_outcomes(valid_requests)):
+        outcomes[index] = outcome
+    return outcomes
+
+
+def _calculate_uncached(requests: List[DepreciationRequest]) -> List[DepreciationSchedule]:
+    """
+    Run the configured engine over a list of requests.
+    """
+    calculated_properties.inc(amount=len(requests))
+    schedules = plant_equipment_schedules([request.assets for request in requests])
+    return [
+        build_schedule(request, dv_by_year, pc_by_year)
+        for request, (dv_by_year, pc_by_year) in zip(requests, schedules)
+    ]
+
+
+def plant_equipment_schedules(asset_lists: List[list]) -> Iterable[Tuple[List[float], List[float]]]:
+    """
+    Plant and equipment depreciation for every year, per list of assets,
+    using the configured engine.
+    """
     # Plant and equipment assets (fixtures and fittings)
-    plant_equipment_assets = [asset for asset in request.assets if asset.category == AssetCategory.PLANT_EQUIPMENT]
-    
-    # Calculate yearly depreciation for each year
-    for year in range(1, years_to_calculate + 1):
-        # Calculate plant and equipment depreciation
+    asset_lists = [
+        [asset for asset in assets if asset.category == AssetCategory.PLANT_EQUIPMENT]
+        for assets in asset_lists
+    ]
+
+    engine = active_engine()
+    if engine == "numpy":
+        dv_matrix, pc_matrix = _plant_equipment_numpy_batch(asset_lists, YEARS_TO_CALCULATE)
+        return zip(dv_matrix.tolist(), pc_matrix.tolist())
+    if engine == "reference":
+        return (_plant_equipment_reference(assets, YEARS_TO_CALCULATE) for assets in asset_lists)
+    return (_plant_equipment_python(assets, YEARS_TO_CALCULATE) for assets in asset_lists)
+
+
+def active_engine() -> str:
+    """
+    The engine that runs: the configured one, or python when NumPy is missing.
+    """
+    if CALCULATOR_ENGINE == "numpy":
+        return "numpy" if np is not None else "python"
+    return "reference" if CALCULATOR_ENGINE == "reference" else "python"
+
+
+def capital_works_deduction(purchase_price: float, construction_date: datetime.date) -> float:
+    """
+    Yearly capital works deduction for the building structure.
+    """
+    if construction_date >= CAPITAL_WORKS_START_DATE:
+        return purchase_price * BUILDING_SHARE * CAPITAL_WORKS_RATE
+    return 0.0
+
+
+def build_schedule(
+    request: DepreciationRequest,
+    dv_by_year: List[float],
+    pc_by_year: List[float]
+) -> DepreciationSchedule:
+    """
+    Combine the plant and equipment schedule with capital works into a result.
+    """
+    total_depreciable_amount = request.purchase_price * DEPRECIABLE_SHARE
+
+    # Capital works component (building structure)
+    capital_works = capital_works_deduction(request.purchase_price, request.construction_date)
+
+    # float() because the reference engine reports years without assets as int 0
+    dv_by_year = [float(value) for value in dv_by_year]
+    pc_by_year = [float(value) for value in pc_by_year]
+
+    # Total for each year
+    totals = array("d", [round(max(dv, pc) + capital_works, 2) for dv, pc in zip(dv_by_year, pc_by_year)])
+
+    # Calculate first year and five-year totals
+    first_year_depreciation = totals[0] if totals else 0
+    five_year_depreciation = sum(totals[:5]) if totals else 0
+
+    return DepreciationSchedule(
+        property_type=request.property_type,
+        purchase_price=request.purchase_price,
+        total_depreciable_amount=round(total_depreciable_amount, 2),
+        years=array("i", range(1, len(totals) + 1)),
+        diminishing_value=array("d", [round(value, 2) for value in dv_by_year]),
+        prime_cost=array("d", [round(value, 2) for value in pc_by_year]),
+        capital_works=array("d", [round(capital_works, 2)]) * len(totals),
+        total=totals,
+        first_year_depreciation=round(first_year_depreciation, 2),
+        five_year_depreciation=round(five_year_depreciation, 2)
+    )
+
+
+def accumulate_asset(dv_by_year: List[float], prime_cost: float, asset) -> float:
+    """
+    Add one asset's deductions to running yearly totals, with the same
+    operations as the reference loop. Returns the new prime cost total.
+    """
+    shares = unit_curves.remaining_shares(asset.effective_life)
+    dv_rate = unit_curves.dv_rate(asset.effective_life)
+    value = asset.value
+    for index in range(len(dv_by_year)):
+        dv_by_year[index] += value * shares[index] * dv_rate
+    return prime_cost + value * unit_curves.pc_rate(asset.effective_life)
+
+
+def _plant_equipment_python(assets: list, years: int) -> Tuple[List[float], List[float]]:
+    """
+    Pure-Python engine: the reference loop with the per-year factors looked up
+    in the memoized table, so results are bit-identical to it.
+    """
+    dv_by_year = [0.0] * years
+    prime_cost = 0.0
+    for asset in assets:
+        # Skip assets with no effective life
+        if asset.effective_life:
+            prime_cost = accumulate_asset(dv_by_year, prime_cost, asset)
+    return dv_by_year, [prime_cost] * years
+
+
+def _plant_equipment_reference(assets: list, years: int) -> Tuple[List[float], List[float]]:
+    """
+    Reference engine: loop over every year and every asset.
+    """
+    dv_by_year = []
+    pc_by_year = []
+
+    for year in range(1, years + 1):
         diminishing_value = 0
         prime_cost = 0
-        
-        for asset in plant_equipment_assets:
+
+        for asset in assets:
             # Skip assets with no effective life
             if not asset.effective_life:
                 continue
-                
+
             # Diminishing value method - 200% / effective life
             dv_rate = 2.0 / asset.effective_life
             if year == 1:
@@ -44,31 +271,79 @@ def calculate_depreciation(request: DepreciationRequest) -> DepreciationResponse
                 # Apply rate to remaining value (simplified)
                 remaining_value = asset.value * max(0, (1 - dv_rate) ** (year - 1))
                 diminishing_value += remaining_value * dv_rate
-                
+
             # Prime cost method - 100% / effective life
             pc_rate = 1.0 / asset.effective_life
             prime_cost += asset.value * pc_rate
-            
-        # Total for the year
-        year_total = max(diminishing_value, prime_cost) + capital_works_deduction
-        
-        yearly_breakdown.append(DepreciationYearDetail(
-            year=year,
-            diminishing_value=round(diminishing_value, 2),
-            prime_cost=round(prime_cost, 2),
-            capital_works=round(capital_works_deduction, 2),
-            total=round(year_total, 2)
-        ))
-    
-    # Calculate first year and five-year totals
-    first_year_depreciation = yearly_breakdown[0].total if yearly_breakdown else 0
-    five_year_depreciation = sum(detail.total for detail in yearly_breakdown[:5]) if yearly_breakdown else 0
-    
-    return DepreciationResponse(
-        property_type=request.property_type,
-        purchase_price=request.purchase_price,
-        total_depreciable_amount=round(total_depreciable_amount, 2),
-        yearly_breakdown=yearly_breakdown,
-        first_year_depreciation=round(first_year_depreciation, 2),
-        five_year_depreciation=round(five_year_depreciation, 2)
-    ) 
\ No newline at end of file
+
+        dv_by_year.append(diminishing_value)
+        pc_by_year.append(prime_cost)
+
+    return dv_by_year, pc_by_year
+
+
+def _plant_equipment_numpy_batch(asset_lists: List[list], years: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Vectorised engine: evaluate every request in one go.
+
+    Each asset's deductions are computed as in the reference loop and added
+    to its request's totals in asset order: one asset position at a time
+    across all requests, or a running sum per request when there are fewer
+    requests than assets in the largest one. Floating-point sums aren't associative, so this
+    keeps every request bit-identical to the reference loop whatever else
+    is in the batch.
+    """
+    counts = []
+    values = []
+    life_slots = []
+    slot_by_life = {}  # Python ints, effective lives can exceed int64
+    for assets in asset_lists:
+        # Skip assets with no effective life
+        usable = [asset for asset in assets if asset.effective_life]
+        counts.append(len(usable))
+        values.extend(asset.value for asset in usable)
+        life_slots.extend(slot_by_life.setdefault(asset.effective_life, len(slot_by_life)) for asset in usable)
+
+    diminishing_value = np.zeros((len(asset_lists), years), dtype=np.float64)
+    prime_cost = np.zeros(len(asset_lists), dtype=np.float64)
+    if not values:
+        return diminishing_value, np.repeat(prime_cost[:, None], years, axis=1)
+
+    lives = list(slot_by_life)
+    shares = np.array([unit_curves.remaining_shares(life) for life in lives], dtype=np.float64)
+    dv_rates = np.array([unit_curves.dv_rate(life) for life in lives], dtype=np.float64)
+    pc_rates = np.array([unit_curves.pc_rate(life) for life in lives], dtype=np.float64)
+    slots = np.array(life_slots, dtype=np.intp)
+    values = np.array(values, dtype=np.float64)
+
+    # (value * remaining_share) * dv_rate per asset and year, like the reference loop
+    dv_terms = values[:, None] * shares[slots] * dv_rates[slots][:, None]
+    pc_terms = values * pc_rates[slots]
+
+    counts = np.array(counts, dtype=np.intp)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    if len(asset_lists) < counts.max():
+        # Few requests with many assets: a sequential running sum per request
+        for index, (start, count) in enumerate(zip(starts.tolist(), counts.tolist())):
+            if count:
+                # + 0.0 turns a -0.0 total into 0.0, as starting the sum from 0 does
+                diminishing_value[index] = np.add.accumulate(dv_terms[start:start + count], axis=0)[-1] + 0.0
+                prime_cost[index] = np.add.accumulate(pc_terms[start:start + count])[-1] + 0.0
+        return diminishing_value, np.repeat(prime_cost[:, None], years, axis=1)
+
+    # Requests by asset count, largest first, so those with an asset at a position are a prefix
+    order = np.argsort(-counts, kind="stable")
+    sorted_counts = counts[order]
+    sorted_starts = starts[order]
+    requests_with_position = np.searchsorted(-sorted_counts, -np.arange(sorted_counts[0]), side="left")
+
+    dv_sorted = np.zeros((len(asset_lists), years), dtype=np.float64)
+    pc_sorted = np.zeros(len(asset_lists), dtype=np.float64)
+    for position, count in enumerate(requests_with_position.tolist()):
+        rows = sorted_starts[:count] + position
+        dv_sorted[:count] += dv_terms[rows]
+        pc_sorted[:count] += pc_terms[rows]
+
+    diminishing_value[order] = dv_sorted
+    prime_cost[order] = pc_sorted
+    return diminishing_value, np.repeat(prime_cost[:, None], years, axis=1)
@@ -0,0 +1,354 @@
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from aiosmtplib import SMTPDataError, SMTPRecipientRefused, SMTPRecipientsRefused
+from sqlalchemy import Boolean, Float, Integer, String, Text, func, insert, select, update
+from sqlalchemy.orm import Mapped, mapped_column
+from starlette.concurrency import run_in_threadpool
+from app.schemas.calculator import DepreciationResponse
+from app.services.schedule import DepreciationSchedule
+from app.services.job_queue import Base, JobQueue, email_job_queue
+from app.config import CAMPAIGN_RENDER_CONCURRENCY
+
+# Campaign states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+
+# Recipient states (FAILED also marks a campaign whose job was dead-lettered)
+PENDING = "pending"
+SENT = "sent"
+FAILED = "failed"
+
+
+class Campaign(Base):
+    __tablename__ = "campaigns"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    status: Mapped[str] = mapped_column(String(20))
+    total: Mapped[int] = mapped_column(Integer)
+    unique_reports: Mapped[int] = mapped_column(Integer)
+    rate_limit_per_second: Mapped[float] = mapped_column(Float)
+    created_at: Mapped[float] = mapped_column(Float)
+    started_at: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    finished_at: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+
+
+class CampaignReport(Base):
+    """One row per distinct report in a campaign; recipients share it by key"""
+    __tablename__ = "campaign_reports"
+
+    campaign_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    report_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    report: Mapped[str] = mapped_column(Text)
+
+
+class CampaignRecipient(Base):
+    __tablename__ = "campaign_recipients"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    campaign_id: Mapped[str] = mapped_column(String(36), index=True)
+    position: Mapped[int] = mapped_column(Integer)
+    to_email: Mapped[str] = mapped_column(String(320))
+    name: Mapped[str] = mapped_column(String(200))
+    include_attachment: Mapped[bool] = mapped_column(Boolean)
+    report_key: Mapped[str] = mapped_column(String(64))
+    status: Mapped[str] = mapped_column(String(20), index=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    sent_at: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "position": self.position,
+            "to": self.to_email,
+            "name": self.name,
+            "status": self.status,
+            "error": self.error,
+            "sent_at": self.sent_at,
+        }
+
+
+class CampaignDeliveryError(Exception):
+    """Raised when a campaign stops on an error that may go away (SMTP outage, timeout)"""
+
+
+def is_permanent_failure(error: Exception) -> bool:
+    """
+    Whether a delivery error is the server refusing this recipient or message
+    (5xx), so sending it again won't help. Anything else, like a dropped
+    connection or a timeout, may work on a retry.
+    """
+    if isinstance(error, SMTPRecipientsRefused):
+        return bool(error.recipients) and all(refused.code >= 500 for refused in error.recipients)
+    return isinstance(error, (SMTPRecipientRefused, SMTPDataError)) and error.code >= 500
+
+
+def report_key(report: DepreciationResponse) -> str:
+    """Identical reports (e.g. one property emailed to several owners) share a key"""
+    return hashlib.sha256(report.json().encode("utf-8")).hexdigest()
+
+
+class CampaignStore:
+    """
+    Campaigns and per-recipient delivery status, stored next to the job queue.
+
+    Recipient status survives worker restarts: a campaign picked up again by
+    the queue only sends to recipients that are still pending.
+    """
+
+    def __init__(self, queue: JobQueue):
+        self.queue = queue
+
+    def create(self, entries: List[Dict[str, Any]], rate_limit_per_second: float) -> Dict[str, Any]:
+        """
+        Store a campaign; each entry has to, name, report and include_attachment.
+        """
+        campaign_id = str(uuid.uuid4())
+        reports: Dict[str, str] = {}
+        recipients = []
+        for position, entry in enumerate(entries):
+            key = report_key(entry["report"])
+            if key not in reports:
+                reports[key] = entry["report"].json()
+            recipients.append({
+                "campaign_id": campaign_id,
+                "position": position,
+                "to_email": entry["to"],
+                "name": entry.get("name") or "",
+                "include_attachment": entry.get("include_attachment", True),
+                "report_key": key,
+                "status": PENDING,
+            })
+
+        with self.queue.session() as session:
+            session.add(Campaign(
+                id=campaign_id,
+                status=QUEUED,
+                total=len(recipients),
+                unique_reports=len(reports),
+                rate_limit_per_second=rate_limit_per_second,
+                created_at=time.time(),
+            ))
+            session.execute(insert(CampaignReport), [
+                {"campaign_id": campaign_id, "report_key": key, "report": report}
+                for key, report in reports.items()
+            ])
+            session.execute(insert(CampaignRecipient), recipients)
+            session.commit()
+        return {"campaign_id": campaign_id, "total": len(recipients), "unique_reports": len(reports)}
+
+    def start(self, campaign_id: str) -> Optional[Campaign]:
+        with self.queue.session() as session:
+            campaign = session.get(Campaign, campaign_id)
+            if campaign is None:
+                return None
+            campaign.status = RUNNING
+            if campaign.started_at is None:
+                campaign.started_at = time.time()
+            session.commit()
+            return campaign
+
+    def pending(self, campaign_id: str) -> Tuple[Dict[str, str], List[CampaignRecipient]]:
+        """
+        Recipients still to be sent, and the reports they need (as JSON).
+        """
+        with self.queue.session() as session:
+            recipients = session.execute(
+                select(CampaignRecipient)
+                .where(CampaignRecipient.campaign_id == campaign_id, CampaignRecipient.status == PENDING)
+                .order_by(CampaignRecipient.position)
+            ).scalars().all()
+            keys = {recipient.report_key for recipient in recipients}
+            reports = dict(session.execute(
+                select(CampaignReport.report_key, CampaignReport.report)
+                .where(CampaignReport.campaign_id == campaign_id)
+            ).all())
+        return {key: report for key, report in reports.items() if key in keys}, list(recipients)
+
+    def record(self, recipient_id: int, status: str, error: Optional[str] = None):
+        with self.queue.session() as session:
+            session.execute(
+                update(CampaignRecipient)
+                .where(CampaignRecipient.id == recipient_id)
+                .values(status=status, error=error, sent_at=time.time() if status == SENT else None)
+            )
+            session.commit()
+
+    def finish(self, campaign_id: str):
+        with self.queue.session() as session:
+            session.execute(
+                update(Campaign)
+                .where(Campaign.id == campaign_id)
+                .values(status=COMPLETED, finished_at=time.time())
+            )
+            session.commit()
+
+    def fail(self, campaign_id: str):
+        """
+        Give up on a campaign whose job ran out of attempts; its unsent
+        recipients stay pending.
+        """
+        with self.queue.session() as session:
+            session.execute(
+                update(Campaign)
+                .where(Campaign.id == campaign_id, Campaign.status != COMPLETED)
+                .values(status=FAILED, finished_at=time.time())
+            )
+            session.commit()
+        logging.error(f"Campaign {campaign_id} failed, its delivery job ran out of attempts")
+
+    def get(self, campaign_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Campaign progress: recipient counts per state, throughput and ETA.
+        """
+        with self.queue.session() as session:
+            campaign = session.get(Campaign, campaign_id)
+            if campaign is None:
+                return None
+            counts = dict(session.execute(
+                select(CampaignRecipient.status, func.count())
+                .where(CampaignRecipient.campaign_id == campaign_id)
+                .group_by(CampaignRecipient.status)
+            ).all())
+
+        done = counts.get(SENT, 0) + counts.get(FAILED, 0)
+        elapsed = ((campaign.finished_at or time.time()) - campaign.started_at) if campaign.started_at else 0.0
+        rate = done / elapsed if elapsed > 0 else 0.0
+        pending = counts.get(PENDING, 0)
+        return {
+            "id": campaign.id,
+            "status": campaign.status,
+            "total": campaign.total,
+            "unique_reports": campaign.unique_reports,
+            "counts": {state: counts.get(state, 0) for state in (PENDING, SENT, FAILED)},
+            "progress": round(done / campaign.total, 4) if campaign.total else 1.0,
+            "rate_limit_per_second": campaign.rate_limit_per_second,
+            "messages_per_second": round(rate, 2),
+            "eta_seconds": round(pending / rate, 1) if rate and pending and campaign.status == RUNNING else None,
+            "created_at": campaign.created_at,
+            "started_at": campaign.started_at,
+            "finished_at": campaign.finished_at,
+        }
+
+    def exists(self, campaign_id: str) -> bool:
+        with self.queue.session() as session:
+            return session.get(Campaign, campaign_id) is not None
+
+    def recipients(
+        self, campaign_id: str, status: Optional[str] = None, offset: int = 0, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        query = select(CampaignRecipient).where(CampaignRecipient.campaign_id == campaign_id)
+        if status:
+            query = query.where(CampaignRecipient.status == status)
+        query = query.order_by(CampaignRecipient.position).offset(offset).limit(limit)
+        with self.queue.session() as session:
+            return [recipient.to_dict() for recipient in session.execute(query).scalars().all()]
+
+
+class RateLimiter:
+    """
+    Spaces out calls to at most `rate_per_second` (no limit when 0).
+    """
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next_slot = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        # Reserve the next free slot before sleeping, so concurrent callers queue up
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+async def run_campaign(campaign_id: str, store: Optional[CampaignStore] = None):
+    """
+    Send every pending recipient of a campaign.
+
+    Each distinct report is rendered once; its PDF is then delivered to all of
+    its recipients over the SMTP pool while other reports render. At most
+    CAMPAIGN_RENDER_CONCURRENCY reports are rendered or being delivered at a
+    time, which bounds the PDFs held in memory. Delivery is paced by the
+    campaign's rate limit.
+
+    Recipients the server refuses are recorded as failed. On any other error
+    no new messages are started, the remaining recipients stay pending and
+    CampaignDeliveryError is raised, so the job queue retries the campaign
+    with backoff and the retry only sends what is still pending. When the job
+    runs out of attempts the worker marks the campaign failed.
+    """
+    from app.services.email_service import render_report_pdf, send_email_with_report, smtp_pool
+
+    store = store or campaign_store
+    campaign = await run_in_threadpool(store.start, campaign_id)
+    if campaign is None:
+        raise ValueError(f"Campaign {campaign_id} not found")
+    reports, recipients = await run_in_threadpool(store.pending, campaign_id)
+    logging.info(f"Campaign {campaign_id}: {len(recipients)} recipients pending, {len(reports)} distinct reports")
+
+    by_report: Dict[str, List[CampaignRecipient]] = defaultdict(list)
+    for recipient in recipients:
+        by_report[recipient.report_key].append(recipient)
+
+    limiter = RateLimiter(campaign.rate_limit_per_second)
+    report_slots = asyncio.Semaphore(max(1, CAMPAIGN_RENDER_CONCURRENCY))
+    send_slots = asyncio.Semaphore(max(1, smtp_pool.max_connections * 2))
+    # Errors that may go away on a retry; once there is one, stop sending
+    transient_errors: List[str] = []
+
+    async def deliver(recipient: CampaignRecipient, report: DepreciationSchedule, pdf_data: Optional[bytes]):
+        async with send_slots:
+            await limiter.wait()
+            if transient_errors:
+                return
+            try:
+                await send_email_with_report(
+                    to_email=recipient.to_email,
+                    name=recipient.name,
+                    report=report,
+                    include_attachment=recipient.include_attachment,
+                    pdf_data=pdf_data
+                )
+                status, error = SENT, None
+            except Exception as e:
+                if not is_permanent_failure(e):
+                    transient_errors.append(str(e))
+                    return
+                status, error = FAILED, str(e)
+            await run_in_threadpool(store.record, recipient.id, status, error)
+
+    async def render_and_deliver(key: str, group: List[CampaignRecipient]):
+        async with report_slots:
+            if transient_errors:
+                return
+            # Validated when the campaign was created
+            report = DepreciationSchedule.from_json(reports[key])
+            pdf_data = None
+            if any(recipient.include_attachment for recipient in group):
+                try:
+                    pdf_data = await render_report_pdf(report)
+                except Exception as e:
+                    # send_email_with_report retries the render and sends without it if that fails too
+                    logging.error(f"Campaign {campaign_id}: failed to render report {key[:12]}: {str(e)}")
+            await asyncio.gather(*(deliver(recipient, report, pdf_data) for recipient in group))
+
+    await asyncio.gather(*(render_and_deliver(key, group) for key, group in by_report.items()))
+    if transient_errors:
+        raise CampaignDeliveryError(
+            f"Campaign {campaign_id} stopped after {len(transient_errors)} failed deliveries, "
+            f"pending recipients will be retried: {transient_errors[0]}"
+        )
+    await run_in_threadpool(store.finish, campaign_id)
+    logging.info(f"Campaign {campaign_id} completed")
+
+
+# Campaigns live in the job queue database so the worker can resume them
+campaign_store = CampaignStore(email_job_queue)
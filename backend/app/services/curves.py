@@ -0,0 +1,80 @@
+import sys
+import threading
+from typing import Any, Dict, Iterable, List
+
+
+class UnitCurveTable:
+    """
+    Memoized per-year factors for the diminishing value method, one list per
+    effective life.
+
+    The reference loop deducts (value * remaining_share) * dv_rate for every
+    asset and year; the shares and rates only depend on the effective life,
+    so the engines look them up here instead of calling pow() per asset.
+
+    Effective lives come from clients, so only lives from 1 to `max_life`
+    are memoized; others are computed on every call.
+    """
+
+    def __init__(self, years: int, max_life: int):
+        self.years = years
+        self.max_life = max_life
+        self._shares: Dict[int, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def remaining_shares(self, effective_life: int) -> List[float]:
+        """
+        Share of an asset's value that is still undeducted at the start of each year.
+        """
+        shares = self._shares.get(effective_life)
+        if shares is None:
+            # Diminishing value method - 200% / effective life, applied to the remaining value
+            dv_rate = self.dv_rate(effective_life)
+            shares = [max(0, (1 - dv_rate) ** (year - 1)) for year in range(1, self.years + 1)]
+            if not 1 <= effective_life <= self.max_life:
+                return shares
+            with self._lock:
+                shares = self._shares.setdefault(effective_life, shares)
+        return shares
+
+    def dv_rate(self, effective_life: int) -> float:
+        """
+        Diminishing value rate for this effective life.
+        """
+        return 2.0 / effective_life
+
+    def pc_rate(self, effective_life: int) -> float:
+        """
+        Prime cost deduction per year for $1 of assets with this effective life.
+        """
+        # Prime cost method - 100% / effective life
+        return 1.0 / effective_life
+
+    def warm(self, effective_lives: Iterable[int]):
+        """
+        Precompute the curves for the given effective lives.
+        """
+        for effective_life in effective_lives:
+            if effective_life:
+                self.remaining_shares(effective_life)
+
+    def memory_bytes(self) -> int:
+        """
+        Approximate memory held by the table, including the float objects.
+        """
+        with self._lock:
+            curves = list(self._shares.values())
+            total = sys.getsizeof(self._shares)
+        for curve in curves:
+            total += sys.getsizeof(curve) + sum(sys.getsizeof(value) for value in curve)
+        return total
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            curves = len(self._shares)
+        return {
+            "years": self.years,
+            "max_life": self.max_life,
+            "curves": curves,
+            "memory_bytes": self.memory_bytes(),
+        }
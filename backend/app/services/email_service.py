@@ -1,27 +1,35 @@
 import os
 import logging
 import tempfile
-import smtplib  # Use regular smtplib instead of aiosmtplib
 from pathlib import Path
 from datetime import datetime
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.application import MIMEApplication
-# from aiosmtplib import SMTP  # Remove this import
-from jinja2 import Environment, FileSystemLoader
-from weasyprint import HTML
-from app.schemas.calculator import DepreciationResponse
+from starlette.concurrency import run_in_threadpool
+from app.services.schedule import DepreciationSchedule
+from app.services.metrics import function_seconds, timed
+from app.services.mime_stream import StreamingReportMessage
+from app.services.pdf_cache import DiskPdfTier, PdfCache, pdf_cache_key
+from app.services.pdf_pool import PdfRenderPool
+from app.services.pdf_renderer import get_render_context
+from app.services.pdf_direct import DIRECT_LAYOUT_VERSION, render_report_pdf_direct
+from app.services.smtp_pool import SMTPConnectionPool
+from app.services.templates import templates, EMAIL_TEMPLATE, PDF_TEMPLATE
+from app.config import (
+    PDF_RENDER_WORKERS,
+    PDF_RENDER_MAX_QUEUE,
+    PDF_RENDER_TIMEOUT_SECONDS,
+    SMTP_POOL_SIZE,
+    SMTP_POOL_MAX_MESSAGES_PER_CONNECTION,
+    SMTP_POOL_IDLE_TIMEOUT_SECONDS,
+    SMTP_TIMEOUT_SECONDS,
+    PDF_CACHE_ENABLED,
+    PDF_CACHE_MEMORY_MAX_BYTES,
+    PDF_CACHE_DIR,
+    PDF_CACHE_DISK_MAX_BYTES,
+    PDF_BACKEND,
+)
 from typing import Optional
 import json
 
-# Load templates from the templates directory
-template_dir = Path(__file__).parent.parent / "templates"
-if not template_dir.exists():
-    template_dir.mkdir(exist_ok=True)
-    
-# Initialize Jinja2 environment
-jinja_env = Environment(loader=FileSystemLoader(str(template_dir)))
-
 # Email configuration
 # NOTE: This is a demo configuration and does not actually send emails in production
 # To send real emails, configure a real SMTP server and credentials below
@@ -38,39 +46,67 @@ SMTP_USERNAME = "sunil.singh.programmer@gmail.com"  # Your email: "your-email@gm
 SMTP_PASSWORD = "onor qvoo jaqk krxc"  # Replace with your 16-character app password
 SMTP_USE_TLS = True  # Use TLS for Gmail
 
+# Worker pool that renders PDF attachments outside the event loop
+pdf_render_pool = PdfRenderPool(
+    max_workers=PDF_RENDER_WORKERS,
+    max_queue=PDF_RENDER_MAX_QUEUE,
+    timeout_seconds=PDF_RENDER_TIMEOUT_SECONDS
+)
+
+# Rendered PDFs by report content, so resends skip WeasyPrint (None when disabled)
+pdf_cache = PdfCache(
+    max_memory_bytes=PDF_CACHE_MEMORY_MAX_BYTES,
+    disk=DiskPdfTier(PDF_CACHE_DIR, PDF_CACHE_DISK_MAX_BYTES) if PDF_CACHE_DIR else None
+) if PDF_CACHE_ENABLED else None
+
+# Persistent, authenticated SMTP connections shared by every outgoing email
+smtp_pool = SMTPConnectionPool(
+    hostname=SMTP_HOST,
+    port=SMTP_PORT,
+    username=SMTP_USERNAME,
+    password=SMTP_PASSWORD,
+    start_tls=SMTP_USE_TLS,
+    max_connections=SMTP_POOL_SIZE,
+    timeout=SMTP_TIMEOUT_SECONDS,
+    max_messages_per_connection=SMTP_POOL_MAX_MESSAGES_PER_CONNECTION,
+    idle_timeout=SMTP_POOL_IDLE_TIMEOUT_SECONDS
+)
+
 async def send_email_with_report(
     to_email: str,
     name: Optional[str] = "",
-    report: DepreciationResponse = None,
-    include_attachment: bool = True
+    report: DepreciationSchedule = None,
+    include_attachment: bool = True,
+    pdf_data: Optional[bytes] = None
 ):
     """
-    Send an email with the depreciation report as HTML content and optionally as a PDF attachment
+    Send an email with the depreciation report as HTML content and optionally as a PDF attachment.
+    Callers that already rendered the PDF (bulk campaigns) pass it as `pdf_data`.
     """
     try:
-        # Create email message
-        message = MIMEMultipart()
-        message["From"] = f"{FROM_NAME} <{FROM_EMAIL}>"
-        message["To"] = to_email
-        message["Subject"] = "Your Tax Depreciation Report from Duo Tax"
-        
         # Generate the HTML content for the email body using a template
         email_html = generate_email_html(name, report)
-        message.attach(MIMEText(email_html, "html"))
+        
+        # Create email message; the PDF is base64-encoded in chunks while it's sent
+        message = StreamingReportMessage(
+            from_addr=f"{FROM_NAME} <{FROM_EMAIL}>",
+            to=to_email,
+            subject="Your Tax Depreciation Report from Duo Tax",
+            html=email_html
+        )
         
         # Add PDF attachment if requested
         if include_attachment and report:
             try:
                 logging.info(f"Generating PDF attachment for {to_email}")
                 try:
-                    pdf_data = generate_pdf_report(report)
+                    if pdf_data is None:
+                        pdf_data = await render_report_pdf(report)
                     
-                    attachment = MIMEApplication(pdf_data, _subtype="pdf")
-                    attachment.add_header(
-                        "Content-Disposition", 
-                        f"attachment; filename=tax_depreciation_report_{datetime.now().strftime('%Y%m%d')}.pdf"
+                    message.attach(
+                        pdf_data,
+                        filename=f"tax_depreciation_report_{datetime.now().strftime('%Y%m%d')}.pdf"
                     )
-                    message.attach(attachment)
                     logging.info("PDF attachment generated and added to email")
                 except Exception as pdf_error:
                     logging.error(f"Failed to generate PDF with WeasyPrint: {str(pdf_error)}")
@@ -104,29 +140,10 @@ async def send_email_with_report(
             logging.info(f"DEMO MODE: Email would be sent to {to_email} - saved to {demo_file}")
             return
         
-        # Only reach here if not in demo mode - actually send the email using smtplib
+        # Only reach here if not in demo mode - send over a pooled SMTP connection
         try:
-            # Connect to SMTP server
-            logging.info(f"Connecting to SMTP server: {SMTP_HOST}:{SMTP_PORT}")
-            smtp = smtplib.SMTP(SMTP_HOST, SMTP_PORT)
-            
-            # Start TLS for security
-            if SMTP_USE_TLS:
-                logging.info("Starting TLS")
-                smtp.starttls()
-            
-            # Authenticate if credentials are provided
-            if SMTP_USERNAME and SMTP_PASSWORD:
-                logging.info(f"Authenticating with username: {SMTP_USERNAME}")
-                smtp.login(SMTP_USERNAME, SMTP_PASSWORD)
-            
-            # Send the email
             logging.info(f"Sending email to: {to_email}")
-            smtp.send_message(message)
-            
-            # Close the connection
-            smtp.quit()
-            
+            await smtp_pool.send_message(message)
             logging.info(f"Email sent successfully to {to_email}")
         except Exception as e:
             logging.error(f"Failed to send email: {str(e)}")
@@ -136,78 +153,73 @@ async def send_email_with_report(
         raise e
 
 
-def generate_email_html(name: str, report: DepreciationResponse) -> str:
+async def render_report_pdf(report: DepreciationSchedule) -> bytes:
+    """
+    Render the PDF for a report, reusing an earlier render of the same report
+    """
+    if pdf_cache is None:
+        return await pdf_render_pool.render(report)
+
+    # The PDF prints today's date, so a new day means a new PDF
+    key = pdf_cache_key(report, pdf_layout_version(), templates.context()["formatted_date"])
+    pdf_data = await run_in_threadpool(pdf_cache.get, key)
+    if pdf_data is None:
+        pdf_data = await pdf_render_pool.render(report)
+        # Only cache real PDFs, not the HTML fallback or error text
+        if pdf_data.startswith(b"%PDF"):
+            await run_in_threadpool(pdf_cache.set, key, pdf_data)
+    return pdf_data
+
+
+def pdf_layout_version() -> str:
+    """
+    Identifies the layout PDFs are currently rendered with, for cache keys
+    """
+    if PDF_BACKEND == "direct":
+        return f"direct-{DIRECT_LAYOUT_VERSION}"
+    return templates.version(PDF_TEMPLATE)
+
+
+@timed(function_seconds, "generate_email_html")
+def generate_email_html(name: str, report: DepreciationSchedule) -> str:
     """
     Generate HTML content for the email body
     """
-    # Ensure the template directory has the email template
-    email_template_path = template_dir / "email_template.html"
-    if not email_template_path.exists():
-        create_default_email_template()
-    
-    # Load the template
-    template = jinja_env.get_template("email_template.html")
-    
-    # Prepare data for the template
-    context = {
-        "name": name or "Property Investor",
-        "report": report,
-        "current_year": datetime.now().year,
-        "formatted_date": datetime.now().strftime("%d %B %Y"),
-    }
-    
-    # Render the template with data
-    return template.render(**context)
+    # Render the precompiled template with the shared context
+    return templates.render(EMAIL_TEMPLATE, name=name or "Property Investor", report=report)
 
 
-def generate_pdf_report(report: DepreciationResponse) -> bytes:
+def generate_pdf_report(report: DepreciationSchedule) -> bytes:
     """
     Generate a PDF report from the depreciation data - with multiple fallback options
     """
     try:
         logging.info("Starting PDF generation process")
         
-        # Ensure the template directory has the PDF template
-        pdf_template_path = template_dir / "pdf_report_template.html"
-        if not pdf_template_path.exists():
-            logging.info("PDF template not found, creating default template")
-            create_default_pdf_template()
-        else:
-            logging.info(f"Found existing PDF template at {pdf_template_path}")
-        
-        # Resolve the logo path for the template
-        duo_group_logo_path = Path(__file__).parent.parent / "templates" / "assets" / "duo-group-logo.svg"
-        if not duo_group_logo_path.exists():
-            logging.warning(f"Duo Group logo file not found at {duo_group_logo_path}")
-            # Fallback to original logo if new logo not found
-            duo_group_logo_path = Path(__file__).parent.parent / "templates" / "assets" / "duo-tax-logo.svg"
-            if not duo_group_logo_path.exists():
-                logging.warning(f"Duo Tax logo file not found at {duo_group_logo_path}")
-                duo_group_logo_path = ""
-        
-        # Load the template
-        template = jinja_env.get_template("pdf_report_template.html")
-        logging.info("PDF template loaded successfully")
-        
-        # Prepare data for the template
-        context = {
-            "report": report,
-            "current_year": datetime.now().year,
-            "formatted_date": datetime.now().strftime("%d %B %Y"),
-            "duo_group_logo_path": str(duo_group_logo_path) if duo_group_logo_path else ""
-        }
+        if PDF_BACKEND == "direct":
+            # Fixed layout written straight from the report; WeasyPrint is the fallback
+            try:
+                context = templates.context()
+                pdf = render_report_pdf_direct(
+                    report,
+                    formatted_date=context["formatted_date"],
+                    current_year=context["current_year"],
+                    logo_path=context["duo_group_logo_path"]
+                )
+                logging.info(f"Direct PDF backend successful, PDF size: {len(pdf)} bytes")
+                return pdf
+            except Exception as e:
+                logging.error(f"Direct PDF backend failed, falling back to WeasyPrint: {str(e)}")
         
-        # Render the template with data
-        logging.info("Rendering HTML content for PDF")
-        html_content = template.render(**context)
+        # Render the precompiled template; the logo path is resolved once at load time
+        html_content = templates.render(PDF_TEMPLATE, report=report)
         
         # Try multiple approaches for PDF generation
         
-        # Approach 1: Try using WeasyPrint directly
+        # Approach 1: Try using WeasyPrint with the shared, pre-parsed stylesheet and assets
         try:
             logging.info("Approach 1: Using WeasyPrint HTML string")
-            from weasyprint import HTML
-            pdf = HTML(string=html_content).write_pdf()
+            pdf = get_render_context().render(html_content)
             logging.info(f"Approach 1 successful, PDF size: {len(pdf)} bytes")
             return pdf
         except Exception as e:
@@ -301,210 +313,3 @@ def generate_pdf_report(report: DepreciationResponse) -> bytes:
         logging.error(f"Error in generate_pdf_report: {str(e)}")
         # If all else fails, return a simple message
         return f"Error generating report: {str(e)}".encode('utf-8')
-
-
-def create_default_email_template():
-    """
-    Create a default email template if none exists
-    """
-    default_email_template = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <title>Your Tax Depreciation Report</title>
-        <style>
-            body { font-family: 'Inter', Arial, sans-serif; line-height: 1.6; color: #333; margin: 0; padding: 0; }
-            .container { max-width: 600px; margin: 0 auto; padding: 0; }
-            .header { background-color: #e87722; color: white; padding: 30px 20px; text-align: center; }
-            .content { padding: 30px 20px; }
-            .footer { text-align: center; margin-top: 20px; font-size: 12px; color: #666; background-color: #f5f7fa; padding: 20px; }
-            .highlight { color: #e87722; font-weight: bold; }
-            h1, h2, h3 { color: #1a6cc3; margin-top: 0; }
-            .summary-box { background-color: #f5f7fa; padding: 20px; border-radius: 5px; margin: 20px 0; border-left: 4px solid #e87722; }
-            .summary-item { margin-bottom: 15px; }
-            .btn { display: inline-block; background-color: #e87722; color: white; padding: 12px 25px; text-decoration: none; border-radius: 4px; font-weight: bold; margin-top: 15px; }
-            .btn:hover { background-color: #d16616; }
-            a { color: #1a6cc3; text-decoration: underline; }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1 style="color: white;">Your Tax Depreciation Report</h1>
-            </div>
-            <div class="content">
-                <p>Hello {{ name }},</p>
-                
-                <p>Thank you for using <span class="highlight">Duo Tax's Depreciation Calculator</span>. Attached is your complete tax depreciation schedule for your investment property.</p>
-                
-                <div class="summary-box">
-                    <h3>Report Summary:</h3>
-                    <div class="summary-item">
-                        <strong>Property Type:</strong> 
-                        {% if report.property_type == "residential" %}
-                            Residential Property
-                        {% elif report.property_type == "commercial" %}
-                            Commercial Property
-                        {% elif report.property_type == "industrial" %}
-                            Industrial Property
-                        {% else %}
-                            {{ report.property_type }}
-                        {% endif %}
-                    </div>
-                    <div class="summary-item">
-                        <strong>First Year Deduction:</strong> <span class="highlight">${{ "{:,.2f}".format(report.first_year_depreciation) }}</span>
-                    </div>
-                    <div class="summary-item">
-                        <strong>First 5 Years:</strong> <span class="highlight">${{ "{:,.2f}".format(report.five_year_depreciation) }}</span>
-                    </div>
-                    <div class="summary-item">
-                        <strong>Total Depreciable Amount:</strong> <span class="highlight">${{ "{:,.2f}".format(report.total_depreciable_amount) }}</span>
-                    </div>
-                </div>
-                
-                <p>For a comprehensive tax depreciation schedule prepared by our quantity surveyors, please contact us at <a href="mailto:info@duotax.com.au">info@duotax.com.au</a>.</p>
-                
-                <a href="https://duotax.com.au" class="btn">Visit Our Website</a>
-                
-                <p>Best regards,<br>The Duo Tax Team</p>
-            </div>
-            <div class="footer">
-                <p>&copy; {{ current_year }} Duo Tax Depreciation. All rights reserved.</p>
-                <p>This email was sent on {{ formatted_date }}</p>
-                <p>
-                    <a href="https://duotax.com.au/privacy">Privacy Policy</a> | 
-                    <a href="https://duotax.com.au/terms">Terms of Service</a>
-                </p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    
-    template_path = template_dir / "email_template.html"
-    with open(template_path, "w") as f:
-        f.write(default_email_template)
-
-
-def create_default_pdf_template():
-    """
-    Create a default PDF template if none exists
-    """
-    default_pdf_template = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <title>Tax Depreciation Report</title>
-        <style>
-            @page { size: A4; margin: 2cm; }
-            body { font-family: 'Inter', Arial, sans-serif; line-height: 1.6; color: #333; margin: 0; padding: 0; }
-            .container { max-width: 100%; margin: 0 auto; }
-            .header { text-align: center; margin-bottom: 30px; border-bottom: 1px solid #e5e7eb; padding-bottom: 20px; }
-            .logo { max-width: 180px; height: auto; display: block; margin: 0 auto 15px; }
-            h1 { color: #1a6cc3; margin-top: 10px; margin-bottom: 5px; }
-            h2 { color: #1a6cc3; border-bottom: 2px solid #e87722; padding-bottom: 8px; margin-top: 40px; margin-bottom: 20px; }
-            h3 { color: #1a6cc3; }
-            p.subtitle { color: #666; font-size: 14px; margin-top: 0; }
-            table { width: 100%; border-collapse: collapse; margin: 20px 0; }
-            table, th, td { border: 1px solid #e5e7eb; }
-            th, td { padding: 12px; text-align: left; }
-            th { background-color: #f3f4f6; color: #1a6cc3; font-weight: bold; }
-            tr:nth-child(even) { background-color: #f9fafb; }
-            .footer { text-align: center; margin-top: 50px; font-size: 12px; color: #666; border-top: 1px solid #e5e7eb; padding-top: 20px; }
-            .summary-box { background-color: #f5f7fa; padding: 20px; border-radius: 5px; margin: 20px 0; border-left: 4px solid #e87722; }
-            .highlight { color: #e87722; font-weight: bold; }
-            .chart-placeholder { height: 300px; background-color: #f9f9f9; display: flex; justify-content: center; align-items: center; border: 1px dashed #ccc; }
-            .company-info { margin-top: 15px; font-size: 13px; color: #666; }
-            .company-info p { margin: 3px 0; }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <img src="file://{duo_group_logo_path}" alt="Duo Tax Logo" class="logo" />
-                <h1>Tax Depreciation Report</h1>
-                <p class="subtitle">Generated on {{ formatted_date }}</p>
-            </div>
-            
-            <h2>Property Information</h2>
-            <table>
-                <tr>
-                    <th>Property Type</th>
-                    <td>{{ report.property_type }}</td>
-                </tr>
-                <tr>
-                    <th>Purchase Price</th>
-                    <td><span class="highlight">${{ "{:,.2f}".format(report.purchase_price) }}</span></td>
-                </tr>
-                <tr>
-                    <th>Construction Date</th>
-                    <td>{{ report.construction_date if hasattr(report, 'construction_date') else 'Not Specified' }}</td>
-                </tr>
-                <tr>
-                    <th>Purchase Date</th>
-                    <td>{{ report.purchase_date if hasattr(report, 'purchase_date') else 'Not Specified' }}</td>
-                </tr>
-            </table>
-            
-            <h2>Depreciation Summary</h2>
-            <div class="summary-box">
-                <table>
-                    <tr>
-                        <th>First Year Deduction</th>
-                        <td><span class="highlight">${{ "{:,.2f}".format(report.first_year_depreciation) }}</span></td>
-                    </tr>
-                    <tr>
-                        <th>First 5 Years</th>
-                        <td><span class="highlight">${{ "{:,.2f}".format(report.five_year_depreciation) }}</span></td>
-                    </tr>
-                    <tr>
-                        <th>Total Depreciable Amount</th>
-                        <td><span class="highlight">${{ "{:,.2f}".format(report.total_depreciable_amount) }}</span></td>
-                    </tr>
-                </table>
-            </div>
-            
-            <h2>Yearly Depreciation Schedule</h2>
-            <table>
-                <tr>
-                    <th>Year</th>
-                    <th>Diminishing Value ($)</th>
-                    <th>Prime Cost ($)</th>
-                    <th>Capital Works ($)</th>
-                    <th>Total ($)</th>
-                </tr>
-                {% for year in report.yearly_breakdown %}
-                <tr>
-                    <td>{{ year.year }}</td>
-                    <td>${{ "{:,.2f}".format(year.diminishing_value) }}</td>
-                    <td>${{ "{:,.2f}".format(year.prime_cost) }}</td>
-                    <td>${{ "{:,.2f}".format(year.capital_works) }}</td>
-                    <td><span class="highlight">${{ "{:,.2f}".format(year.total) }}</span></td>
-                </tr>
-                {% endfor %}
-            </table>
-            
-            <div class="footer">
-                <p>This report was generated using Duo Tax's Depreciation Calculator.</p>
-                <p>For a comprehensive tax depreciation schedule prepared by our quantity surveyors, please contact us at info@duotax.com.au</p>
-                <div class="company-info">
-                    <p>Duo Tax Depreciation | ABN: 12 345 678 901</p>
-                    <p>Suite 123, 456 Business Street, Sydney NSW 2000</p>
-                    <p>Phone: (02) 1234 5678 | Email: info@duotax.com.au</p>
-                </div>
-                <p>&copy; {{ current_year }} Duo Tax Depreciation. All rights reserved.</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    
-    # Include the absolute path to the logo for PDF generation
-    duo_group_logo_path = Path(__file__).parent.parent / "templates" / "assets" / "duo-group-logo.svg"
-    default_pdf_template = default_pdf_template.format(duo_group_logo_path=duo_group_logo_path)
-    
-    template_path = template_dir / "pdf_report_template.html"
-    with open(template_path, "w") as f:
-        f.write(default_pdf_template) 
\ No newline at end of file
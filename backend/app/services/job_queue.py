@@ -0,0 +1,290 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import Float, Integer, String, Text, create_engine, event, func, select, update
+from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column, sessionmaker
+from app.services.stats import summarize_latencies
+from app.config import (
+    JOB_QUEUE_URL,
+    JOB_MAX_ATTEMPTS,
+    JOB_RETRY_BASE_SECONDS,
+    JOB_RETRY_MAX_SECONDS,
+    JOB_LEASE_SECONDS,
+)
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+DEAD = "dead"  # Failed max_attempts times, kept for inspection (dead letter)
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(50))
+    payload: Mapped[str] = mapped_column(Text)
+    status: Mapped[str] = mapped_column(String(20), index=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer)
+    created_at: Mapped[float] = mapped_column(Float)
+    next_attempt_at: Mapped[float] = mapped_column(Float, index=True)
+    started_at: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    finished_at: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    locked_until: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "created_at": self.created_at,
+            "next_attempt_at": self.next_attempt_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "last_error": self.last_error,
+        }
+
+
+class JobQueue:
+    """
+    Durable job queue stored in a database table (SQLite by default).
+
+    Web workers only insert rows; a separate worker process claims due jobs,
+    runs them and records the outcome. Failed jobs are retried with
+    exponential backoff and dead-lettered after `max_attempts`. A claimed job
+    holds a lease, so jobs from a crashed worker are picked up again once the
+    lease expires.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_attempts: int = 5,
+        retry_base_seconds: float = 30,
+        retry_max_seconds: float = 3600,
+        lease_seconds: float = 300,
+    ):
+        self.url = url
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.lease_seconds = lease_seconds
+        self._sessions: Optional[sessionmaker] = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, kind: str, payload: Dict[str, Any]) -> str:
+        now = time.time()
+        job = Job(
+            id=str(uuid.uuid4()),
+            kind=kind,
+            payload=json.dumps(payload),
+            status=QUEUED,
+            attempts=0,
+            max_attempts=self.max_attempts,
+            created_at=now,
+            next_attempt_at=now,
+        )
+        with self.session() as session:
+            session.add(job)
+            session.commit()
+        return job.id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self.session() as session:
+            job = session.get(Job, job_id)
+            return job.to_dict() if job else None
+
+    def claim(self) -> Optional[Job]:
+        """
+        Atomically take the next due job, or return None if nothing is due.
+        """
+        now = time.time()
+        with self.session() as session:
+            while True:
+                job_id = session.execute(
+                    select(Job.id)
+                    .where(Job.status == QUEUED, Job.next_attempt_at <= now)
+                    .order_by(Job.next_attempt_at)
+                    .limit(1)
+                ).scalar()
+                if job_id is None:
+                    return None
+
+                # Only one worker can move the row out of QUEUED
+                claimed = session.execute(
+                    update(Job)
+                    .where(Job.id == job_id, Job.status == QUEUED)
+                    .values(
+                        status=RUNNING,
+                        attempts=Job.attempts + 1,
+                        started_at=now,
+                        locked_until=now + self.lease_seconds,
+                    )
+                )
+                session.commit()
+                if claimed.rowcount == 1:
+                    return session.get(Job, job_id)
+
+    def heartbeat(self, job_id: str):
+        """
+        Extend the lease of a long-running job so it isn't handed to another worker.
+        """
+        with self.session() as session:
+            session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == RUNNING)
+                .values(locked_until=time.time() + self.lease_seconds)
+            )
+            session.commit()
+
+    def complete(self, job_id: str, attempt: int) -> bool:
+        """
+        Record success of the given attempt. Does nothing (returns False) if
+        the attempt's lease expired and the job was since requeued, claimed
+        again or dead-lettered.
+        """
+        with self.session() as session:
+            completed = session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == RUNNING, Job.attempts == attempt)
+                .values(status=SUCCEEDED, finished_at=time.time(), locked_until=None, last_error=None)
+            ).rowcount
+            session.commit()
+        if not completed:
+            logging.warning(f"Job {job_id} finished attempt {attempt} after losing its lease, not marking it succeeded")
+        return completed == 1
+
+    def fail(self, job_id: str, attempt: int, error: str) -> bool:
+        """
+        Schedule a retry with exponential backoff, or dead-letter the job.
+        Returns whether the job was dead-lettered. Like complete(), ignores an
+        attempt that lost its lease.
+        """
+        now = time.time()
+        with self.session() as session:
+            job = session.get(Job, job_id)
+            if job is None:
+                return False
+            if job.status != RUNNING or job.attempts != attempt:
+                logging.warning(f"Job {job_id} failed attempt {attempt} after losing its lease, ignoring: {error}")
+                return False
+            job.last_error = error
+            job.locked_until = None
+            if job.attempts >= job.max_attempts:
+                job.status = DEAD
+                job.finished_at = now
+                logging.error(f"Job {job_id} dead-lettered after {job.attempts} attempts: {error}")
+            else:
+                delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (job.attempts - 1))
+                job.status = QUEUED
+                job.next_attempt_at = now + delay
+                logging.warning(f"Job {job_id} failed (attempt {job.attempts}), retrying in {delay:.0f}s: {error}")
+            session.commit()
+            return job.status == DEAD
+
+    def requeue_stale(self) -> Tuple[int, List[Job]]:
+        """
+        Return jobs whose lease expired (their worker died) to the queue, or
+        dead-letter them if that was their last attempt: a job that keeps
+        killing its worker (e.g. out of memory) must not loop forever.
+        Returns the number of jobs requeued and the jobs dead-lettered.
+        """
+        now = time.time()
+        with self.session() as session:
+            requeued = session.execute(
+                update(Job)
+                .where(Job.status == RUNNING, Job.locked_until < now, Job.attempts < Job.max_attempts)
+                .values(status=QUEUED, locked_until=None)
+            ).rowcount
+            dead = session.execute(
+                update(Job)
+                .where(Job.status == RUNNING, Job.locked_until < now, Job.attempts >= Job.max_attempts)
+                .values(
+                    status=DEAD,
+                    finished_at=now,
+                    locked_until=None,
+                    last_error="Lease expired on the last attempt, the worker running the job stopped",
+                )
+                .returning(Job)
+            ).scalars().all()
+            session.commit()
+        if dead:
+            logging.error(f"Dead-lettered {len(dead)} jobs whose worker stopped on their last attempt")
+        return requeued, list(dead)
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Number of jobs in each state.
+        """
+        with self.session() as session:
+            counts = dict(session.execute(select(Job.status, func.count()).group_by(Job.status)).all())
+        return {state: counts.get(state, 0) for state in (QUEUED, RUNNING, SUCCEEDED, DEAD)}
+
+    def stats(self, window_seconds: float = 300) -> Dict[str, Any]:
+        """
+        Queue depth per state, plus throughput and latency over a recent window.
+        """
+        since = time.time() - window_seconds
+        counts = self.counts()
+        with self.session() as session:
+            recent = session.execute(
+                select(Job.created_at, Job.started_at, Job.finished_at)
+                .where(Job.status == SUCCEEDED, Job.finished_at >= since)
+            ).all()
+
+        queue_latencies = [finished - created for created, _, finished in recent]
+        run_latencies = [finished - started for _, started, finished in recent]
+        return {
+            "counts": counts,
+            "window_seconds": window_seconds,
+            "completed_in_window": len(recent),
+            "throughput_per_second": round(len(recent) / window_seconds, 4),
+            "end_to_end_seconds": summarize_latencies(queue_latencies),
+            "run_seconds": summarize_latencies(run_latencies),
+        }
+
+    def session(self) -> Session:
+        """
+        New session on the queue database, which also holds related tables (campaigns).
+        """
+        with self._lock:
+            if self._sessions is None:
+                engine = create_engine(self.url, connect_args=_connect_args(self.url))
+                if self.url.startswith("sqlite"):
+                    event.listen(engine, "connect", _enable_sqlite_wal)
+                Base.metadata.create_all(engine)
+                self._sessions = sessionmaker(engine, expire_on_commit=False)
+        return self._sessions()
+
+
+def _connect_args(url: str) -> Dict[str, Any]:
+    # Wait for the other process's write lock instead of failing immediately
+    return {"timeout": 30, "check_same_thread": False} if url.startswith("sqlite") else {}
+
+
+def _enable_sqlite_wal(connection, _):
+    # WAL lets the web process insert while the worker process reads and updates
+    connection.execute("PRAGMA journal_mode=WAL")
+
+
+
+# Queue shared by the web app (producer) and app.worker (consumer)
+email_job_queue = JobQueue(
+    JOB_QUEUE_URL,
+    max_attempts=JOB_MAX_ATTEMPTS,
+    retry_base_seconds=JOB_RETRY_BASE_SECONDS,
+    retry_max_seconds=JOB_RETRY_MAX_SECONDS,
+    lease_seconds=JOB_LEASE_SECONDS,
+)
@@ -0,0 +1,347 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Seconds; spans a cached calculation (~100 us) up to a slow PDF render
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# (labels, value) pairs reported by a collector for one metric
+Samples = Iterable[Tuple[Dict[str, str], float]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def expose(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in values
+        ]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """
+    Observations counted into fixed buckets, plus their sum and count.
+
+    Each label combination costs one small list; observe() is a bisect and
+    three additions under a lock, so it's cheap enough for every request.
+    """
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: [count per bucket (last is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labels: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def expose(self) -> List[str]:
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        lines = self.header()
+        for labels, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Metrics of this process, rendered in the Prometheus text format.
+
+    Besides metrics updated on the hot path, collectors read values other
+    components already keep (cache hit counters, queue depths) only when
+    /metrics is scraped. Each server worker process has its own registry, so
+    scrape every worker or aggregate by instance.
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Tuple[str, str, str, Sequence[str], Callable[[], Samples]]] = []
+        self.collector_errors = 0
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def collector(self, name: str, type: str, help: str, labelnames: Sequence[str], collect: Callable[[], Samples]):
+        """
+        Register a metric whose samples are read by calling `collect` at scrape time.
+        """
+        self._collectors.append((name, type, help, tuple(labelnames), collect))
+
+    def expose(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.expose())
+        for name, type, help, labelnames, collect in self._collectors:
+            try:
+                samples = list(collect())
+            except Exception:
+                # One broken source (e.g. the queue database) shouldn't hide every other metric
+                self.collector_errors += 1
+                continue
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {type}")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(labelnames, [labels[label] for label in labelnames])} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+
+def timed(histogram: Histogram, *labels: str):
+    """
+    Decorator recording the duration of every call to `histogram`.
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, *labels)
+        return wrapper
+    return decorator
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route template and the
+    number of requests in flight.
+
+    Requests are labelled with the route's path template (/api/v1/jobs/{job_id})
+    rather than the raw path, and unmatched paths share one label, so label
+    cardinality stays bounded.
+    """
+
+    def __init__(self, app, registry: Optional["MetricsRegistry"] = None):
+        self.app = app
+        registry = registry or metrics
+        self.requests = registry.histogram(
+            "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+        )
+        self.in_flight = registry.gauge("http_requests_in_flight", "HTTP requests being handled")
+        self._route_paths: Dict[Any, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        self.in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.in_flight.dec()
+            self.requests.observe(
+                time.perf_counter() - start, scope["method"], self._route(scope), str(status)
+            )
+
+    def _route(self, scope) -> str:
+        # The router stores the matched endpoint in the scope
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            app = scope.get("app")
+            for route in getattr(app, "routes", ()):
+                if getattr(route, "endpoint", None) is endpoint:
+                    path = route.path
+                    break
+            else:
+                path = "unmatched"
+            self._route_paths[endpoint] = path
+        return path
+
+
+# Process-wide registry and the hot-path metrics the services record into
+metrics = MetricsRegistry()
+function_seconds = metrics.histogram(
+    "app_function_duration_seconds", "Time spent in instrumented functions", ("function",)
+)
+smtp_phase_seconds = metrics.histogram(
+    "smtp_phase_duration_seconds", "SMTP connect, STARTTLS, login and send time", ("phase",)
+)
+calculated_properties = metrics.counter(
+    "calculated_properties_total", "Properties run through the depreciation engine (result cache misses)"
+)
+
+
+def register_service_collectors(registry: MetricsRegistry = metrics, email: bool = True):
+    """
+    Expose the counters the caches, PDF pool, SMTP pool and job queue already
+    keep. They are read at scrape time, so they add nothing to the hot path.
+    Without `email` the email stack isn't imported.
+    """
+    from app.services import calculator
+    from app.services.sessions import calculation_sessions
+    from app.services.parallel import calculation_pool
+
+    def result_cache_lookups():
+        cache = calculator.result_cache
+        if cache is not None:
+            yield {"result": "hit"}, cache.hits
+            yield {"result": "miss"}, cache.misses
+
+    registry.collector(
+        "result_cache_lookups_total", "counter", "Calculation result cache lookups", ("result",), result_cache_lookups
+    )
+    registry.collector(
+        "calculation_sessions", "gauge", "Live incremental calculation sessions", (),
+        lambda: [({}, len(calculation_sessions))]
+    )
+    registry.collector(
+        "calculation_pool_batches_total", "counter", "Batches calculated by the calculation pool by mode", ("mode",),
+        lambda: [
+            ({"mode": "parallel"}, calculation_pool.parallel_batches),
+            ({"mode": "serial"}, calculation_pool.serial_batches),
+        ]
+    )
+    if not email:
+        return
+
+    from app.services import email_service
+    from app.services.job_queue import email_job_queue
+
+    def pdf_cache_lookups():
+        cache = email_service.pdf_cache
+        if cache is not None:
+            yield {"result": "memory_hit"}, cache.memory_hits
+            yield {"result": "disk_hit"}, cache.disk_hits
+            yield {"result": "miss"}, cache.misses
+
+    pool = email_service.pdf_render_pool
+    smtp = email_service.smtp_pool
+    registry.collector(
+        "pdf_cache_lookups_total", "counter", "Rendered PDF cache lookups", ("result",), pdf_cache_lookups
+    )
+    registry.collector(
+        "pdf_render_queue_depth", "gauge", "PDF jobs waiting for a render worker", (),
+        lambda: [({}, pool.queued)]
+    )
+    registry.collector(
+        "pdf_render_in_flight", "gauge", "PDF jobs being rendered", (),
+        lambda: [({}, pool.in_flight)]
+    )
+    registry.collector(
+        "pdf_render_jobs_total", "counter", "Finished PDF render jobs by outcome", ("outcome",),
+        lambda: [
+            ({"outcome": "completed"}, pool.completed),
+            ({"outcome": "failed"}, pool.failed),
+            ({"outcome": "timed_out"}, pool.timed_out),
+            ({"outcome": "rejected"}, pool.rejected),
+        ]
+    )
+    registry.collector(
+        "smtp_messages_total", "counter", "Messages handed to the SMTP pool by outcome", ("outcome",),
+        lambda: [({"outcome": "sent"}, smtp.messages_sent), ({"outcome": "failed"}, smtp.send_failures)]
+    )
+    registry.collector(
+        "smtp_connections_opened_total", "counter", "SMTP connections opened by the pool", (),
+        lambda: [({}, smtp.connections_opened)]
+    )
+    registry.collector(
+        "smtp_connections_idle", "gauge", "Idle pooled SMTP connections", (),
+        lambda: [({}, smtp.stats()["idle_connections"])]
+    )
+    registry.collector(
+        "email_jobs", "gauge", "Email jobs in the durable queue by state", ("state",),
+        lambda: [({"state": state}, count) for state, count in email_job_queue.counts().items()]
+    )
@@ -0,0 +1,100 @@
+import base64
+import uuid
+from email.message import EmailMessage
+from email.policy import SMTP as SMTP_POLICY
+from email.utils import formatdate, make_msgid, parseaddr
+from typing import Iterator, List, Optional, Tuple
+
+# Raw bytes per base64 chunk; a multiple of 57 so every line is a full 76 characters
+BASE64_CHUNK_BYTES = 57 * 1024
+BASE64_LINE_CHARS = 76
+
+
+def base64_lines(data: bytes, chunk_bytes: int = BASE64_CHUNK_BYTES) -> Iterator[bytes]:
+    """
+    Base64-encode `data` in chunks of CRLF-terminated 76 character lines,
+    without ever holding the whole encoded copy.
+    """
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_bytes):
+        encoded = base64.b64encode(view[start:start + chunk_bytes])
+        yield b"".join(
+            encoded[offset:offset + BASE64_LINE_CHARS] + b"\r\n"
+            for offset in range(0, len(encoded), BASE64_LINE_CHARS)
+        )
+
+
+def _header_block(headers) -> bytes:
+    """Folded, encoded header lines followed by the blank line that ends them"""
+    return b"".join(SMTP_POLICY.fold_binary(name, value) for name, value in headers.items()) + b"\r\n"
+
+
+class StreamingReportMessage:
+    """
+    A report email (HTML body plus optional attachments) assembled lazily.
+
+    Unlike MIMEMultipart + MIMEApplication, attachments are kept as the
+    original bytes only and base64-encoded chunk by chunk while the message is
+    written, so sending holds roughly one copy of the PDF instead of three.
+    Every body line is base64, so the output needs no SMTP dot-stuffing and
+    already uses CRLF line endings.
+    """
+
+    def __init__(self, from_addr: str, to: str, subject: str, html: str):
+        self.from_addr = from_addr
+        self.to = to
+        self.subject = subject
+        self.html = html
+        self.attachments: List[Tuple[str, str, bytes]] = []
+        self.boundary = f"=_report_{uuid.uuid4().hex}"
+        self.message_id = make_msgid(domain=parseaddr(from_addr)[1].rpartition("@")[2] or None)
+
+    def __getitem__(self, header: str) -> Optional[str]:
+        # Lets callers read headers as on an email.message.Message
+        return {"from": self.from_addr, "to": self.to, "subject": self.subject}.get(header.lower())
+
+    @property
+    def sender(self) -> str:
+        return parseaddr(self.from_addr)[1]
+
+    @property
+    def recipients(self) -> List[str]:
+        return [parseaddr(self.to)[1]]
+
+    def attach(self, data: bytes, filename: str, content_type: str = "application/pdf"):
+        self.attachments.append((content_type, filename, data))
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        """
+        The serialized message (RFC 5322, CRLF line endings) in pieces.
+        """
+        headers = EmailMessage(policy=SMTP_POLICY)
+        headers["From"] = self.from_addr
+        headers["To"] = self.to
+        headers["Subject"] = self.subject
+        headers["Date"] = formatdate(localtime=True)
+        headers["Message-ID"] = self.message_id
+        headers["MIME-Version"] = "1.0"
+        headers["Content-Type"] = f'multipart/mixed; boundary="{self.boundary}"'
+        yield _header_block(headers)
+        boundary = self.boundary.encode("ascii")
+
+        yield b"--" + boundary + b"\r\n" + _header_block({
+            "Content-Type": 'text/html; charset="utf-8"',
+            "Content-Transfer-Encoding": "base64",
+        })
+        yield from base64_lines(self.html.encode("utf-8"))
+
+        for content_type, filename, data in self.attachments:
+            part = EmailMessage(policy=SMTP_POLICY)
+            part["Content-Type"] = content_type
+            part["Content-Transfer-Encoding"] = "base64"
+            part["Content-Disposition"] = "attachment"
+            part.set_param("filename", filename, header="Content-Disposition")
+            yield b"--" + boundary + b"\r\n" + _header_block(part)
+            yield from base64_lines(data)
+
+        yield b"--" + boundary + b"--\r\n"
+
+    def as_bytes(self) -> bytes:
+        return b"".join(self.iter_bytes())
@@ -0,0 +1,164 @@
+import logging
+import math
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+from app.services.calculator import calculate_items
+from app.services.metrics import function_seconds
+from app.services.schedule import DepreciationSchedule
+from app.services.stats import summarize_latencies
+from app.config import (
+    CALC_POOL_WORKERS,
+    CALC_POOL_CHUNK_SIZE,
+    CALC_POOL_SERIAL_THRESHOLD,
+    CURVE_TABLE_WARM_MAX_LIFE,
+)
+
+Outcome = Tuple[Optional[DepreciationSchedule], Optional[str]]
+
+
+def _warm_worker():
+    """
+    Process pool initializer: the schemas and engine are imported with this
+    module; precompute the unit curves so the first chunk doesn't pay for them.
+    """
+    from app.services.calculator import unit_curves
+
+    unit_curves.warm(range(1, CURVE_TABLE_WARM_MAX_LIFE + 1))
+
+
+def _calculate_in_worker(items: List[Any]) -> Tuple[List[Outcome], float]:
+    """
+    Validate and calculate one chunk inside a worker process, returning the
+    outcomes and the time it took.
+    """
+    start = time.perf_counter()
+    outcomes = calculate_items(items)
+    return outcomes, time.perf_counter() - start
+
+
+class CalculationPool:
+    """
+    Persistent worker processes that validate and calculate large batches on
+    several cores.
+
+    Calculation is pure-Python CPU work, so one server process only uses one
+    core. Batches of at least `serial_threshold` items are split into chunks
+    of at most `chunk_size` (smaller if that would leave workers idle) and the
+    chunks are calculated in parallel, results coming back in input order.
+    Smaller batches, where sending items and results between processes costs
+    more than it saves, are calculated in the calling thread, as is
+    everything with `max_workers=0`.
+
+    Raw items are sent rather than validated requests: validation is most of
+    the work, and pickling Pydantic models costs about as much as
+    calculating them. Each worker has its own result cache.
+    """
+
+    def __init__(self, max_workers: int, chunk_size: int, serial_threshold: int, start_method: str = "spawn"):
+        self.max_workers = max_workers
+        self.chunk_size = max(1, chunk_size)
+        self.serial_threshold = serial_threshold
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._chunk_seconds = deque(maxlen=1000)
+        self.parallel_batches = 0
+        self.serial_batches = 0
+        self.chunks = 0
+        self.items = 0
+        self.failures = 0
+
+    def calculate_items(self, items: List[Any]) -> List[Outcome]:
+        """
+        Validate and calculate raw request items, returning (result, error)
+        per item in order. Blocks until done; call it from a thread.
+        """
+        with self._lock:
+            self.items += len(items)
+        if self.max_workers <= 0 or len(items) < max(self.serial_threshold, 2):
+            with self._lock:
+                self.serial_batches += 1
+            return calculate_items(items)
+
+        executor = self._get_executor()
+        # At least one chunk per worker, so small parallel batches still use every core
+        size = min(self.chunk_size, math.ceil(len(items) / self.max_workers))
+        try:
+            futures = [
+                executor.submit(_calculate_in_worker, items[start:start + size])
+                for start in range(0, len(items), size)
+            ]
+            outcomes = []
+            for future in futures:
+                chunk_outcomes, seconds = future.result()
+                outcomes.extend(chunk_outcomes)
+                self._chunk_seconds.append(seconds)
+                # Timed inside the worker process, where calculate_items runs
+                function_seconds.observe(seconds, "calculate_items")
+        except BrokenProcessPool as e:
+            # A worker died (e.g. killed for memory); start a fresh pool next time, finish this batch here
+            logging.warning(f"Calculation worker process died, calculating the batch in-process: {str(e)}")
+            with self._lock:
+                self.failures += 1
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            return calculate_items(items)
+
+        with self._lock:
+            self.parallel_batches += 1
+            self.chunks += len(futures)
+        return outcomes
+
+    def start(self):
+        """
+        Start the worker processes now rather than on the first large batch.
+        """
+        if self.max_workers <= 0:
+            return
+        executor = self._get_executor()
+        # The pool only spawns processes as work arrives
+        for _ in range(self.max_workers):
+            executor.submit(int)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "chunk_size": self.chunk_size,
+            "serial_threshold": self.serial_threshold,
+            "parallel_batches": self.parallel_batches,
+            "serial_batches": self.serial_batches,
+            "chunks": self.chunks,
+            "items": self.items,
+            "failures": self.failures,
+            "chunk_seconds": summarize_latencies(self._chunk_seconds),
+        }
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stop the worker processes, by default after running chunks finish.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                logging.info(f"Starting calculation pool with {self.max_workers} worker processes")
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=_warm_worker,
+                )
+            return self._executor
+
+
+# Shared calculation pool of this process (calculates in-process with 0 workers)
+calculation_pool = CalculationPool(CALC_POOL_WORKERS, CALC_POOL_CHUNK_SIZE, CALC_POOL_SERIAL_THRESHOLD)
@@ -0,0 +1,199 @@
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+from app.services.schedule import DepreciationSchedule
+
+# Bump when the PDF renderer changes so old cached PDFs are never served
+PDF_CACHE_KEY_VERSION = 1
+
+
+def pdf_cache_key(report: DepreciationSchedule, template_version: str, date_stamp: str) -> str:
+    """
+    Content-addressed key for a rendered report.
+
+    The PDF depends on the report, the template source and the date printed
+    on it, so all three go into the key.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{PDF_CACHE_KEY_VERSION}|{template_version}|{date_stamp}|".encode("utf-8"))
+    digest.update(report.to_json().encode("utf-8"))
+    return digest.hexdigest()
+
+
+class DiskPdfTier:
+    """
+    On-disk cache tier, one file per PDF, shared by every process on the host.
+
+    Files are written atomically (temp file + rename). Reads refresh the file's
+    modification time, so trimming back to `max_bytes` removes the least
+    recently used PDFs first.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._bytes = self._scan_bytes()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def set(self, key: str, data: bytes):
+        path = self._path(key)
+        temp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        temp_path.write_bytes(data)
+        with self._lock:
+            # Overwriting a key (e.g. two renders of one report) only adds the difference
+            try:
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(temp_path, path)
+            self._bytes += len(data) - replaced
+            if self._bytes > self.max_bytes:
+                self._prune()
+
+    def clear(self):
+        with self._lock:
+            for path in self.directory.glob("*.pdf"):
+                path.unlink(missing_ok=True)
+            self._bytes = 0
+
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def _prune(self):
+        # Other processes write here too, so re-read the directory before evicting
+        files = []
+        for path in self.directory.glob("*.pdf"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.evictions += 1
+        self._bytes = total
+
+    def _scan_bytes(self) -> int:
+        return sum(path.stat().st_size for path in self.directory.glob("*.pdf"))
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.pdf"
+
+
+class PdfCache:
+    """
+    Two-tier cache of rendered PDF reports: an in-process LRU bounded by
+    `max_memory_bytes`, backed by an optional disk tier. Disk hits are
+    promoted into memory. Hits are counted with the bytes they avoided
+    rendering.
+    """
+
+    def __init__(self, max_memory_bytes: int, disk: Optional[DiskPdfTier] = None):
+        self.max_memory_bytes = max_memory_bytes
+        self.disk = disk
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                self.bytes_saved += len(data)
+                return data
+
+        if self.disk is not None:
+            try:
+                data = self.disk.get(key)
+            except OSError as e:
+                logging.warning(f"PDF cache disk read failed: {str(e)}")
+                data = None
+            if data is not None:
+                self._store(key, data)
+                with self._lock:
+                    self.disk_hits += 1
+                    self.bytes_saved += len(data)
+                return data
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, data: bytes):
+        self._store(key, data)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, data)
+            except OSError as e:
+                logging.warning(f"PDF cache disk write failed: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._memory_bytes = 0
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            stats = {
+                "entries": len(self._entries),
+                "memory_bytes": self._memory_bytes,
+                "max_memory_bytes": self.max_memory_bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+                "evictions": self.evictions,
+            }
+        if self.disk is not None:
+            stats["disk_directory"] = str(self.disk.directory)
+            stats["disk_bytes"] = self.disk.size_bytes()
+            stats["max_disk_bytes"] = self.disk.max_bytes
+            stats["disk_evictions"] = self.disk.evictions
+        return stats
+
+    def _store(self, key: str, data: bytes):
+        if len(data) > self.max_memory_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous)
+            self._entries[key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+                self.evictions += 1
@@ -0,0 +1,420 @@
+import functools
+import logging
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+from app.services.schedule import DepreciationSchedule
+
+# Bump when the layout below changes so cached PDFs are re-rendered
+DIRECT_LAYOUT_VERSION = 1
+
+# A4 in points, with the same 2cm margins as the HTML template
+PAGE_WIDTH = 595.28
+PAGE_HEIGHT = 841.89
+MARGIN = 56.69
+CONTENT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+
+HEADER_BACKGROUND = (0.953, 0.957, 0.965)  # #f3f4f6
+STRIPE_BACKGROUND = (0.976, 0.980, 0.984)  # #f9fafb
+SUMMARY_BACKGROUND = (0.961, 0.969, 0.980)  # #f5f7fa
+
+PROPERTY_TYPE_LABELS = {
+    "residential": "Residential Property",
+    "commercial": "Commercial Property",
+    "industrial": "Industrial Property",
+}
+
+# Glyph widths (1/1000 em) of the standard Helvetica fonts for ASCII 32..126,
+# used to centre text without embedding font metrics files
+HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+HELVETICA_BOLD_WIDTHS = [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+]
+
+
+def text_width(text: str, size: float, bold: bool = False) -> float:
+    widths = HELVETICA_BOLD_WIDTHS if bold else HELVETICA_WIDTHS
+    total = 0
+    for char in text:
+        code = ord(char)
+        total += widths[code - 32] if 32 <= code <= 126 else 556
+    return total * size / 1000
+
+
+def _pdf_string(text: str) -> str:
+    encoded = text.encode("cp1252", errors="replace").decode("latin-1")
+    return "(" + encoded.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def _money(value: float) -> str:
+    return "${:,.2f}".format(value)
+
+
+class SvgLogo:
+    """
+    A simple SVG (filled paths, no transforms or arcs) converted once into
+    PDF path operators, drawn as a form XObject.
+    """
+
+    PATH_TOKEN = re.compile(r"[MmLlHhVvCcSsQqZz]|[-+]?(?:\d*\.\d+|\d+\.?)(?:[eE][-+]?\d+)?")
+
+    def __init__(self, width: float, height: float, operators: str):
+        self.width = width
+        self.height = height
+        self.operators = operators
+
+    @classmethod
+    def from_file(cls, path: str) -> "SvgLogo":
+        source = open(path, encoding="utf-8").read()
+        view_box = re.search(r'viewBox="([^"]+)"', source)
+        if view_box is None:
+            raise ValueError("SVG has no viewBox")
+        _, _, width, height = (float(value) for value in view_box.group(1).replace(",", " ").split())
+
+        class_fills = dict(re.findall(r"\.([\w-]+)\s*\{[^}]*fill:\s*(#[0-9a-fA-F]{6})", source))
+        operators = []
+        for element in re.findall(r"<path\b[^>]*>", source):
+            data = re.search(r'\sd="([^"]*)"', element)
+            if data is None:
+                continue
+            fill = re.search(r'\sfill="(#[0-9a-fA-F]{6})"', element)
+            css_class = re.search(r'\sclass="([^"]*)"', element)
+            color = fill.group(1) if fill else class_fills.get(css_class.group(1) if css_class else "", "#000000")
+            red, green, blue = (int(color[i:i + 2], 16) / 255 for i in (1, 3, 5))
+            operators.append(f"{red:.3f} {green:.3f} {blue:.3f} rg")
+            operators.append(cls._path_operators(data.group(1)))
+            operators.append("f")
+        return cls(width, height, "\n".join(operators))
+
+    @classmethod
+    def _path_operators(cls, data: str) -> str:
+        """
+        Translate SVG path data into PDF path construction operators.
+        """
+        tokens = cls.PATH_TOKEN.findall(data)
+        operators: List[str] = []
+        x = y = start_x = start_y = 0.0
+        control_x = control_y = None  # Reflected control point for S/s and Q/q
+        command = None
+        index = 0
+
+        def number():
+            nonlocal index
+            value = float(tokens[index])
+            index += 1
+            return value
+
+        def cubic(x1, y1, x2, y2, x3, y3):
+            operators.append(f"{x1:.2f} {y1:.2f} {x2:.2f} {y2:.2f} {x3:.2f} {y3:.2f} c")
+
+        while index < len(tokens):
+            if tokens[index].isalpha():
+                command = tokens[index]
+                index += 1
+                if command in "Zz":
+                    operators.append("h")
+                    x, y = start_x, start_y
+                    control_x = control_y = None
+                    continue
+            elif command is None:
+                raise ValueError("SVG path data must start with a command")
+
+            relative = command.islower()
+            base_x, base_y = (x, y) if relative else (0.0, 0.0)
+            upper = command.upper()
+            if upper == "M":
+                x, y = base_x + number(), base_y + number()
+                start_x, start_y = x, y
+                operators.append(f"{x:.2f} {y:.2f} m")
+                # Further coordinate pairs after a moveto are linetos
+                command = "l" if relative else "L"
+                control_x = control_y = None
+            elif upper == "L":
+                x, y = base_x + number(), base_y + number()
+                operators.append(f"{x:.2f} {y:.2f} l")
+                control_x = control_y = None
+            elif upper == "H":
+                x = base_x + number()
+                operators.append(f"{x:.2f} {y:.2f} l")
+                control_x = control_y = None
+            elif upper == "V":
+                y = base_y + number()
+                operators.append(f"{x:.2f} {y:.2f} l")
+                control_x = control_y = None
+            elif upper == "C":
+                x1, y1 = base_x + number(), base_y + number()
+                x2, y2 = base_x + number(), base_y + number()
+                x, y = base_x + number(), base_y + number()
+                cubic(x1, y1, x2, y2, x, y)
+                control_x, control_y = x2, y2
+            elif upper == "S":
+                x1, y1 = (2 * x - control_x, 2 * y - control_y) if control_x is not None else (x, y)
+                x2, y2 = base_x + number(), base_y + number()
+                x, y = base_x + number(), base_y + number()
+                cubic(x1, y1, x2, y2, x, y)
+                control_x, control_y = x2, y2
+            elif upper == "Q":
+                qx, qy = base_x + number(), base_y + number()
+                end_x, end_y = base_x + number(), base_y + number()
+                # Raise the quadratic curve to the equivalent cubic
+                cubic(
+                    x + 2 / 3 * (qx - x), y + 2 / 3 * (qy - y),
+                    end_x + 2 / 3 * (qx - end_x), end_y + 2 / 3 * (qy - end_y),
+                    end_x, end_y,
+                )
+                x, y = end_x, end_y
+                control_x, control_y = qx, qy
+            else:
+                raise ValueError(f"Unsupported SVG path command: {command}")
+        return "\n".join(operators)
+
+
+@functools.lru_cache(maxsize=4)
+def load_logo(path: str) -> Optional[SvgLogo]:
+    """
+    Load and convert a logo once per process; None if it can't be drawn.
+    """
+    if not path or not path.endswith(".svg"):
+        return None
+    try:
+        return SvgLogo.from_file(path)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Logo {path} can't be drawn by the direct PDF backend: {str(e)}")
+        return None
+
+
+class _Document:
+    """Pages of content stream operators, written out as a minimal PDF file"""
+
+    def __init__(self):
+        self.pages: List[List[str]] = []
+        self.y = 0.0
+
+    def new_page(self):
+        self.pages.append([])
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def ensure_space(self, height: float) -> bool:
+        """Start a new page if `height` doesn't fit; True if a page was started"""
+        if self.y - height < MARGIN:
+            self.new_page()
+            return True
+        return False
+
+    def emit(self, operator: str):
+        self.pages[-1].append(operator)
+
+    def text(self, x: float, y: float, text: str, size: float, bold: bool = False):
+        font = "F2" if bold else "F1"
+        self.emit(f"BT /{font} {size:g} Tf {x:.2f} {y:.2f} Td {_pdf_string(text)} Tj ET")
+
+    def centered_text(self, y: float, text: str, size: float, bold: bool = False):
+        self.text(MARGIN + (CONTENT_WIDTH - text_width(text, size, bold)) / 2, y, text, size, bold)
+
+    def fill_rect(self, x: float, y: float, width: float, height: float, color: Tuple[float, float, float]):
+        self.emit(f"{color[0]:.3f} {color[1]:.3f} {color[2]:.3f} rg {x:.2f} {y:.2f} {width:.2f} {height:.2f} re f 0 g")
+
+    def stroke_rect(self, x: float, y: float, width: float, height: float, line_width: float = 0.75):
+        self.emit(f"{line_width:g} w {x:.2f} {y:.2f} {width:.2f} {height:.2f} re S")
+
+    def line(self, x1: float, y1: float, x2: float, y2: float, line_width: float = 0.75):
+        self.emit(f"{line_width:g} w {x1:.2f} {y1:.2f} m {x2:.2f} {y2:.2f} l S")
+
+    def write(self, logo: Optional[SvgLogo]) -> bytes:
+        objects: Dict[int, bytes] = {}
+        objects[3] = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+        objects[4] = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>"
+        resources = "/Font << /F1 3 0 R /F2 4 0 R >>"
+        next_id = 5
+        if logo is not None:
+            objects[5] = _stream(
+                f"/Type /XObject /Subtype /Form /BBox [0 0 {logo.width:g} {logo.height:g}]",
+                logo.operators.encode("latin-1"),
+            )
+            resources += " /XObject << /Logo 5 0 R >>"
+            next_id = 6
+
+        page_ids = []
+        for operators in self.pages:
+            page_id, content_id = next_id, next_id + 1
+            next_id += 2
+            objects[content_id] = _stream("", "\n".join(operators).encode("latin-1"))
+            objects[page_id] = (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                f"/Resources << {resources} >> /Contents {content_id} 0 R >>"
+            ).encode("latin-1")
+            page_ids.append(page_id)
+        objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+        kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+        objects[2] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("latin-1")
+
+        output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = {}
+        for object_id in sorted(objects):
+            offsets[object_id] = len(output)
+            output += f"{object_id} 0 obj\n".encode("latin-1") + objects[object_id] + b"\nendobj\n"
+        xref_offset = len(output)
+        output += f"xref\n0 {next_id}\n0000000000 65535 f \n".encode("latin-1")
+        for object_id in range(1, next_id):
+            output += f"{offsets[object_id]:010d} 00000 n \n".encode("latin-1")
+        output += f"trailer\n<< /Size {next_id} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("latin-1")
+        return bytes(output)
+
+
+def _stream(dictionary: str, data: bytes) -> bytes:
+    compressed = zlib.compress(data, 6)
+    header = f"<< {dictionary} /Length {len(compressed)} /Filter /FlateDecode >>\nstream\n".encode("latin-1")
+    return header + compressed + b"\nendstream"
+
+
+def _key_value_table(
+    document: _Document,
+    rows: List[Tuple[str, str]],
+    left: float = MARGIN,
+    width: float = CONTENT_WIDTH,
+    row_height: float = 22,
+):
+    label_width = width * 0.45
+    for label, value in rows:
+        document.ensure_space(row_height)
+        top = document.y
+        document.fill_rect(left, top - row_height, label_width, row_height, HEADER_BACKGROUND)
+        document.stroke_rect(left, top - row_height, label_width, row_height)
+        document.stroke_rect(left + label_width, top - row_height, width - label_width, row_height)
+        document.text(left + 8, top - 15, label, 10, bold=True)
+        document.text(left + label_width + 8, top - 15, value, 10, bold=True)
+        document.y -= row_height
+
+
+def _heading(document: _Document, text: str):
+    document.ensure_space(60)
+    document.y -= 24
+    document.text(MARGIN, document.y - 14, text, 14, bold=True)
+    document.y -= 22
+    document.line(MARGIN, document.y, MARGIN + CONTENT_WIDTH, document.y, 1.5)
+    document.y -= 12
+
+
+SCHEDULE_COLUMNS = ["Year", "Diminishing Value ($)", "Prime Cost ($)", "Capital Works ($)", "Total ($)"]
+SCHEDULE_WIDTHS = [0.12, 0.23, 0.21, 0.22, 0.22]
+
+
+def _schedule_header(document: _Document, row_height: float):
+    x = MARGIN
+    top = document.y
+    for title, fraction in zip(SCHEDULE_COLUMNS, SCHEDULE_WIDTHS):
+        width = CONTENT_WIDTH * fraction
+        document.fill_rect(x, top - row_height, width, row_height, HEADER_BACKGROUND)
+        document.stroke_rect(x, top - row_height, width, row_height)
+        document.text(x + 6, top - row_height + 6, title, 9, bold=True)
+        x += width
+    document.y -= row_height
+
+
+def _schedule_table(document: _Document, report: DepreciationSchedule, row_height: float = 17):
+    document.ensure_space(row_height * 3)
+    _schedule_header(document, row_height)
+    for index, year in enumerate(report.yearly_breakdown):
+        if document.ensure_space(row_height):
+            # Repeat the column titles at the top of each continuation page
+            _schedule_header(document, row_height)
+        top = document.y
+        if index % 2 == 1:
+            document.fill_rect(MARGIN, top - row_height, CONTENT_WIDTH, row_height, STRIPE_BACKGROUND)
+        cells = [
+            str(year.year),
+            _money(year.diminishing_value),
+            _money(year.prime_cost),
+            _money(year.capital_works),
+            _money(year.total),
+        ]
+        x = MARGIN
+        for column, (cell, fraction) in enumerate(zip(cells, SCHEDULE_WIDTHS)):
+            width = CONTENT_WIDTH * fraction
+            document.stroke_rect(x, top - row_height, width, row_height)
+            document.text(x + 6, top - row_height + 5, cell, 9, bold=column == len(cells) - 1)
+            x += width
+        document.y -= row_height
+
+
+def render_report_pdf_direct(
+    report: DepreciationSchedule,
+    formatted_date: str,
+    current_year: int,
+    logo_path: str = "",
+) -> bytes:
+    """
+    Write the report PDF directly: logo, property and summary tables and the
+    yearly schedule in a fixed A4 layout, without HTML/CSS layout.
+    """
+    document = _Document()
+    document.new_page()
+    logo = load_logo(logo_path)
+
+    # Header
+    if logo is not None:
+        logo_width = min(135.0, logo.width)
+        scale = logo_width / logo.width
+        logo_height = logo.height * scale
+        # SVG y runs downwards, PDF y upwards
+        document.emit(
+            f"q {scale:.5f} 0 0 {-scale:.5f} {MARGIN + (CONTENT_WIDTH - logo_width) / 2:.2f} "
+            f"{document.y:.2f} cm /Logo Do Q"
+        )
+        document.y -= logo_height + 12
+    document.y -= 20
+    document.centered_text(document.y, "Tax Depreciation Report", 20, bold=True)
+    document.y -= 20
+    document.centered_text(document.y, f"Generated on {formatted_date}", 10)
+    document.y -= 16
+    document.line(MARGIN, document.y, MARGIN + CONTENT_WIDTH, document.y)
+
+    property_type = getattr(report.property_type, "value", report.property_type)
+    _heading(document, "Property Information")
+    _key_value_table(document, [
+        ("Property Type", PROPERTY_TYPE_LABELS.get(property_type, str(property_type))),
+        ("Purchase Price", _money(report.purchase_price)),
+    ])
+
+    _heading(document, "Depreciation Summary")
+    summary_height = 3 * 22 + 30
+    document.ensure_space(summary_height)
+    summary_top = document.y
+    document.fill_rect(MARGIN, summary_top - summary_height, CONTENT_WIDTH, summary_height, SUMMARY_BACKGROUND)
+    document.fill_rect(MARGIN, summary_top - summary_height, 3, summary_height, (0, 0, 0))
+    document.y -= 15
+    _key_value_table(document, [
+        ("First Year Deduction", _money(report.first_year_depreciation)),
+        ("First 5 Years", _money(report.five_year_depreciation)),
+        ("Total Depreciable Amount", _money(report.total_depreciable_amount)),
+    ], left=MARGIN + 15, width=CONTENT_WIDTH - 30)
+    document.y = summary_top - summary_height
+
+    _heading(document, "Yearly Depreciation Schedule")
+    _schedule_table(document, report)
+
+    # Footer
+    document.ensure_space(70)
+    document.y -= 24
+    document.line(MARGIN, document.y, MARGIN + CONTENT_WIDTH, document.y)
+    for line in (
+        "This report was generated using Duo Tax's Depreciation Calculator.",
+        "For professional advice, please contact us at info@duotax.com.au",
+        f"© {current_year} Duo Tax Depreciation. All rights reserved.",
+    ):
+        document.y -= 15
+        document.centered_text(document.y, line, 9)
+
+    return document.write(logo)
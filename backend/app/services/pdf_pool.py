@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from app.services.schedule import DepreciationSchedule
+from app.services.metrics import function_seconds
+from app.services.stats import summarize_latencies
+
+
+class PdfRenderError(Exception):
+    """Raised when a PDF job cannot be rendered by the pool"""
+
+
+class PdfQueueFullError(PdfRenderError):
+    """Raised when too many PDF jobs are already waiting for a worker"""
+
+
+class PdfRenderTimeoutError(PdfRenderError):
+    """Raised when a PDF job takes longer than the per-job timeout"""
+
+
+def _warm_worker():
+    """
+    Process pool initializer: import WeasyPrint, compile the templates and parse
+    the report CSS (or convert the logo for the direct backend) up front so the
+    first job on each worker doesn't pay for it.
+    """
+    from app.services import email_service  # noqa: F401
+    from app.services.templates import templates
+    from app.services.pdf_renderer import get_render_context
+    from app.services.pdf_direct import load_logo
+    from app.config import PDF_BACKEND
+
+    templates.load()
+    try:
+        if PDF_BACKEND == "direct":
+            load_logo(templates.context()["duo_group_logo_path"])
+        else:
+            get_render_context()
+    except Exception as e:
+        # Rendering falls back to the slower approaches, don't kill the worker
+        logging.warning(f"Could not prepare the PDF render context: {str(e)}")
+
+
+def _render_in_worker(report_data: Dict[str, Any]) -> Tuple[bytes, float]:
+    """
+    Render one report inside a worker process, returning the PDF and render time.
+    """
+    from app.services.email_service import generate_pdf_report
+
+    start = time.perf_counter()
+    pdf = generate_pdf_report(DepreciationSchedule.from_dict(report_data))
+    return pdf, time.perf_counter() - start
+
+
+class PdfRenderPool:
+    """
+    Bounded pool of worker processes that render PDF reports off the event loop.
+
+    At most `max_workers` jobs are handed to the process pool at once; further
+    jobs wait in an in-process queue of at most `max_queue` entries, and jobs
+    beyond that are rejected. With `max_workers=0` reports are rendered in the
+    thread pool instead, which is handy for development.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, timeout_seconds: float, start_method: str = "spawn"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout_seconds = timeout_seconds
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self._queue_waits = deque(maxlen=1000)
+        self.queued = 0
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.rejected = 0
+
+    async def render(self, report: DepreciationSchedule) -> bytes:
+        """
+        Render a report to PDF in a worker and await the result without blocking.
+        """
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise PdfQueueFullError(f"PDF render queue is full ({self.max_queue} jobs waiting)")
+
+        slots = self._get_slots()
+        self.queued += 1
+        self.submitted += 1
+        enqueued_at = time.perf_counter()
+        try:
+            await slots.acquire()
+        finally:
+            self.queued -= 1
+        self._queue_waits.append(time.perf_counter() - enqueued_at)
+
+        self.in_flight += 1
+        job = asyncio.ensure_future(self._run(report.to_dict()))
+        # Keep the worker slot until the job really finishes, even after a timeout
+        job.add_done_callback(lambda finished: self._release(slots, finished))
+        try:
+            pdf, render_seconds = await asyncio.wait_for(asyncio.shield(job), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise PdfRenderTimeoutError(f"PDF rendering took longer than {self.timeout_seconds} seconds")
+        except Exception:
+            self.failed += 1
+            raise
+
+        self.completed += 1
+        self._latencies.append(render_seconds)
+        # Timed inside the worker process, where generate_pdf_report runs
+        function_seconds.observe(render_seconds, "generate_pdf_report")
+        return pdf
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "timeout_seconds": self.timeout_seconds,
+            "queue_depth": self.queued,
+            "in_flight": self.in_flight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "rejected": self.rejected,
+            "render_seconds": summarize_latencies(self._latencies),
+            "queue_wait_seconds": summarize_latencies(self._queue_waits),
+        }
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stop the worker processes, by default after in-flight jobs finish.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    async def _run(self, report_data: Dict[str, Any]) -> Tuple[bytes, float]:
+        if self.max_workers <= 0:
+            return await run_in_threadpool(_render_in_worker, report_data)
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            return await loop.run_in_executor(executor, _render_in_worker, report_data)
+        except BrokenProcessPool as e:
+            # A worker died (e.g. killed for memory); start a fresh pool for the next job
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            raise PdfRenderError(f"PDF worker process died: {str(e)}")
+
+    def _release(self, slots: asyncio.Semaphore, job: asyncio.Future):
+        self.in_flight -= 1
+        slots.release()
+        # Mark the outcome as retrieved, a timed-out job's result is never awaited
+        if not job.cancelled():
+            job.exception()
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # Created lazily so the semaphore belongs to the running event loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(max(1, self.max_workers))
+        return self._slots
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                logging.info(f"Starting PDF render pool with {self.max_workers} worker processes")
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=_warm_worker,
+                )
+            return self._executor
+
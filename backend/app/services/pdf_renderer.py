@@ -0,0 +1,106 @@
+import logging
+import mimetypes
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from app.services.templates import templates, assets_dir, PDF_TEMPLATE
+
+# Inline <style> blocks of the PDF template, parsed once instead of on every render
+STYLE_BLOCK = re.compile(r"<style[^>]*>(.*?)</style>", re.DOTALL | re.IGNORECASE)
+
+
+def _font_configuration():
+    # FontConfiguration moved to weasyprint.text.fonts in WeasyPrint 53
+    try:
+        from weasyprint.text.fonts import FontConfiguration
+    except ImportError:
+        from weasyprint.fonts import FontConfiguration
+    return FontConfiguration()
+
+
+class PdfRenderContext:
+    """
+    WeasyPrint state shared by every PDF rendered in a process.
+
+    The report CSS is lifted out of the template and parsed into a
+    `weasyprint.CSS` once, fonts are resolved through one shared
+    `FontConfiguration`, and the logo and other template assets are served
+    from memory by the URL fetcher instead of being read from disk per render.
+    """
+
+    def __init__(self, style_blocks: List[str], css_text: str, assets: Dict[str, Tuple[bytes, str]], version: str):
+        from weasyprint import CSS
+
+        self.style_blocks = style_blocks
+        self.assets = assets
+        self.version = version
+        self.font_config = _font_configuration()
+        self.stylesheet = CSS(string=css_text, font_config=self.font_config) if css_text else None
+        self.renders = 0
+        self.asset_hits = 0
+
+    @classmethod
+    def from_template(cls) -> "PdfRenderContext":
+        """
+        Build the context for the current PDF template and asset files.
+        """
+        source = (templates.directory / PDF_TEMPLATE).read_text()
+        style_blocks = [match.group(0) for match in STYLE_BLOCK.finditer(source)]
+        css_text = "\n".join(match.group(1) for match in STYLE_BLOCK.finditer(source))
+        assets = {}
+        if assets_dir.exists():
+            for path in assets_dir.iterdir():
+                if path.is_file():
+                    mime_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+                    assets[f"file://{path}"] = (path.read_bytes(), mime_type)
+        logging.info(f"PDF render context ready: {len(css_text)} bytes of CSS, {len(assets)} assets in memory")
+        return cls(style_blocks, css_text, assets, templates.version(PDF_TEMPLATE))
+
+    def url_fetcher(self, url: str) -> Dict[str, Any]:
+        asset = self.assets.get(url)
+        if asset is None:
+            from weasyprint import default_url_fetcher
+            return default_url_fetcher(url)
+        self.asset_hits += 1
+        data, mime_type = asset
+        return {"string": data, "mime_type": mime_type, "redirected_url": url}
+
+    def render(self, html_content: str) -> bytes:
+        """
+        Render HTML produced from the PDF template using the shared state.
+        """
+        from weasyprint import HTML
+
+        # The style blocks contain no template expressions, so they render verbatim
+        for block in self.style_blocks:
+            html_content = html_content.replace(block, "", 1)
+        document = HTML(string=html_content, url_fetcher=self.url_fetcher)
+        stylesheets = [self.stylesheet] if self.stylesheet is not None else None
+        pdf = document.write_pdf(stylesheets=stylesheets, font_config=self.font_config)
+        self.renders += 1
+        return pdf
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "template_version": self.version,
+            "css_bytes": sum(len(block) for block in self.style_blocks),
+            "assets": sorted(self.assets),
+            "renders": self.renders,
+            "asset_hits": self.asset_hits,
+        }
+
+
+_context: Optional[PdfRenderContext] = None
+_context_lock = threading.Lock()
+
+
+def get_render_context() -> PdfRenderContext:
+    """
+    The process-wide render context, rebuilt if the PDF template changed.
+    """
+    global _context
+    version = templates.version(PDF_TEMPLATE)
+    with _context_lock:
+        if _context is None or _context.version != version:
+            _context = PdfRenderContext.from_template()
+        return _context
@@ -0,0 +1,347 @@
+import cProfile
+import io
+import marshal
+import pstats
+import secrets
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+CPROFILE = "cprofile"
+SAMPLER = "sampler"
+MODES = (CPROFILE, SAMPLER)
+
+# Output formats per mode
+PSTATS = "pstats"  # marshalled pstats data, loadable with pstats.Stats / snakeviz
+TEXT = "text"  # pstats report sorted by cumulative time
+SPEEDSCOPE = "speedscope"  # https://www.speedscope.app file format
+COLLAPSED = "collapsed"  # folded stacks for flamegraph.pl
+FORMATS = {CPROFILE: (PSTATS, TEXT), SAMPLER: (SPEEDSCOPE, COLLAPSED)}
+
+# Innermost frames in these modules mean a thread is waiting, not working
+_IDLE_MODULES = ("selectors.py", "threading.py", "queue.py")
+_MAX_STACK_DEPTH = 128
+
+
+def token_matches(given: str, expected: str) -> bool:
+    """
+    Constant-time admin token check; no token configured means no access.
+    """
+    return bool(expected) and secrets.compare_digest(given.encode("utf-8"), expected.encode("utf-8"))
+
+
+def profile_call(session: "ProfileSession", function, *args, **kwargs):
+    """
+    Run one call under `session`, in the calling thread (where cProfile sees it).
+    """
+    session.claim()
+    session.enter()
+    try:
+        return function(*args, **kwargs)
+    finally:
+        session.exit()
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler: a background thread records the stack of every
+    other busy thread every `interval` seconds.
+
+    Unlike cProfile it sees work in the thread pool as well as on the event
+    loop, and its overhead doesn't depend on how many calls the code makes.
+    Samples are only taken while `active` is set, so time between the
+    profiled requests isn't counted.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.active = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.active.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while True:
+            self.active.wait()
+            if self._stop.is_set():
+                return
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or frame.f_code.co_filename.endswith(_IDLE_MODULES):
+                    continue
+                stack = []
+                while frame is not None and len(stack) < _MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                stack.append((names.get(thread_id, str(thread_id)), "", 0))
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+            # Wakes up as soon as stop() is called, so joining doesn't wait out the interval
+            self._stop.wait(self.interval)
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        frames: List[Dict[str, Any]] = []
+        index: Dict[Tuple[str, str, int], int] = {}
+        samples, weights = [], []
+        for stack, count in self.stacks.items():
+            ids = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                ids.append(index[frame])
+            samples.append(ids)
+            weights.append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "tax-depreciation-api",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+    def collapsed(self) -> str:
+        return "".join(
+            ";".join(frame[0] for frame in stack) + f" {count}\n" for stack, count in self.stacks.items()
+        )
+
+
+class ProfileSession:
+    """
+    A profile over the next `requests` requests to `path` (or one function call).
+
+    cProfile only sees the thread it is enabled in, which for requests is the
+    event loop: async endpoints and the middleware around them. Use the
+    sampler for endpoints declared with plain `def`, which run in the thread
+    pool.
+    """
+
+    def __init__(self, mode: str, path: Optional[str], requests: int, interval: float, method: Optional[str] = None):
+        self.id = str(uuid.uuid4())
+        self.mode = mode
+        self.path = path
+        self.method = method.upper() if method else None
+        self.requests = requests
+        self.interval = interval
+        self.started = 0
+        self.completed = 0
+        self.in_flight = 0
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._cprofile = cProfile.Profile() if mode == CPROFILE else None
+        self._sampler = SamplingProfiler(interval) if mode == SAMPLER else None
+        if self._sampler is not None:
+            self._sampler.start()
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    def matches(self, method: str, path: str) -> bool:
+        return path == self.path and (self.method is None or method == self.method)
+
+    def claim(self) -> bool:
+        """
+        Reserve one of the remaining requests; False once all are taken.
+        """
+        with self._lock:
+            if self.started >= self.requests:
+                return False
+            self.started += 1
+            return True
+
+    def enter(self):
+        with self._lock:
+            self.in_flight += 1
+            if self.in_flight == 1:
+                if self._cprofile is not None:
+                    self._cprofile.enable()
+                else:
+                    self._sampler.active.set()
+
+    def exit(self):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+            if self.in_flight == 0:
+                if self._cprofile is not None:
+                    self._cprofile.disable()
+                else:
+                    self._sampler.active.clear()
+            finished = self.completed >= self.requests
+        if finished:
+            self.finish()
+
+    def finish(self):
+        """
+        Stop profiling; later calls (a request still in flight when the
+        session was cancelled) do nothing.
+        """
+        with self._lock:
+            if self.done:
+                return
+            if self._sampler is not None:
+                self._sampler.stop()
+            if self._cprofile is not None:
+                self._cprofile.create_stats()
+            self.finished_at = time.time()
+
+    def output(self, format: Optional[str] = None) -> Tuple[Any, str]:
+        """
+        The finished profile and its media type.
+        """
+        format = format or FORMATS[self.mode][0]
+        if format not in FORMATS[self.mode]:
+            raise ValueError(f"{self.mode} profiles can be returned as {', '.join(FORMATS[self.mode])}")
+        name = f"{self.method or ''} {self.path or 'call'}".strip()
+        if format == SPEEDSCOPE:
+            return self._sampler.speedscope(name), "application/json"
+        if format == COLLAPSED:
+            return self._sampler.collapsed(), "text/plain"
+        if format == PSTATS:
+            return marshal.dumps(self._cprofile.stats), "application/octet-stream"
+        stream = io.StringIO()
+        pstats.Stats(self._cprofile, stream=stream).sort_stats("cumulative").print_stats(60)
+        return stream.getvalue(), "text/plain"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "mode": self.mode,
+            "method": self.method,
+            "path": self.path,
+            "requests": self.requests,
+            "completed": self.completed,
+            "done": self.done,
+            "samples": self._sampler.samples if self._sampler is not None else None,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ProfilerRegistry:
+    """
+    Profiling sessions of this process. Only one runs at a time (there is one
+    cProfile per thread), finished ones are kept for download.
+    """
+
+    def __init__(self, max_finished: int):
+        self.max_finished = max_finished
+        self.active: Optional[ProfileSession] = None
+        self._sessions: "OrderedDict[str, ProfileSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, session: ProfileSession) -> bool:
+        with self._lock:
+            if self.active is not None and not self.active.done:
+                return False
+            self.active = session
+            self._sessions[session.id] = session
+            # Forget the oldest finished profiles
+            finished = [key for key, value in self._sessions.items() if value.done]
+            for key in finished[:max(0, len(finished) - self.max_finished)]:
+                del self._sessions[key]
+            return True
+
+    def claim(self, method: str, path: str) -> Optional[ProfileSession]:
+        session = self.active
+        if session is not None and not session.done and session.matches(method, path) and session.claim():
+            return session
+        return None
+
+    def get(self, session_id: str) -> Optional[ProfileSession]:
+        return self._sessions.get(session_id)
+
+    def cancel(self) -> Optional[ProfileSession]:
+        with self._lock:
+            session, self.active = self.active, None
+        if session is not None and not session.done:
+            session.finish()
+        return session
+
+    def stats(self) -> Dict[str, Any]:
+        active = self.active
+        return {
+            "active": active.to_dict() if active is not None and not active.done else None,
+            "sessions": [session.to_dict() for session in self._sessions.values()],
+        }
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware feeding matching requests to the active profiling session.
+
+    With `header_mode` (for staging), a request carrying `X-Profile: cprofile`
+    or `X-Profile: sampler` and the admin token is profiled on its own; the
+    response's `X-Profile-Id` names the session to download. Only installed
+    when profiling is enabled, so it costs nothing otherwise.
+    """
+
+    def __init__(self, app, registry: ProfilerRegistry, admin_token: str, header_mode: bool, interval: float):
+        self.app = app
+        self.registry = registry
+        self.admin_token = admin_token
+        self.header_mode = header_mode
+        self.interval = interval
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        session = self.registry.claim(scope["method"], scope["path"])
+        if session is None and self.header_mode:
+            session = self._header_session(scope)
+        if session is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", session.id.encode("ascii"))]
+            await send(message)
+
+        session.enter()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            session.exit()
+
+    def _header_session(self, scope) -> Optional[ProfileSession]:
+        headers = dict(scope["headers"])
+        mode = headers.get(b"x-profile", b"").decode("latin-1").lower()
+        if mode not in MODES or not token_matches(headers.get(b"x-admin-token", b"").decode("latin-1"), self.admin_token):
+            return None
+        session = ProfileSession(mode, scope["path"], 1, self.interval, scope["method"])
+        if not self.registry.start(session):
+            # Another profile is running; serve the request unprofiled
+            session.finish()
+            return None
+        session.claim()
+        return session
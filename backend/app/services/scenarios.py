@@ -0,0 +1,175 @@
+import itertools
+import math
+from typing import List, Tuple
+from app.schemas.calculator import (
+    DepreciationRequest,
+    ScenarioAxes,
+    ScenarioBreakdown,
+    ScenarioSweepRequest,
+    ScenarioSweepResponse,
+)
+from app.services.calculator import (
+    BUILDING_SHARE,
+    CAPITAL_WORKS_RATE,
+    CAPITAL_WORKS_START_DATE,
+    calculate_depreciation_batch,
+    capital_works_deduction,
+    plant_equipment_schedules,
+)
+from app.services.metrics import function_seconds, timed
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, fall back to a loop over the grid
+    np = None
+
+# Grid axes, in the order of the ScenarioAxes fields
+AXES = tuple(ScenarioAxes.__fields__)
+
+# First-year, five-year and total depreciation per cell
+GridValues = Tuple[List[float], List[float], List[float]]
+
+
+def scenario_axes(axes: ScenarioAxes) -> List[Tuple[str, list]]:
+    """
+    The (field, values) pairs that span the grid, skipping omitted fields.
+    """
+    return [(name, getattr(axes, name)) for name in AXES if getattr(axes, name) is not None]
+
+
+def grid_shape(axes: ScenarioAxes) -> List[int]:
+    return [len(values) for _, values in scenario_axes(axes)]
+
+
+def cell_coordinates(cell: int, shape: List[int]) -> List[int]:
+    """
+    Index along each axis of a flat, row-major cell index.
+    """
+    coordinates = []
+    for size in reversed(shape):
+        cell, index = divmod(cell, size)
+        coordinates.append(index)
+    return coordinates[::-1]
+
+
+def scenario_request(base: DepreciationRequest, axes: List[Tuple[str, list]], coordinates: List[int]) -> DepreciationRequest:
+    """
+    The base request with the values of one grid cell filled in.
+    """
+    return base.copy(update={name: values[index] for (name, values), index in zip(axes, coordinates)})
+
+
+@timed(function_seconds, "sweep_scenarios")
+def sweep_scenarios(request: ScenarioSweepRequest) -> ScenarioSweepResponse:
+    """
+    Evaluate every combination of the axes around the base request.
+
+    Only the asset mix, purchase price and construction date change the
+    numbers, so the plant and equipment schedule is calculated once per asset
+    mix and capital works once per (price, construction date); the summary
+    values of every cell are then read from that smaller grid in one
+    vectorised pass. Full results are calculated for the breakdown cells only.
+    """
+    base = request.base
+    axes = scenario_axes(request.axes)
+    shape = [len(values) for _, values in axes]
+    if not axes:
+        raise ValueError("At least one axis is required")
+    for name, values in axes:
+        if not values:
+            raise ValueError(f"Axis {name} has no values")
+    cells = math.prod(shape)
+    for cell in request.breakdown_cells:
+        if not 0 <= cell < cells:
+            raise ValueError(f"Breakdown cell {cell} is outside the grid of {cells} cells")
+
+    values = dict(axes)
+    asset_lists = values.get("assets", [base.assets])
+    prices = values.get("purchase_price", [base.purchase_price])
+    construction_dates = values.get("construction_date", [base.construction_date])
+    schedules = list(plant_equipment_schedules(asset_lists))
+
+    if np is not None:
+        first_year, five_year, total = _sweep_numpy(axes, shape, schedules, prices, construction_dates)
+    else:
+        first_year, five_year, total = _sweep_python(axes, shape, schedules, prices, construction_dates)
+
+    coordinates = [cell_coordinates(cell, shape) for cell in request.breakdown_cells]
+    results = calculate_depreciation_batch([scenario_request(base, axes, cell) for cell in coordinates])
+
+    return ScenarioSweepResponse.construct(
+        axes=[name for name, _ in axes],
+        shape=shape,
+        first_year_depreciation=first_year,
+        five_year_depreciation=five_year,
+        total_depreciation=total,
+        # Breakdown results stay DepreciationSchedules; sweep_payload serializes them
+        breakdowns=[
+            ScenarioBreakdown.construct(cell=cell, coordinates=position, result=result)
+            for cell, position, result in zip(request.breakdown_cells, coordinates, results)
+        ],
+    )
+
+
+def _sweep_numpy(axes, shape, schedules, prices, construction_dates) -> GridValues:
+    # Yearly totals over (asset mix, price, construction date, year), rounded like each result's breakdown
+    dv = np.array([dv_by_year for dv_by_year, _ in schedules], dtype=np.float64)
+    pc = np.array([pc_by_year for _, pc_by_year in schedules], dtype=np.float64)
+    eligible = np.array([date >= CAPITAL_WORKS_START_DATE for date in construction_dates], dtype=bool)
+    # A mask, not a multiply by 0: an infinite price before 1985 must give 0.0 like /calculate, not NaN
+    deductions = np.array(prices, dtype=np.float64) * BUILDING_SHARE * CAPITAL_WORKS_RATE
+    capital_works = np.where(eligible[None, :], deductions[:, None], 0.0)
+    yearly = _round_cents(np.maximum(dv, pc)[:, None, None, :] + capital_works[None, :, :, None])
+
+    # Running sums add the years in order like Python's sum(); ndarray.sum() adds pairwise
+    running = np.add.accumulate(yearly, axis=-1)
+    first_year = yearly[..., 0]
+    five_year = _round_cents(running[..., min(5, running.shape[-1]) - 1])
+    total = _round_cents(running[..., -1])
+
+    # Map every cell of the full grid onto the smaller one
+    names = [name for name, _ in axes]
+    grid_index = np.unravel_index(np.arange(math.prod(shape)), shape)
+
+    def axis_index(name):
+        return grid_index[names.index(name)] if name in names else 0
+
+    index = (axis_index("assets"), axis_index("purchase_price"), axis_index("construction_date"))
+    return first_year[index].tolist(), five_year[index].tolist(), total[index].tolist()
+
+
+def _round_cents(values: "np.ndarray") -> "np.ndarray":
+    """
+    round(value, 2) for every element, matching Python's rounding.
+
+    np.round scales by 100 first, so values within an ulp of half a cent
+    (1691.955) can round the other way; those few are rounded by Python.
+    """
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    # Infinite totals (infinite prices) aren't ties; don't warn about inf - inf
+    with np.errstate(invalid="ignore"):
+        ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if ties.any():
+        rounded[ties] = [round(value, 2) for value in values[ties].tolist()]
+    return rounded
+
+
+def _sweep_python(axes, shape, schedules, prices, construction_dates) -> GridValues:
+    summaries = {}
+    for (a, (dv_by_year, pc_by_year)), (p, price), (c, date) in itertools.product(
+        enumerate(schedules), enumerate(prices), enumerate(construction_dates)
+    ):
+        capital_works = capital_works_deduction(price, date)
+        yearly = [round(max(dv, pc) + capital_works, 2) for dv, pc in zip(dv_by_year, pc_by_year)]
+        summaries[a, p, c] = (yearly[0], round(sum(yearly[:5]), 2), round(sum(yearly), 2))
+
+    names = [name for name, _ in axes]
+    positions = [names.index(name) if name in names else None for name in ("assets", "purchase_price", "construction_date")]
+    first_year, five_year, total = [], [], []
+    for coordinates in itertools.product(*(range(size) for size in shape)):
+        summary = summaries[tuple(coordinates[position] if position is not None else 0 for position in positions)]
+        first_year.append(summary[0])
+        five_year.append(summary[1])
+        total.append(summary[2])
+    return first_year, five_year, total
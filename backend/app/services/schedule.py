@@ -0,0 +1,173 @@
+import json
+from array import array
+from collections import namedtuple
+from typing import Any, Dict, List
+from app.schemas.calculator import DepreciationResponse, DepreciationYearDetail, PropertyType
+
+# One year of a schedule, for code that walks the breakdown row by row (templates, PDF tables)
+ScheduleYear = namedtuple("ScheduleYear", ["year", "diminishing_value", "prime_cost", "capital_works", "total"])
+
+
+class DepreciationSchedule:
+    """
+    A calculation result as the service layer keeps it: the yearly breakdown
+    is one contiguous array per column instead of a Pydantic model per year.
+
+    A 40-year DepreciationResponse is ~250 objects (a model, a __dict__, a
+    fields set and five values per year); a schedule is about a dozen. It has
+    the same attributes as DepreciationResponse, so templates and the PDF code
+    read either. Convert with to_response() only where a model is needed.
+    """
+    __slots__ = (
+        "property_type",
+        "purchase_price",
+        "total_depreciable_amount",
+        "years",
+        "diminishing_value",
+        "prime_cost",
+        "capital_works",
+        "total",
+        "first_year_depreciation",
+        "five_year_depreciation",
+    )
+
+    def __init__(
+        self,
+        property_type: PropertyType,
+        purchase_price: float,
+        total_depreciable_amount: float,
+        years: array,
+        diminishing_value: array,
+        prime_cost: array,
+        capital_works: array,
+        total: array,
+        first_year_depreciation: float,
+        five_year_depreciation: float,
+    ):
+        self.property_type = property_type
+        self.purchase_price = purchase_price
+        self.total_depreciable_amount = total_depreciable_amount
+        self.years = years
+        self.diminishing_value = diminishing_value
+        self.prime_cost = prime_cost
+        self.capital_works = capital_works
+        self.total = total
+        self.first_year_depreciation = first_year_depreciation
+        self.five_year_depreciation = five_year_depreciation
+
+    def __reduce__(self):
+        # Columns as raw bytes: pickling array objects is ~10x slower to load,
+        # which adds up when process pool workers send back thousands of results
+        return _unpickle_schedule, (
+            self.property_type,
+            self.purchase_price,
+            self.total_depreciable_amount,
+            self.years.tobytes(),
+            self.diminishing_value.tobytes(),
+            self.prime_cost.tobytes(),
+            self.capital_works.tobytes(),
+            self.total.tobytes(),
+            self.first_year_depreciation,
+            self.five_year_depreciation,
+        )
+
+    @property
+    def yearly_breakdown(self) -> List[ScheduleYear]:
+        return list(map(ScheduleYear, self.years, self.diminishing_value, self.prime_cost, self.capital_works, self.total))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        JSON content in the DepreciationResponse layout.
+        """
+        return {
+            "property_type": self.property_type.value,
+            "purchase_price": self.purchase_price,
+            "total_depreciable_amount": self.total_depreciable_amount,
+            "yearly_breakdown": [
+                {"year": year, "diminishing_value": dv, "prime_cost": pc, "capital_works": cw, "total": total}
+                for year, dv, pc, cw, total in zip(
+                    self.years.tolist(),
+                    self.diminishing_value.tolist(),
+                    self.prime_cost.tolist(),
+                    self.capital_works.tolist(),
+                    self.total.tolist(),
+                )
+            ],
+            "first_year_depreciation": self.first_year_depreciation,
+            "five_year_depreciation": self.five_year_depreciation,
+        }
+
+    def to_json(self) -> str:
+        # Same text as DepreciationResponse.json(), so content-addressed keys don't change
+        return json.dumps(self.to_dict())
+
+    def to_response(self) -> DepreciationResponse:
+        return DepreciationResponse.construct(
+            property_type=self.property_type,
+            purchase_price=self.purchase_price,
+            total_depreciable_amount=self.total_depreciable_amount,
+            yearly_breakdown=[DepreciationYearDetail.construct(**year._asdict()) for year in self.yearly_breakdown],
+            first_year_depreciation=self.first_year_depreciation,
+            five_year_depreciation=self.five_year_depreciation,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DepreciationSchedule":
+        """
+        Read JSON content in the DepreciationResponse layout, e.g. written by
+        to_dict(). It is not validated again.
+        """
+        rows = data["yearly_breakdown"]
+        return cls(
+            PropertyType(data["property_type"]),
+            float(data["purchase_price"]),
+            float(data["total_depreciable_amount"]),
+            array("i", [row["year"] for row in rows]),
+            array("d", [row["diminishing_value"] for row in rows]),
+            array("d", [row["prime_cost"] for row in rows]),
+            array("d", [row["capital_works"] for row in rows]),
+            array("d", [row["total"] for row in rows]),
+            float(data["first_year_depreciation"]),
+            float(data["five_year_depreciation"]),
+        )
+
+    @classmethod
+    def from_json(cls, text: str) -> "DepreciationSchedule":
+        return cls.from_dict(json.loads(text))
+
+    @classmethod
+    def from_response(cls, response: DepreciationResponse) -> "DepreciationSchedule":
+        """
+        A schedule for a report that arrived as a model (e.g. in an email request).
+        """
+        rows = response.yearly_breakdown
+        return cls(
+            response.property_type,
+            response.purchase_price,
+            response.total_depreciable_amount,
+            array("i", [row.year for row in rows]),
+            array("d", [row.diminishing_value for row in rows]),
+            array("d", [row.prime_cost for row in rows]),
+            array("d", [row.capital_works for row in rows]),
+            array("d", [row.total for row in rows]),
+            response.first_year_depreciation,
+            response.five_year_depreciation,
+        )
+
+
+def _unpickle_schedule(
+    property_type, purchase_price, total_depreciable_amount, years, diminishing_value, prime_cost, capital_works,
+    total, first_year_depreciation, five_year_depreciation
+) -> DepreciationSchedule:
+    return DepreciationSchedule(
+        property_type,
+        purchase_price,
+        total_depreciable_amount,
+        array("i", years),
+        array("d", diminishing_value),
+        array("d", prime_cost),
+        array("d", capital_works),
+        array("d", total),
+        first_year_depreciation,
+        five_year_depreciation,
+    )
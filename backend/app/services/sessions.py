@@ -0,0 +1,318 @@
+import math
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from app.schemas.calculator import (
+    AssetCategory,
+    AssetItem,
+    AssetOperation,
+    AssetOperationType,
+    DepreciationRequest,
+)
+from app.services.calculator import (
+    YEARS_TO_CALCULATE,
+    build_schedule,
+    capital_works_deduction,
+    plant_equipment_schedules,
+    unit_curves,
+)
+from app.services.schedule import DepreciationSchedule
+from app.config import (
+    CALC_SESSION_MAX_SESSIONS,
+    CALC_SESSION_TTL_SECONDS,
+    CALC_SESSION_MAX_ASSETS,
+)
+
+
+class SessionLimitError(Exception):
+    """Raised when an edit would take a session past its maximum number of assets"""
+
+
+def _contributes(asset: AssetItem) -> bool:
+    # Only plant and equipment with an effective life adds to the yearly totals
+    return asset.category == AssetCategory.PLANT_EQUIPMENT and bool(asset.effective_life)
+
+
+def _add_exact(partials: List[float], value: float):
+    """
+    Add a value to an exact sum kept as non-overlapping partials (the
+    algorithm behind math.fsum), so adding and subtracting never drifts.
+    """
+    count = 0
+    for partial in partials:
+        if abs(value) < abs(partial):
+            value, partial = partial, value
+        high = value + partial
+        low = partial - (high - value)
+        if low:
+            partials[count] = low
+            count += 1
+        value = high
+    partials[count:] = [value]
+
+
+def _same_rounding(low: float, high: float) -> bool:
+    """
+    Whether every value from low to high has the same round(value, 2): no
+    half cent lies in between (with some slack for the scaling to cents), and
+    values rounding to zero cents are on one side of it so -0.0 and 0.0 can't mix.
+    """
+    low, high = low * 100, high * 100
+    slack = 2.0 ** -48 * (abs(low) + abs(high) + 1)
+    cents = math.floor(low - slack + 0.5)
+    return cents == math.floor(high + slack + 0.5) and (cents != 0 or (low < 0) == (high < 0))
+
+
+class CalculationSession:
+    """
+    A calculation kept on the server so that single-asset edits are cheap.
+
+    The session holds the assets by ID, in request order, and the exact total
+    value and absolute value per effective life. An edit updates those in
+    O(1), and result() works out the yearly totals from them in
+    O(lives x years) instead of going through every asset.
+
+    /calculate adds the assets' deductions up one by one, so its unrounded
+    totals carry rounding error that per-life totals can't reproduce bit for
+    bit. Results only hold cents, though: result() bounds that error for each
+    value and uses the per-life totals when every value in the bound rounds to
+    the same cents. Otherwise (a value within ~1e-8 of half a cent) it
+    recalculates the assets like /calculate. Either way the result is the
+    same as /calculate on the session's assets.
+    """
+
+    def __init__(self, request: DepreciationRequest, max_assets: int):
+        if len(request.assets) > max_assets:
+            raise SessionLimitError(f"Sessions hold at most {max_assets} assets")
+        self.id = str(uuid.uuid4())
+        self.max_assets = max_assets
+        # Everything but the assets, which are kept by ID
+        self.request = request.copy(update={"assets": []})
+        self.assets: Dict[int, AssetItem] = {}
+        self.next_asset_id = 1
+        self.expires_at = 0.0
+        self.recalculations = 0
+        self._lock = threading.Lock()
+        # effective life -> [value partials, absolute value partials, number of assets]
+        self._lives: Dict[int, list] = {}
+        self._result: Optional[DepreciationSchedule] = None
+        for asset in request.assets:
+            self.assets[self.next_asset_id] = asset
+            self.next_asset_id += 1
+            self._add_contribution(asset, 1.0)
+
+    def apply(self, operations: List[AssetOperation]) -> List[int]:
+        """
+        Apply add/remove/modify operations in order, returning the IDs of the
+        added assets. Operations are checked first, so a bad one changes nothing.
+        """
+        with self._lock:
+            removed = set()
+            added = 0
+            for position, operation in enumerate(operations):
+                if operation.op != AssetOperationType.REMOVE and operation.asset is None:
+                    raise ValueError(f"Operation {position} ({operation.op.value}) needs an asset")
+                if operation.op == AssetOperationType.ADD:
+                    added += 1
+                    continue
+                if operation.asset_id not in self.assets or operation.asset_id in removed:
+                    raise ValueError(f"Operation {position}: asset {operation.asset_id} is not in the session")
+                if operation.op == AssetOperationType.REMOVE:
+                    removed.add(operation.asset_id)
+            if len(self.assets) - len(removed) + added > self.max_assets:
+                raise SessionLimitError(f"Sessions hold at most {self.max_assets} assets")
+
+            added_ids = []
+            for operation in operations:
+                if operation.op == AssetOperationType.ADD:
+                    self.assets[self.next_asset_id] = operation.asset
+                    self._add_contribution(operation.asset, 1.0)
+                    added_ids.append(self.next_asset_id)
+                    self.next_asset_id += 1
+                elif operation.op == AssetOperationType.REMOVE:
+                    self._add_contribution(self.assets.pop(operation.asset_id), -1.0)
+                else:
+                    self._add_contribution(self.assets[operation.asset_id], -1.0)
+                    self.assets[operation.asset_id] = operation.asset
+                    self._add_contribution(operation.asset, 1.0)
+            self._result = None
+            return added_ids
+
+    def result(self) -> DepreciationSchedule:
+        with self._lock:
+            if self._result is None:
+                totals = self._totals_from_lives()
+                if totals is None:
+                    # Same engine and summation order as /calculate
+                    totals = next(iter(plant_equipment_schedules([list(self.assets.values())])))
+                    self.recalculations += 1
+                self._result = build_schedule(self.request, *totals)
+            return self._result
+
+    def memory_bytes(self) -> int:
+        """
+        Approximate memory held by the session's assets and per-life totals.
+        """
+        with self._lock:
+            assets = list(self.assets.values())
+            total = sys.getsizeof(self.assets) + sys.getsizeof(self._lives)
+            for values, absolute_values, _ in self._lives.values():
+                total += sys.getsizeof(values) + sys.getsizeof(absolute_values) + 24 * (len(values) + len(absolute_values))
+        for asset in assets:
+            total += sys.getsizeof(asset) + sys.getsizeof(asset.__dict__) + sys.getsizeof(asset.name)
+        return total
+
+    def _add_contribution(self, asset: AssetItem, sign: float):
+        if not _contributes(asset):
+            return
+        totals = self._lives.setdefault(asset.effective_life, [[], [], 0])
+        _add_exact(totals[0], sign * asset.value)
+        _add_exact(totals[1], sign * abs(asset.value))
+        totals[2] += 1 if sign > 0 else -1
+        if totals[2] == 0:
+            del self._lives[asset.effective_life]
+
+    def _totals_from_lives(self) -> Optional[Tuple[List[float], List[float]]]:
+        """
+        Yearly diminishing value and prime cost totals from the per-life
+        totals, or None if they might not round like /calculate's.
+        """
+        dv_by_year = [0.0] * YEARS_TO_CALCULATE
+        dv_bound = [0.0] * YEARS_TO_CALCULATE
+        prime_cost = 0.0
+        pc_bound = 0.0
+        assets = 0
+        for effective_life, (values, absolute_values, count) in self._lives.items():
+            value = math.fsum(values)
+            absolute_value = math.fsum(absolute_values)
+            shares = unit_curves.remaining_shares(effective_life)
+            dv_rate = unit_curves.dv_rate(effective_life)
+            for index in range(YEARS_TO_CALCULATE):
+                dv_by_year[index] += value * shares[index] * dv_rate
+                dv_bound[index] += absolute_value * abs(shares[index] * dv_rate)
+            pc_rate = unit_curves.pc_rate(effective_life)
+            prime_cost += value * pc_rate
+            pc_bound += absolute_value * abs(pc_rate)
+            assets += count
+
+        # Rounding error of an n-term sum of products, plus that of this
+        # estimate, is under (n + lives + 4) units in the last place of the
+        # sum of absolute terms; use twice that
+        scale = (assets + len(self._lives) + 10) * 2.0 ** -52
+        pc_error = scale * pc_bound + 2.0 ** -50 * abs(prime_cost)
+        pc_low, pc_high = prime_cost - pc_error, prime_cost + pc_error
+        if not (math.isfinite(pc_error) and _same_rounding(pc_low, pc_high)):
+            return None
+        capital_works = capital_works_deduction(self.request.purchase_price, self.request.construction_date)
+        for dv, bound in zip(dv_by_year, dv_bound):
+            error = scale * bound + 2.0 ** -50 * abs(dv)
+            dv_low, dv_high = dv - error, dv + error
+            if not (
+                math.isfinite(error)
+                and _same_rounding(dv_low, dv_high)
+                and _same_rounding(max(dv_low, pc_low) + capital_works, max(dv_high, pc_high) + capital_works)
+            ):
+                return None
+        return dv_by_year, [prime_cost] * YEARS_TO_CALCULATE
+
+
+class CalculationSessionStore:
+    """
+    Calculation sessions of this process, bounded in number and expiring
+    after `ttl_seconds` without being used.
+
+    Least recently used sessions are evicted first once `max_sessions` is
+    reached. Sessions live in the worker's memory, so with several server
+    workers a client's requests must reach the worker that created its
+    session (sticky routing on the session ID) or get a 404 and start over.
+    """
+
+    def __init__(self, max_sessions: int, ttl_seconds: float, max_assets: int):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_assets = max_assets
+        self._sessions: "OrderedDict[str, CalculationSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.edits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def create(self, request: DepreciationRequest) -> CalculationSession:
+        session = CalculationSession(request, self.max_assets)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session.expires_at = now + self.ttl_seconds
+            self._sessions[session.id] = session
+            self.created += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        return session
+
+    def get(self, session_id: str) -> Optional[CalculationSession]:
+        """
+        The live session with this ID, extending its expiry; None if unknown or expired.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.expires_at = now + self.ttl_seconds
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def edit(self, session: CalculationSession, operations: List[AssetOperation]) -> List[int]:
+        added = session.apply(operations)
+        with self._lock:
+            self.edits += len(operations)
+        return added
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def expires_in(self, session: CalculationSession) -> float:
+        return max(0.0, round(session.expires_at - time.monotonic(), 1))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire(time.monotonic())
+            sessions = list(self._sessions.values())
+            stats = {
+                "sessions": len(sessions),
+                "max_sessions": self.max_sessions,
+                "max_assets_per_session": self.max_assets,
+                "ttl_seconds": self.ttl_seconds,
+                "created": self.created,
+                "edits": self.edits,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+        stats["assets"] = sum(len(session.assets) for session in sessions)
+        stats["recalculations"] = sum(session.recalculations for session in sessions)
+        stats["memory_bytes"] = sum(session.memory_bytes() for session in sessions)
+        return stats
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _expire(self, now: float):
+        # Sessions are kept in order of last use, so expired ones are at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.expires_at > now:
+                break
+            del self._sessions[session_id]
+            self.expirations += 1
+
+
+# Shared calculation sessions of this process
+calculation_sessions = CalculationSessionStore(
+    CALC_SESSION_MAX_SESSIONS, CALC_SESSION_TTL_SECONDS, CALC_SESSION_MAX_ASSETS
+)
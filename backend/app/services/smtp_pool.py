@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import time
+from email.message import Message
+from typing import Any, Dict, List, Optional, Union
+from aiosmtplib import SMTP, SMTPDataError, SMTPException, SMTPServerDisconnected, SMTPStatus
+from app.services.metrics import smtp_phase_seconds
+from app.services.mime_stream import StreamingReportMessage
+
+
+class _PooledConnection:
+    """An authenticated SMTP connection plus the bookkeeping the pool needs"""
+
+    def __init__(self, smtp: SMTP):
+        self.smtp = smtp
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """
+    Small pool of persistent, TLS-established and logged-in SMTP connections.
+
+    Up to `max_connections` messages are sent concurrently, each over its own
+    connection. Idle connections are reused for later messages, refreshed
+    after `max_messages_per_connection` messages or `idle_timeout` seconds, and
+    replaced transparently (one retry) if the server has dropped them.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        start_tls: bool = True,
+        max_connections: int = 4,
+        timeout: float = 30,
+        max_messages_per_connection: int = 100,
+        idle_timeout: float = 60,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.start_tls = start_tls
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_messages_per_connection = max_messages_per_connection
+        self.idle_timeout = idle_timeout
+        self._idle: List[_PooledConnection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.connections_opened = 0
+        self.reconnects = 0
+        self.messages_sent = 0
+        self.send_failures = 0
+        self.in_flight = 0
+
+    async def send_message(self, message: Union[Message, StreamingReportMessage]):
+        """
+        Send a message over a pooled connection, reconnecting once on failure.
+        """
+        slots = self._get_slots()
+        async with slots:
+            self.in_flight += 1
+            connection = None
+            try:
+                connection = await self._checkout()
+                try:
+                    await self._deliver(connection, message)
+                except (SMTPServerDisconnected, ConnectionError, asyncio.TimeoutError) as e:
+                    # The server dropped an idle connection; retry once on a fresh one
+                    logging.warning(f"SMTP connection lost ({str(e)}), reconnecting")
+                    self.reconnects += 1
+                    self._discard(connection)
+                    connection = None
+                    connection = await self._connect()
+                    await self._deliver(connection, message)
+            except Exception:
+                self.send_failures += 1
+                # The transaction may be half done, don't hand the connection out again
+                if connection is not None:
+                    self._discard(connection)
+                raise
+            finally:
+                self.in_flight -= 1
+
+        connection.messages_sent += 1
+        connection.last_used = time.monotonic()
+        self.messages_sent += 1
+        if connection.messages_sent >= self.max_messages_per_connection:
+            await self._quit(connection)
+        else:
+            self._idle.append(connection)
+
+    async def close(self):
+        """
+        Politely close every idle connection.
+        """
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await self._quit(connection)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "host": f"{self.hostname}:{self.port}",
+            "max_connections": self.max_connections,
+            "idle_connections": len(self._idle),
+            "in_flight": self.in_flight,
+            "connections_opened": self.connections_opened,
+            "reconnects": self.reconnects,
+            "messages_sent": self.messages_sent,
+            "send_failures": self.send_failures,
+        }
+
+    async def _deliver(self, connection: _PooledConnection, message: Union[Message, StreamingReportMessage]):
+        with smtp_phase_seconds.time("send"):
+            if isinstance(message, StreamingReportMessage):
+                await self._send_streaming(connection.smtp, message)
+            else:
+                await connection.smtp.send_message(message)
+
+    async def _send_streaming(self, smtp: SMTP, message: StreamingReportMessage):
+        """
+        Send a message by writing it onto the DATA stream piece by piece.
+        """
+        await smtp.mail(message.sender)
+        for recipient in message.recipients:
+            await smtp.rcpt(recipient)
+
+        protocol = smtp.protocol
+        if protocol is None or protocol._command_lock is None:
+            raise SMTPServerDisconnected("Connection lost")
+        # aiosmtplib's data() only accepts the whole message as one bytes object
+        # (and copies it twice more), so run DATA ourselves under its command lock.
+        # The streamed message is all CRLF base64 lines, so needs no dot-stuffing.
+        async with protocol._command_lock:
+            protocol.write(b"DATA\r\n")
+            response = await protocol.read_response(timeout=self.timeout)
+            if response.code != SMTPStatus.start_input:
+                raise SMTPDataError(response.code, response.message)
+            for chunk in message.iter_bytes():
+                protocol.write(chunk)
+                # Wait for the socket buffer to drain so chunks don't pile up in memory
+                await protocol._drain_helper()
+            protocol.write(b".\r\n")
+            response = await protocol.read_response(timeout=self.timeout)
+            if response.code != SMTPStatus.completed:
+                raise SMTPDataError(response.code, response.message)
+
+    async def _checkout(self) -> _PooledConnection:
+        now = time.monotonic()
+        while self._idle:
+            # Most recently used first, the least likely to have been dropped
+            connection = self._idle.pop()
+            if connection.smtp.is_connected and now - connection.last_used < self.idle_timeout:
+                return connection
+            await self._quit(connection)
+        return await self._connect()
+
+    async def _connect(self) -> _PooledConnection:
+        logging.info(f"Opening pooled SMTP connection to {self.hostname}:{self.port}")
+        smtp = SMTP(hostname=self.hostname, port=self.port, start_tls=False, timeout=self.timeout)
+        # STARTTLS and login run as separate steps so each phase is timed
+        try:
+            with smtp_phase_seconds.time("connect"):
+                await smtp.connect()
+            if self.start_tls:
+                with smtp_phase_seconds.time("tls"):
+                    await smtp.starttls()
+            if self.username and self.password:
+                with smtp_phase_seconds.time("login"):
+                    await smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self.connections_opened += 1
+        return _PooledConnection(smtp)
+
+    async def _quit(self, connection: _PooledConnection):
+        try:
+            if connection.smtp.is_connected:
+                await connection.smtp.quit()
+        except (SMTPException, ConnectionError, asyncio.TimeoutError):
+            self._discard(connection)
+
+    def _discard(self, connection: _PooledConnection):
+        connection.smtp.close()
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # Created lazily so the semaphore belongs to the running event loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_connections)
+        return self._slots
@@ -0,0 +1,17 @@
+from typing import Dict, Iterable
+
+
+def summarize_latencies(samples: Iterable[float]) -> Dict[str, float]:
+    """
+    Count, mean, p50, p95 and max of latency samples, in seconds.
+    """
+    values = sorted(samples)
+    if not values:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 4),
+        "p50": round(values[len(values) // 2], 4),
+        "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 4),
+        "max": round(values[-1], 4),
+    }
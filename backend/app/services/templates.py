@@ -0,0 +1,356 @@
+import hashlib
+import logging
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+from jinja2 import Environment, FileSystemLoader, ModuleLoader, Template
+from app.config import TEMPLATES_DEV_MODE, TEMPLATES_PRECOMPILED_DIR
+
+# Load templates from the templates directory
+template_dir = Path(__file__).parent.parent / "templates"
+assets_dir = template_dir / "assets"
+
+EMAIL_TEMPLATE = "email_template.html"
+PDF_TEMPLATE = "pdf_report_template.html"
+
+
+class TemplateRegistry:
+    """
+    Email and PDF templates, loaded and compiled once.
+
+    `load()` creates any missing default template, compiles both templates
+    (optionally to Python modules with Jinja's compile_templates, so other
+    processes can import them without parsing) and resolves the logo path.
+    Renders then reuse the compiled templates and a context that is only
+    rebuilt when the date changes. In dev mode templates are re-checked on
+    every render so edits show up without a restart.
+    """
+
+    def __init__(self, directory: Path, dev_mode: bool = False, precompiled_dir: Optional[str] = None):
+        self.directory = directory
+        self.dev_mode = dev_mode
+        self.precompiled_dir = precompiled_dir
+        self._environment: Optional[Environment] = None
+        self._templates: Dict[str, Template] = {}
+        self._versions: Dict[str, str] = {}
+        self._logo_path = ""
+        self._context_date: Optional[date] = None
+        self._date_context: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.renders = 0
+
+    def load(self):
+        """
+        Compile the templates and resolve asset paths (idempotent unless reloaded).
+        """
+        with self._lock:
+            if not self.directory.exists():
+                self.directory.mkdir(exist_ok=True)
+            if not (self.directory / EMAIL_TEMPLATE).exists():
+                logging.info("Email template not found, creating default template")
+                create_default_email_template()
+            if not (self.directory / PDF_TEMPLATE).exists():
+                logging.info("PDF template not found, creating default template")
+                create_default_pdf_template()
+
+            environment = Environment(loader=FileSystemLoader(str(self.directory)), auto_reload=self.dev_mode)
+            if self.precompiled_dir and not self.dev_mode:
+                # Compile to Python modules once, then load from those modules
+                environment.compile_templates(
+                    self.precompiled_dir,
+                    zip=None,
+                    filter_func=lambda name: name in (EMAIL_TEMPLATE, PDF_TEMPLATE),
+                )
+                environment = Environment(loader=ModuleLoader(self.precompiled_dir), auto_reload=False)
+                logging.info(f"Templates precompiled to {self.precompiled_dir}")
+
+            self._templates = {name: environment.get_template(name) for name in (EMAIL_TEMPLATE, PDF_TEMPLATE)}
+            self._versions = {name: self._source_hash(name) for name in (EMAIL_TEMPLATE, PDF_TEMPLATE)}
+            self._environment = environment
+            self._logo_path = resolve_logo_path()
+            logging.info(f"Templates loaded from {self.directory} (dev mode: {self.dev_mode})")
+
+    def get(self, name: str) -> Template:
+        if self._environment is None:
+            self.load()
+        if self.dev_mode:
+            # auto_reload makes Jinja recompile the template if the file changed
+            return self._environment.get_template(name)
+        return self._templates[name]
+
+    def version(self, name: str) -> str:
+        """
+        Hash of the template source, so caches of rendered output change with it.
+        """
+        if self._environment is None:
+            self.load()
+        if self.dev_mode:
+            return self._source_hash(name)
+        return self._versions[name]
+
+    def context(self) -> Dict[str, Any]:
+        """
+        Values shared by every render; the date parts are rebuilt once per day.
+        """
+        if self._environment is None:
+            self.load()
+        today = date.today()
+        if today != self._context_date:
+            now = datetime.now()
+            self._date_context = {
+                "current_year": now.year,
+                "formatted_date": now.strftime("%d %B %Y"),
+                "duo_group_logo_path": self._logo_path,
+            }
+            self._context_date = today
+        return self._date_context
+
+    def render(self, template_name: str, **context) -> str:
+        template = self.get(template_name)
+        self.renders += 1
+        return template.render(**self.context(), **context)
+
+    def _source_hash(self, name: str) -> str:
+        return hashlib.sha256((self.directory / name).read_bytes()).hexdigest()[:16]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": str(self.directory),
+            "dev_mode": self.dev_mode,
+            "precompiled_dir": self.precompiled_dir,
+            "loaded": sorted(self._templates),
+            "versions": dict(self._versions),
+            "logo_path": self._logo_path,
+            "renders": self.renders,
+        }
+
+
+def resolve_logo_path() -> str:
+    """
+    Absolute path of the logo used in the PDF, or "" if no logo file exists.
+    """
+    duo_group_logo_path = assets_dir / "duo-group-logo.svg"
+    if not duo_group_logo_path.exists():
+        logging.warning(f"Duo Group logo file not found at {duo_group_logo_path}")
+        # Fallback to original logo if new logo not found
+        duo_group_logo_path = assets_dir / "duo-tax-logo.svg"
+        if not duo_group_logo_path.exists():
+            logging.warning(f"Duo Tax logo file not found at {duo_group_logo_path}")
+            return ""
+    return str(duo_group_logo_path)
+
+
+def create_default_email_template():
+    """
+    Create a default email template if none exists
+    """
+    default_email_template = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="utf-8">
+        <title>Your Tax Depreciation Report</title>
+        <style>
+            body { font-family: 'Inter', Arial, sans-serif; line-height: 1.6; color: #333; margin: 0; padding: 0; }
+            .container { max-width: 600px; margin: 0 auto; padding: 0; }
+            .header { background-color: #e87722; color: white; padding: 30px 20px; text-align: center; }
+            .content { padding: 30px 20px; }
+            .footer { text-align: center; margin-top: 20px; font-size: 12px; color: #666; background-color: #f5f7fa; padding: 20px; }
+            .highlight { color: #e87722; font-weight: bold; }
+            h1, h2, h3 { color: #1a6cc3; margin-top: 0; }
+            .summary-box { background-color: #f5f7fa; padding: 20px; border-radius: 5px; margin: 20px 0; border-left: 4px solid #e87722; }
+            .summary-item { margin-bottom: 15px; }
+            .btn { display: inline-block; background-color: #e87722; color: white; padding: 12px 25px; text-decoration: none; border-radius: 4px; font-weight: bold; margin-top: 15px; }
+            .btn:hover { background-color: #d16616; }
+            a { color: #1a6cc3; text-decoration: underline; }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1 style="color: white;">Your Tax Depreciation Report</h1>
+            </div>
+            <div class="content">
+                <p>Hello {{ name }},</p>
+                
+                <p>Thank you for using <span class="highlight">Duo Tax's Depreciation Calculator</span>. Attached is your complete tax depreciation schedule for your investment property.</p>
+                
+                <div class="summary-box">
+                    <h3>Report Summary:</h3>
+                    <div class="summary-item">
+                        <strong>Property Type:</strong> 
+                        {% if report.property_type == "residential" %}
+                            Residential Property
+                        {% elif report.property_type == "commercial" %}
+                            Commercial Property
+                        {% elif report.property_type == "industrial" %}
+                            Industrial Property
+                        {% else %}
+                            {{ report.property_type }}
+                        {% endif %}
+                    </div>
+                    <div class="summary-item">
+                        <strong>First Year Deduction:</strong> <span class="highlight">${{ "{:,.2f}".format(report.first_year_depreciation) }}</span>
+                    </div>
+                    <div class="summary-item">
+                        <strong>First 5 Years:</strong> <span class="highlight">${{ "{:,.2f}".format(report.five_year_depreciation) }}</span>
+                    </div>
+                    <div class="summary-item">
+                        <strong>Total Depreciable Amount:</strong> <span class="highlight">${{ "{:,.2f}".format(report.total_depreciable_amount) }}</span>
+                    </div>
+                </div>
+                
+                <p>For a comprehensive tax depreciation schedule prepared by our quantity surveyors, please contact us at <a href="mailto:info@duotax.com.au">info@duotax.com.au</a>.</p>
+                
+                <a href="https://duotax.com.au" class="btn">Visit Our Website</a>
+                
+                <p>Best regards,<br>The Duo Tax Team</p>
+            </div>
+            <div class="footer">
+                <p>&copy; {{ current_year }} Duo Tax Depreciation. All rights reserved.</p>
+                <p>This email was sent on {{ formatted_date }}</p>
+                <p>
+                    <a href="https://duotax.com.au/privacy">Privacy Policy</a> | 
+                    <a href="https://duotax.com.au/terms">Terms of Service</a>
+                </p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+    
+    template_path = template_dir / "email_template.html"
+    with open(template_path, "w") as f:
+        f.write(default_email_template)
+
+
+def create_default_pdf_template():
+    """
+    Create a default PDF template if none exists
+    """
+    default_pdf_template = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="utf-8">
+        <title>Tax Depreciation Report</title>
+        <style>
+            @page { size: A4; margin: 2cm; }
+            body { font-family: 'Inter', Arial, sans-serif; line-height: 1.6; color: #333; margin: 0; padding: 0; }
+            .container { max-width: 100%; margin: 0 auto; }
+            .header { text-align: center; margin-bottom: 30px; border-bottom: 1px solid #e5e7eb; padding-bottom: 20px; }
+            .logo { max-width: 180px; height: auto; display: block; margin: 0 auto 15px; }
+            h1 { color: #1a6cc3; margin-top: 10px; margin-bottom: 5px; }
+            h2 { color: #1a6cc3; border-bottom: 2px solid #e87722; padding-bottom: 8px; margin-top: 40px; margin-bottom: 20px; }
+            h3 { color: #1a6cc3; }
+            p.subtitle { color: #666; font-size: 14px; margin-top: 0; }
+            table { width: 100%; border-collapse: collapse; margin: 20px 0; }
+            table, th, td { border: 1px solid #e5e7eb; }
+            th, td { padding: 12px; text-align: left; }
+            th { background-color: #f3f4f6; color: #1a6cc3; font-weight: bold; }
+            tr:nth-child(even) { background-color: #f9fafb; }
+            .footer { text-align: center; margin-top: 50px; font-size: 12px; color: #666; border-top: 1px solid #e5e7eb; padding-top: 20px; }
+            .summary-box { background-color: #f5f7fa; padding: 20px; border-radius: 5px; margin: 20px 0; border-left: 4px solid #e87722; }
+            .highlight { color: #e87722; font-weight: bold; }
+            .chart-placeholder { height: 300px; background-color: #f9f9f9; display: flex; justify-content: center; align-items: center; border: 1px dashed #ccc; }
+            .company-info { margin-top: 15px; font-size: 13px; color: #666; }
+            .company-info p { margin: 3px 0; }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <img src="file://{duo_group_logo_path}" alt="Duo Tax Logo" class="logo" />
+                <h1>Tax Depreciation Report</h1>
+                <p class="subtitle">Generated on {{ formatted_date }}</p>
+            </div>
+            
+            <h2>Property Information</h2>
+            <table>
+                <tr>
+                    <th>Property Type</th>
+                    <td>{{ report.property_type }}</td>
+                </tr>
+                <tr>
+                    <th>Purchase Price</th>
+                    <td><span class="highlight">${{ "{:,.2f}".format(report.purchase_price) }}</span></td>
+                </tr>
+                <tr>
+                    <th>Construction Date</th>
+                    <td>{{ report.construction_date if hasattr(report, 'construction_date') else 'Not Specified' }}</td>
+                </tr>
+                <tr>
+                    <th>Purchase Date</th>
+                    <td>{{ report.purchase_date if hasattr(report, 'purchase_date') else 'Not Specified' }}</td>
+                </tr>
+            </table>
+            
+            <h2>Depreciation Summary</h2>
+            <div class="summary-box">
+                <table>
+                    <tr>
+                        <th>First Year Deduction</th>
+                        <td><span class="highlight">${{ "{:,.2f}".format(report.first_year_depreciation) }}</span></td>
+                    </tr>
+                    <tr>
+                        <th>First 5 Years</th>
+                        <td><span class="highlight">${{ "{:,.2f}".format(report.five_year_depreciation) }}</span></td>
+                    </tr>
+                    <tr>
+                        <th>Total Depreciable Amount</th>
+                        <td><span class="highlight">${{ "{:,.2f}".format(report.total_depreciable_amount) }}</span></td>
+                    </tr>
+                </table>
+            </div>
+            
+            <h2>Yearly Depreciation Schedule</h2>
+            <table>
+                <tr>
+                    <th>Year</th>
+                    <th>Diminishing Value ($)</th>
+                    <th>Prime Cost ($)</th>
+                    <th>Capital Works ($)</th>
+                    <th>Total ($)</th>
+                </tr>
+                {% for year in report.yearly_breakdown %}
+                <tr>
+                    <td>{{ year.year }}</td>
+                    <td>${{ "{:,.2f}".format(year.diminishing_value) }}</td>
+                    <td>${{ "{:,.2f}".format(year.prime_cost) }}</td>
+                    <td>${{ "{:,.2f}".format(year.capital_works) }}</td>
+                    <td><span class="highlight">${{ "{:,.2f}".format(year.total) }}</span></td>
+                </tr>
+                {% endfor %}
+            </table>
+            
+            <div class="footer">
+                <p>This report was generated using Duo Tax's Depreciation Calculator.</p>
+                <p>For a comprehensive tax depreciation schedule prepared by our quantity surveyors, please contact us at info@duotax.com.au</p>
+                <div class="company-info">
+                    <p>Duo Tax Depreciation | ABN: 12 345 678 901</p>
+                    <p>Suite 123, 456 Business Street, Sydney NSW 2000</p>
+                    <p>Phone: (02) 1234 5678 | Email: info@duotax.com.au</p>
+                </div>
+                <p>&copy; {{ current_year }} Duo Tax Depreciation. All rights reserved.</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+    
+    # Include the absolute path to the logo for PDF generation
+    duo_group_logo_path = assets_dir / "duo-group-logo.svg"
+    default_pdf_template = default_pdf_template.format(duo_group_logo_path=duo_group_logo_path)
+    
+    template_path = template_dir / "pdf_report_template.html"
+    with open(template_path, "w") as f:
+        f.write(default_pdf_template)
+
+
+# Shared template registry, loaded at startup
+templates = TemplateRegistry(
+    template_dir,
+    dev_mode=TEMPLATES_DEV_MODE,
+    precompiled_dir=TEMPLATES_PRECOMPILED_DIR or None
+)
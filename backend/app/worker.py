@@ -0,0 +1,158 @@
+import asyncio
+import json
+import logging
+import signal
+from app.services.schedule import DepreciationSchedule
+from app.services.job_queue import Job, email_job_queue
+from app.services.campaign import campaign_store, run_campaign
+from app.services.email_service import send_email_with_report, pdf_render_pool, smtp_pool
+from app.config import JOB_WORKER_CONCURRENCY, JOB_WORKER_POLL_SECONDS
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler()
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def send_report_job(payload: dict):
+    """Deliver one report email queued by /email/send-report"""
+    await send_email_with_report(
+        to_email=payload["to"],
+        name=payload.get("name", ""),
+        # Validated by /email/send-report before it was queued
+        report=DepreciationSchedule.from_dict(payload["report"]),
+        include_attachment=payload.get("include_attachment", True)
+    )
+
+
+async def send_campaign_job(payload: dict):
+    """Send the pending recipients of a campaign created by /email/campaigns"""
+    await run_campaign(payload["campaign_id"])
+
+
+def campaign_job_dead(payload: dict):
+    """Mark the campaign failed so its status doesn't stay running"""
+    campaign_store.fail(payload["campaign_id"])
+
+
+# Job kind -> coroutine that runs it
+JOB_HANDLERS = {
+    "send_report": send_report_job,
+    "send_campaign": send_campaign_job,
+}
+
+# Job kind -> blocking call that cleans up after the job is dead-lettered
+JOB_DEAD_LETTER_HANDLERS = {
+    "send_campaign": campaign_job_dead,
+}
+
+
+async def in_executor(function, *args):
+    """Run a blocking queue call (SQLite may wait on the other process's lock) off the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+
+async def dead_letter(job: Job):
+    """Run the dead-letter handler of a job that won't be retried"""
+    handler = JOB_DEAD_LETTER_HANDLERS.get(job.kind)
+    if handler is None:
+        return
+    try:
+        await in_executor(handler, json.loads(job.payload))
+    except Exception as e:
+        logger.error(f"Dead-letter handler of job {job.id} ({job.kind}) failed: {str(e)}")
+
+
+async def requeue_stale():
+    """Requeue or dead-letter jobs whose worker stopped, returning how many were requeued"""
+    requeued, dead = await in_executor(email_job_queue.requeue_stale)
+    for job in dead:
+        await dead_letter(job)
+    return requeued
+
+
+async def sweep_stale():
+    """Every half lease, recover jobs of stopped workers, however busy this worker is"""
+    while True:
+        await asyncio.sleep(email_job_queue.lease_seconds / 2)
+        try:
+            requeued = await requeue_stale()
+        except Exception as e:
+            logger.error(f"Failed to requeue stale jobs: {str(e)}")
+            continue
+        if requeued:
+            logger.info(f"Requeued {requeued} jobs whose worker stopped")
+
+
+async def keep_lease(job: Job):
+    """Renew the job's lease while it runs, e.g. a campaign that takes hours"""
+    while True:
+        await asyncio.sleep(email_job_queue.lease_seconds / 3)
+        await in_executor(email_job_queue.heartbeat, job.id)
+
+
+async def process_job(job: Job):
+    """Run a claimed job and record success, or a failure for retry"""
+    handler = JOB_HANDLERS.get(job.kind)
+    lease = asyncio.ensure_future(keep_lease(job))
+    try:
+        if handler is None:
+            raise ValueError(f"Unknown job kind: {job.kind}")
+        await handler(json.loads(job.payload))
+        if await in_executor(email_job_queue.complete, job.id, job.attempts):
+            logger.info(f"Job {job.id} ({job.kind}) succeeded on attempt {job.attempts}")
+    except Exception as e:
+        if await in_executor(email_job_queue.fail, job.id, job.attempts, str(e)):
+            await dead_letter(job)
+    finally:
+        lease.cancel()
+
+
+async def run_worker(concurrency: int = JOB_WORKER_CONCURRENCY, poll_seconds: float = JOB_WORKER_POLL_SECONDS):
+    """
+    Claim and run jobs until SIGINT/SIGTERM, then let running jobs finish.
+    """
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stopping.set)
+
+    requeued = await requeue_stale()
+    if requeued:
+        logger.info(f"Requeued {requeued} jobs left running by a previous worker")
+    logger.info(f"Worker started with concurrency {concurrency}")
+    sweeper = asyncio.ensure_future(sweep_stale())
+
+    running = set()
+    while not stopping.is_set():
+        while len(running) < concurrency:
+            job = await in_executor(email_job_queue.claim)
+            if job is None:
+                break
+            running.add(asyncio.ensure_future(process_job(job)))
+
+        if running:
+            done, running = await asyncio.wait(running, timeout=poll_seconds, return_when=asyncio.FIRST_COMPLETED)
+        else:
+            try:
+                await asyncio.wait_for(stopping.wait(), timeout=poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    sweeper.cancel()
+    logger.info(f"Stopping, waiting for {len(running)} running jobs")
+    if running:
+        await asyncio.wait(running)
+    await smtp_pool.close()
+    pdf_render_pool.shutdown(wait=True)
+    logger.info("Worker stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
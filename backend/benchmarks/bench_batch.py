@@ -0,0 +1,61 @@
+import logging
+import sys
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.routers import calculator
+from app.services import calculator as calculator_service
+from benchmarks.bench_calculator import make_request
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Measure the calculation paths, not the result cache
+calculator_service.result_cache = None
+
+
+def make_client() -> TestClient:
+    """Build a client for an app that only mounts the calculator router"""
+    app = FastAPI()
+    app.include_router(calculator.router, prefix="/api/v1")
+    return TestClient(app)
+
+
+def make_payloads(count: int, asset_count: int = 20) -> list:
+    """Build `count` distinct JSON payloads for the calculator"""
+    return [json_payload(make_request(asset_count, seed=i)) for i in range(count)]
+
+
+def json_payload(request) -> dict:
+    """Convert a DepreciationRequest into the dict a client would post"""
+    payload = request.dict()
+    payload["construction_date"] = payload["construction_date"].isoformat()
+    payload["purchase_date"] = payload["purchase_date"].isoformat()
+    return payload
+
+
+def run_benchmark(count: int = 10000):
+    """Compare /calculate in a loop against a single /calculate/batch call"""
+    client = make_client()
+    payloads = make_payloads(count)
+
+    start = time.perf_counter()
+    for payload in payloads:
+        response = client.post("/api/v1/calculate", json=payload)
+        assert response.status_code == 200
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    response = client.post("/api/v1/calculate/batch", json=payloads)
+    batch_time = time.perf_counter() - start
+    assert response.status_code == 200
+    assert response.json()["succeeded"] == count
+
+    logging.info(f"/calculate loop:  {count} properties in {loop_time:6.2f} s ({count / loop_time:8.0f} properties/s)")
+    logging.info(f"/calculate/batch: {count} properties in {batch_time:6.2f} s ({count / batch_time:8.0f} properties/s)")
+    logging.info(f"Batch speedup: {loop_time / batch_time:.1f}x")
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
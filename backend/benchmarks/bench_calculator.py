@@ -0,0 +1,78 @@
+import logging
+import random
+import time
+from datetime import date
+from app.schemas.calculator import DepreciationRequest, AssetItem
+from app.services import calculator
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+
+# Measure the engines, not the result cache
+calculator.result_cache = None
+
+# Typical effective lives from a quantity surveyor schedule (carpets, hot water, blinds, ...)
+EFFECTIVE_LIVES = [5, 7, 8, 10, 12, 15, 20]
+
+
+def make_request(asset_count: int, seed: int = 0) -> DepreciationRequest:
+    """Build a residential request with `asset_count` plant and equipment assets"""
+    rng = random.Random(seed)
+    return DepreciationRequest(
+        property_type="residential",
+        construction_date=date(2010, 1, 1),
+        purchase_date=date(2023, 1, 1),
+        purchase_price=650000,
+        is_new_property=False,
+        assets=[
+            AssetItem(
+                name=f"Asset {i}",
+                category="plant_equipment",
+                value=round(rng.uniform(200, 20000), 2),
+                effective_life=rng.choice(EFFECTIVE_LIVES)
+            ) for i in range(asset_count)
+        ]
+    )
+
+
+def time_engine(engine: str, request: DepreciationRequest, repeat: int) -> float:
+    """Return the mean seconds per calculate_depreciation call for an engine"""
+    calculator.CALCULATOR_ENGINE = engine
+    start = time.perf_counter()
+    for _ in range(repeat):
+        calculator.calculate_depreciation(request)
+    return (time.perf_counter() - start) / repeat
+
+
+def assert_same_schedule(actual, expected):
+    """Engines must match the reference loop exactly"""
+    assert actual.to_json() == expected.to_json()
+
+
+def run_benchmark():
+    """Compare the reference loop, pure-Python and NumPy engines across asset counts"""
+    original_engine = calculator.CALCULATOR_ENGINE
+    try:
+        for asset_count in (10, 100, 500, 1000):
+            request = make_request(asset_count)
+            repeat = max(5, 2000 // asset_count)
+
+            # Every engine must produce the same schedule as the reference loop
+            calculator.CALCULATOR_ENGINE = "reference"
+            expected = calculator.calculate_depreciation(request)
+            for engine in ("python", "numpy"):
+                calculator.CALCULATOR_ENGINE = engine
+                assert_same_schedule(calculator.calculate_depreciation(request), expected)
+
+            reference_time = time_engine("reference", request, repeat)
+            python_time = time_engine("python", request, repeat)
+            numpy_time = time_engine("numpy", request, repeat)
+            logging.info(
+                f"{asset_count:>5} assets: reference {reference_time * 1000:8.2f} ms, "
+                f"python {python_time * 1000:8.2f} ms, numpy {numpy_time * 1000:8.2f} ms"
+            )
+    finally:
+        calculator.CALCULATOR_ENGINE = original_engine
+
+if __name__ == "__main__":
+    run_benchmark()
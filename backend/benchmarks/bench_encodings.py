@@ -0,0 +1,59 @@
+import logging
+import time
+import msgpack
+import orjson
+import pyarrow
+import pyarrow.ipc
+import pyarrow.parquet
+from app.responses import ARROW, COLUMNS, JSON, MSGPACK, PARQUET, ROWS, encode_batch
+from app.services import calculator
+from app.services.calculator import calculate_depreciation_batch
+from benchmarks.bench_calculator import make_request
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+
+# Decoders as a client would use them
+DECODERS = {
+    JSON: orjson.loads,
+    MSGPACK: msgpack.unpackb,
+    ARROW: lambda body: pyarrow.ipc.open_stream(body).read_all(),
+    PARQUET: lambda body: pyarrow.parquet.read_table(pyarrow.BufferReader(body)),
+}
+
+
+def best_of(function, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(counts=(1, 1000, 10000)):
+    """Size and encode/decode time of a batch response in every encoding"""
+    calculator.result_cache = None
+    for count in counts:
+        outcomes = [(result, None) for result in calculate_depreciation_batch(
+            [make_request(20, seed=i) for i in range(count)]
+        )]
+        for label, media_type, breakdown in (
+            ("JSON rows", JSON, ROWS),
+            ("JSON columns", JSON, COLUMNS),
+            ("MessagePack rows", MSGPACK, ROWS),
+            ("MessagePack columns", MSGPACK, COLUMNS),
+            ("Arrow IPC", ARROW, ROWS),
+            ("Parquet", PARQUET, ROWS),
+        ):
+            body = encode_batch(outcomes, media_type, breakdown).body
+            encode = best_of(lambda: encode_batch(outcomes, media_type, breakdown))
+            decode = best_of(lambda: DECODERS[media_type](body))
+            logging.info(
+                f"{count:>6} results, {label:<20} {len(body) / 1024:9.1f} KiB, "
+                f"encode {encode * 1000:8.2f} ms, decode {decode * 1000:8.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    run_benchmark()
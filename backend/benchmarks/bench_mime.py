@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from app.services.mime_stream import StreamingReportMessage
+from app.services.smtp_pool import SMTPConnectionPool
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+
+SINK_HOST = "127.0.0.1"
+SINK_PORT = 8027
+HTML = "<p>Hello, your tax depreciation report is attached.</p>\n" * 200
+
+
+def make_mime_message(pdf: bytes) -> MIMEMultipart:
+    """The previous behaviour: MIMEMultipart with a MIMEApplication attachment"""
+    message = MIMEMultipart()
+    message["From"] = "Duo Tax Depreciation <reports@example.com>"
+    message["To"] = "client@example.com"
+    message["Subject"] = "Your Tax Depreciation Report from Duo Tax"
+    message.attach(MIMEText(HTML, "html"))
+    attachment = MIMEApplication(pdf, _subtype="pdf")
+    attachment.add_header("Content-Disposition", "attachment; filename=report.pdf")
+    message.attach(attachment)
+    return message
+
+
+def make_streaming_message(pdf: bytes) -> StreamingReportMessage:
+    message = StreamingReportMessage(
+        from_addr="Duo Tax Depreciation <reports@example.com>",
+        to="client@example.com",
+        subject="Your Tax Depreciation Report from Duo Tax",
+        html=HTML,
+    )
+    message.attach(pdf, filename="report.pdf")
+    return message
+
+
+async def measure(pool: SMTPConnectionPool, build, pdf: bytes, concurrency: int):
+    """Peak traced memory and wall time to build and send `concurrency` messages at once"""
+    # Open the connections first so their buffers aren't counted
+    await asyncio.gather(*(pool.send_message(make_streaming_message(b"")) for _ in range(concurrency)))
+    tracemalloc.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(pool.send_message(build(pdf)) for _ in range(concurrency)))
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, seconds
+
+
+async def run_benchmark():
+    """Compare peak memory of MIMEMultipart and streaming assembly for several PDF sizes"""
+    # The sink runs in its own process so its buffers don't show up in tracemalloc
+    sink = subprocess.Popen([
+        sys.executable, "-m", "aiosmtpd", "-n", "-c", "aiosmtpd.handlers.Sink", "-l", f"{SINK_HOST}:{SINK_PORT}"
+    ])
+    try:
+        await asyncio.sleep(1)
+        for size_mb, concurrency in ((1, 1), (5, 1), (5, 4)):
+            pdf = os.urandom(size_mb * 1024 * 1024)
+            for label, build in (("MIMEMultipart", make_mime_message), ("streaming", make_streaming_message)):
+                pool = SMTPConnectionPool(SINK_HOST, SINK_PORT, start_tls=False, max_connections=concurrency)
+                peak, seconds = await measure(pool, build, pdf, concurrency)
+                await pool.close()
+                logging.info(
+                    f"{size_mb} MB PDF x{concurrency} {label:<14} peak {peak / 1024 / 1024:7.2f} MiB "
+                    f"({peak / len(pdf) / concurrency:4.2f} PDF copies per message), {seconds * 1000:7.1f} ms"
+                )
+    finally:
+        sink.terminate()
+        sink.wait()
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark())
@@ -0,0 +1,66 @@
+import argparse
+import logging
+import os
+import time
+
+# Spawned workers read the configuration again; measure calculation, not their result caches
+os.environ["RESULT_CACHE_ENABLED"] = "false"
+
+from app.services import calculator  # noqa: E402
+from app.services.calculator import calculate_items  # noqa: E402
+from app.services.parallel import CalculationPool  # noqa: E402
+from benchmarks.bench_batch import make_payloads  # noqa: E402
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+
+calculator.result_cache = None
+
+
+def best_of(function, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(max_workers: int, count: int = 10000, chunk_size: int = 500):
+    """Scaling of a large batch from 1 to max_workers processes, and where the pool starts to pay off"""
+    items = make_payloads(count)
+    serial = best_of(lambda: calculate_items(items))
+    logging.info(f"{os.cpu_count()} cores, {count} items, chunks of {chunk_size}")
+    logging.info(f"serial      {serial * 1000:8.1f} ms  {count / serial:8.0f} items/s")
+
+    for workers in range(1, max_workers + 1):
+        pool = CalculationPool(workers, chunk_size, serial_threshold=0)
+        pool.start()
+        pool.calculate_items(items[:workers * 10])  # wait for every worker to be up
+        seconds = best_of(lambda: pool.calculate_items(items))
+        pool.shutdown()
+        logging.info(
+            f"{workers:2d} workers  {seconds * 1000:8.1f} ms  {count / seconds:8.0f} items/s  "
+            f"speedup {serial / seconds:5.2f}x  efficiency {serial / seconds / workers:4.0%}"
+        )
+
+    # Small batches: fixed IPC and scheduling costs against the work saved
+    pool = CalculationPool(max_workers, chunk_size, serial_threshold=0)
+    pool.start()
+    pool.calculate_items(items[:max_workers * 10])
+    for size in (10, 25, 50, 100, 200, 500, 1000):
+        serial = best_of(lambda: calculate_items(items[:size]), repeat=5)
+        parallel = best_of(lambda: pool.calculate_items(items[:size]), repeat=5)
+        logging.info(
+            f"{size:5d} items: serial {serial * 1000:7.2f} ms, {max_workers} workers {parallel * 1000:7.2f} ms"
+        )
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch calculation scaling across worker processes")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
+    run_benchmark(args.max_workers, args.count, args.chunk_size)
@@ -0,0 +1,70 @@
+import logging
+import time
+import tracemalloc
+from weasyprint import HTML
+from app.services import calculator
+from app.services.pdf_direct import render_report_pdf_direct
+from app.services.pdf_renderer import get_render_context
+from app.services.templates import templates, PDF_TEMPLATE
+from benchmarks.bench_calculator import make_request
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logging.getLogger("weasyprint").setLevel(logging.ERROR)
+
+
+def render_per_call(html_content: str) -> bytes:
+    """The previous behaviour: parse the inline CSS and fetch the logo from disk every time"""
+    return HTML(string=html_content).write_pdf()
+
+
+def measure(render, html_content: str, repeat: int):
+    """Return mean seconds per render and the peak traced allocation of one render"""
+    render(html_content)  # warm up imports and caches
+    start = time.perf_counter()
+    for _ in range(repeat):
+        render(html_content)
+    seconds = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    render(html_content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def run_benchmark(repeat: int = 10):
+    """Compare per-call WeasyPrint rendering, the shared render context and the direct backend"""
+    templates.load()
+    context = get_render_context()
+    report = calculator.calculate_depreciation(make_request(20))
+    html_content = templates.render(PDF_TEMPLATE, report=report)
+
+    per_call_seconds, per_call_peak = measure(render_per_call, html_content, repeat)
+    shared_seconds, shared_peak = measure(context.render, html_content, repeat)
+    logging.info(
+        f"per-call: {per_call_seconds * 1000:8.1f} ms/PDF, peak {per_call_peak / 1024:8.0f} KiB"
+    )
+    logging.info(
+        f"shared:   {shared_seconds * 1000:8.1f} ms/PDF, peak {shared_peak / 1024:8.0f} KiB "
+        f"({(1 - shared_seconds / per_call_seconds) * 100:.0f}% faster)"
+    )
+
+    context_values = templates.context()
+    direct_seconds, direct_peak = measure(
+        lambda _: render_report_pdf_direct(
+            report,
+            context_values["formatted_date"],
+            context_values["current_year"],
+            context_values["duo_group_logo_path"],
+        ),
+        html_content,
+        repeat * 10,
+    )
+    logging.info(
+        f"direct:   {direct_seconds * 1000:8.1f} ms/PDF, peak {direct_peak / 1024:8.0f} KiB "
+        f"({per_call_seconds / direct_seconds:.0f}x faster than per-call WeasyPrint)"
+    )
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,72 @@
+import gc
+import logging
+import time
+import tracemalloc
+from app.schemas.calculator import DepreciationResponse, DepreciationYearDetail
+from app.services import calculator
+from app.services.calculator import YEARS_TO_CALCULATE, build_schedule, capital_works_deduction, plant_equipment_schedules
+from benchmarks.bench_calculator import make_request
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+
+
+def build_models(request, dv_by_year, pc_by_year) -> DepreciationResponse:
+    """The previous result type: one DepreciationYearDetail model per year"""
+    capital_works = capital_works_deduction(request.purchase_price, request.construction_date)
+    yearly_breakdown = []
+    for year in range(1, YEARS_TO_CALCULATE + 1):
+        diminishing_value = float(dv_by_year[year - 1])
+        prime_cost = float(pc_by_year[year - 1])
+        yearly_breakdown.append(DepreciationYearDetail.construct(
+            year=year,
+            diminishing_value=round(diminishing_value, 2),
+            prime_cost=round(prime_cost, 2),
+            capital_works=round(capital_works, 2),
+            total=round(max(diminishing_value, prime_cost) + capital_works, 2)
+        ))
+    return DepreciationResponse.construct(
+        property_type=request.property_type,
+        purchase_price=request.purchase_price,
+        total_depreciable_amount=round(request.purchase_price * calculator.DEPRECIABLE_SHARE, 2),
+        yearly_breakdown=yearly_breakdown,
+        first_year_depreciation=round(yearly_breakdown[0].total, 2),
+        five_year_depreciation=round(sum(detail.total for detail in yearly_breakdown[:5]), 2)
+    )
+
+
+def measure(build, requests):
+    """Build results for every request; returns (seconds, blocks and bytes kept per result, peak bytes)"""
+    schedules = list(plant_equipment_schedules([request.assets for request in requests]))
+    start = time.perf_counter()
+    results = [build(request, dv, pc) for request, (dv, pc) in zip(requests, schedules)]
+    seconds = time.perf_counter() - start
+
+    # Again under tracemalloc, which slows allocation down too much to time
+    del results
+    gc.collect()
+    tracemalloc.start()
+    results = [build(request, dv, pc) for request, (dv, pc) in zip(requests, schedules)]
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    statistics = snapshot.statistics("filename")
+    blocks = sum(stat.count for stat in statistics)
+    size = sum(stat.size for stat in statistics)
+    del results
+    return seconds, blocks / len(requests), size / len(requests), peak
+
+
+def run_benchmark(count: int = 10000):
+    """Memory kept and allocated per result: Pydantic models per year against the array-backed schedule"""
+    requests = [make_request(20, seed=i) for i in range(count)]
+    for label, build in (("models per year (before)", build_models), ("DepreciationSchedule", build_schedule)):
+        seconds, blocks, size, peak = measure(build, requests)
+        logging.info(
+            f"{label:<26} {count} results: {seconds * 1000:7.1f} ms, {blocks:6.1f} blocks and "
+            f"{size / 1024:5.2f} KiB per result, peak {peak / 1024 / 1024:6.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import logging
+import time
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.responses import COLUMNS, ROWS, batch_payload, dumps
+from app.schemas.calculator import (
+    BatchDepreciationResponse,
+    BatchItemResult,
+    DepreciationResponse,
+    DepreciationYearDetail,
+)
+from app.services import calculator
+from app.services.schedule import DepreciationSchedule
+from benchmarks.bench_batch import make_client, make_payloads
+from benchmarks.bench_calculator import make_request
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Measure serialization, not the result cache
+calculator.result_cache = None
+
+BATCH_FIELD = create_response_field(name="Response", type_=BatchDepreciationResponse)
+
+
+def validated_copy(result: DepreciationSchedule) -> DepreciationResponse:
+    """The previous behaviour: every year detail and the result built with validation"""
+    return DepreciationResponse(
+        property_type=result.property_type,
+        purchase_price=result.purchase_price,
+        total_depreciable_amount=result.total_depreciable_amount,
+        yearly_breakdown=[DepreciationYearDetail(**year._asdict()) for year in result.yearly_breakdown],
+        first_year_depreciation=result.first_year_depreciation,
+        five_year_depreciation=result.five_year_depreciation,
+    )
+
+
+async def serialize_previous(results: list) -> bytes:
+    """
+    The previous /calculate/batch path: a validated BatchDepreciationResponse,
+    re-validated through response_model, jsonable_encoder and json.dumps.
+    """
+    response = BatchDepreciationResponse(
+        results=[BatchItemResult(index=index, result=validated_copy(result)) for index, result in enumerate(results)],
+        succeeded=len(results),
+        failed=0,
+    )
+    content = await serialize_response(field=BATCH_FIELD, response_content=response)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def serialize_fast(results: list, breakdown: str) -> bytes:
+    return dumps(batch_payload([(result, None) for result in results], breakdown))
+
+
+def mean_seconds(call, repeat: int) -> float:
+    call()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - start) / repeat
+
+
+def run_benchmark():
+    """Compare the previous response path with the orjson fast path, per batch size"""
+    for count in (1, 100, 1000):
+        requests = [make_request(20, seed=i) for i in range(count)]
+        results = calculator.calculate_depreciation_batch(requests)
+        repeat = max(3, 2000 // count)
+
+        calculate = mean_seconds(lambda: calculator.calculate_depreciation_batch(requests), repeat)
+        previous = mean_seconds(lambda: asyncio.run(serialize_previous(results)), repeat)
+        rows = mean_seconds(lambda: serialize_fast(results, ROWS), repeat)
+        columns = mean_seconds(lambda: serialize_fast(results, COLUMNS), repeat)
+        assert json.loads(asyncio.run(serialize_previous(results))) == json.loads(serialize_fast(results, ROWS))
+        logging.info(
+            f"{count:>5} results: calculate {calculate * 1000:8.2f} ms | serialize previous {previous * 1000:8.2f} ms, "
+            f"orjson rows {rows * 1000:7.2f} ms ({previous / rows:4.1f}x), "
+            f"columns {columns * 1000:7.2f} ms ({previous / columns:4.1f}x, "
+            f"{len(serialize_fast(results, COLUMNS)) / len(serialize_fast(results, ROWS)):.0%} of the bytes)"
+        )
+
+    # End to end through the app
+    client = make_client()
+    payloads = make_payloads(1000)
+    for breakdown in (ROWS, COLUMNS):
+        seconds = mean_seconds(
+            lambda: client.post(f"/api/v1/calculate/batch?breakdown={breakdown}", json=payloads).raise_for_status(), 3
+        )
+        logging.info(f"POST /calculate/batch, 1000 properties, {breakdown}: {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    run_benchmark()
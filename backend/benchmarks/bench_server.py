@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+import httpx
+from app.services.stats import summarize_latencies
+from benchmarks.bench_batch import make_payloads
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+HOST = "127.0.0.1"
+PORT = 8050
+
+
+def start_server(workers: int) -> subprocess.Popen:
+    """Run the production launcher with the result cache off, so every request calculates"""
+    env = dict(os.environ, RESULT_CACHE_ENABLED="false", PDF_RENDER_WORKERS="0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--workers", str(workers), "--host", HOST, "--port", str(PORT)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://{HOST}:{PORT}/", timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("Server did not start")
+
+
+async def _client(payloads: list, concurrency: int, duration: float) -> list:
+    latencies = []
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://{HOST}:{PORT}", limits=limits, timeout=30) as client:
+        async def user(offset: int):
+            index = offset
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.post("/api/v1/calculate", json=payloads[index % len(payloads)])
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+                index += concurrency
+        await asyncio.gather(*(user(offset) for offset in range(concurrency)))
+    return latencies
+
+
+def _client_process(args) -> list:
+    payloads, concurrency, duration = args
+    return asyncio.run(_client(payloads, concurrency, duration))
+
+
+def load_test(workers: int, concurrency: int, duration: float, client_processes: int) -> dict:
+    """Requests/sec and latency on /api/v1/calculate for one worker count"""
+    payloads = make_payloads(200)
+    server = start_server(workers)
+    try:
+        # Several client processes, so the load generator isn't the bottleneck
+        with multiprocessing.get_context("spawn").Pool(client_processes) as pool:
+            per_process = max(1, concurrency // client_processes)
+            results = pool.map(_client_process, [(payloads, per_process, duration)] * client_processes)
+    finally:
+        # SIGTERM exercises the graceful shutdown path
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+    latencies = [latency for result in results for latency in result]
+    return {
+        "workers": workers,
+        "requests_per_second": round(len(latencies) / duration, 1),
+        "latency_seconds": summarize_latencies(latencies),
+    }
+
+
+def run_benchmark(duration: float = 10, concurrency: int = 64, client_processes: int = 2):
+    """Show how /calculate throughput scales with the number of server workers"""
+    cpu_count = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, cpu_count})
+    results = []
+    for workers in worker_counts:
+        result = load_test(workers, concurrency, duration, client_processes)
+        results.append(result)
+        latency = result["latency_seconds"]
+        logging.info(
+            f"{workers:>3} workers: {result['requests_per_second']:8.1f} req/s, "
+            f"p50 {latency['p50'] * 1000:6.1f} ms, p95 {latency['p95'] * 1000:6.1f} ms"
+        )
+    logging.info(f"({cpu_count} CPUs; load generator uses {client_processes} of them)")
+    return results
+
+if __name__ == "__main__":
+    run_benchmark()
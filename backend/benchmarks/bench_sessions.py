@@ -0,0 +1,96 @@
+import logging
+import random
+import time
+from app.schemas.calculator import AssetOperation, AssetOperationType
+from app.services import calculator
+from app.services.sessions import CalculationSessionStore
+from benchmarks.bench_calculator import make_request
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+
+# Compare against real recalculations, not result cache hits
+calculator.result_cache = None
+
+
+def random_operation(rng: random.Random, session, replacements) -> AssetOperation:
+    """One random add, remove or modify, with assets drawn from `replacements`"""
+    op = rng.choice([AssetOperationType.ADD, AssetOperationType.REMOVE, AssetOperationType.MODIFY])
+    if op == AssetOperationType.ADD or not session.assets:
+        return AssetOperation(op=AssetOperationType.ADD, asset=rng.choice(replacements))
+    asset_id = rng.choice(list(session.assets))
+    if op == AssetOperationType.REMOVE:
+        return AssetOperation(op=op, asset_id=asset_id)
+    return AssetOperation(op=op, asset_id=asset_id, asset=rng.choice(replacements))
+
+
+def check_exact(sessions: int = 30, edits: int = 330, asset_count: int = 300) -> int:
+    """Results after every random single-asset edit must equal calculate_depreciation on the same assets"""
+    rng = random.Random(0)
+    store = CalculationSessionStore(max_sessions=sessions, ttl_seconds=600, max_assets=asset_count * 2)
+    checked = 0
+    for seed in range(sessions):
+        request = make_request(asset_count, seed=seed)
+        replacements = make_request(50, seed=1000 + seed).assets
+        session = store.create(request)
+        for _ in range(edits):
+            store.edit(session, [random_operation(rng, session, replacements)])
+            expected = calculator.calculate_depreciation(request.copy(update={"assets": list(session.assets.values())}))
+            assert session.result().to_json() == expected.to_json(), f"session {seed} differs after {session.assets}"
+            checked += 1
+    logging.info(f"{store.stats()['recalculations']} results needed a full recalculation")
+    return checked
+
+
+def time_edits(op: AssetOperationType, asset_count: int, edits: int) -> float:
+    """Mean seconds for one edit of the given kind plus the result after it"""
+    request = make_request(asset_count)
+    replacements = make_request(edits, seed=1).assets
+    store = CalculationSessionStore(max_sessions=10, ttl_seconds=60, max_assets=asset_count + edits)
+    session = store.create(request)
+    asset_ids = list(session.assets)
+    operations = [
+        AssetOperation(op=op, asset=asset)
+        if op == AssetOperationType.ADD
+        else AssetOperation(op=op, asset_id=asset_ids[index % asset_count], asset=asset)
+        for index, asset in enumerate(replacements)
+    ]
+    session.result()
+    start = time.perf_counter()
+    for operation in operations:
+        store.edit(session, [operation])
+        session.result()
+    return (time.perf_counter() - start) / edits
+
+
+def run_benchmark(asset_count: int = 300, edits: int = 2000):
+    """Session edits against recalculating the whole request, after checking results are exact"""
+    logging.info(f"{check_exact()} random edits checked, every result equals calculate_depreciation")
+
+    request = make_request(asset_count)
+    start = time.perf_counter()
+    for _ in range(200):
+        calculator.calculate_depreciation(request)
+    full_seconds = (time.perf_counter() - start) / 200
+    start = time.perf_counter()
+    for _ in range(200):
+        list(calculator.plant_equipment_schedules([request.assets]))
+    engine_seconds = (time.perf_counter() - start) / 200
+
+    session = CalculationSessionStore(max_sessions=1, ttl_seconds=60, max_assets=asset_count).create(request)
+    start = time.perf_counter()
+    for _ in range(200):
+        session._totals_from_lives()
+    totals_seconds = (time.perf_counter() - start) / 200
+
+    logging.info(f"{asset_count} assets")
+    logging.info(f"yearly totals, engine over every asset: {engine_seconds * 1000:7.3f} ms")
+    logging.info(f"yearly totals, session per-life totals: {totals_seconds * 1000:7.3f} ms")
+    for op in (AssetOperationType.ADD, AssetOperationType.MODIFY):
+        seconds = time_edits(op, asset_count, edits)
+        logging.info(f"session {op.value:<6} + result:          {seconds * 1000:7.3f} ms ({full_seconds / seconds:.1f}x)")
+    logging.info(f"full calculate_depreciation:            {full_seconds * 1000:7.3f} ms")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import smtplib
+import sys
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from app.services.smtp_pool import SMTPConnectionPool
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logging.getLogger("mail.log").setLevel(logging.WARNING)
+
+SINK_HOST = "127.0.0.1"
+SINK_PORT = 8025
+
+
+def make_message(index: int) -> MIMEMultipart:
+    """A small HTML email, similar in shape to the report email"""
+    message = MIMEMultipart()
+    message["From"] = "Duo Tax Depreciation <reports@example.com>"
+    message["To"] = f"client{index}@example.com"
+    message["Subject"] = "Your Tax Depreciation Report from Duo Tax"
+    message.attach(MIMEText("<p>Hello, your report is attached.</p>\n" * 50, "html"))
+    return message
+
+
+def send_with_fresh_connections(messages: list):
+    """The previous behaviour: connect, send and quit for every message"""
+    for message in messages:
+        smtp = smtplib.SMTP(SINK_HOST, SINK_PORT)
+        smtp.send_message(message)
+        smtp.quit()
+
+
+async def send_with_pool(messages: list, pool_size: int):
+    """Send every message concurrently through the connection pool"""
+    pool = SMTPConnectionPool(SINK_HOST, SINK_PORT, start_tls=False, max_connections=pool_size)
+    await asyncio.gather(*(pool.send_message(message) for message in messages))
+    await pool.close()
+    return pool.stats()
+
+
+def run_benchmark(count: int = 500):
+    """Compare messages per second against a local aiosmtpd sink"""
+    try:
+        from aiosmtpd.controller import Controller
+        from aiosmtpd.handlers import Sink
+    except ImportError:
+        logging.error("aiosmtpd is required for this benchmark: pip install aiosmtpd")
+        return
+
+    controller = Controller(Sink(), hostname=SINK_HOST, port=SINK_PORT)
+    controller.start()
+    try:
+        messages = [make_message(i) for i in range(count)]
+
+        start = time.perf_counter()
+        send_with_fresh_connections(messages)
+        elapsed = time.perf_counter() - start
+        logging.info(f"connection per message: {count / elapsed:8.0f} messages/s")
+
+        for pool_size in (1, 4, 8):
+            start = time.perf_counter()
+            stats = asyncio.run(send_with_pool(messages, pool_size))
+            elapsed = time.perf_counter() - start
+            logging.info(
+                f"pool of {pool_size}:             {count / elapsed:8.0f} messages/s "
+                f"({stats['connections_opened']} connections opened)"
+            )
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,81 @@
+import asyncio
+import json
+import logging
+import sys
+import time
+import tracemalloc
+from benchmarks.bench_batch import make_client, make_payloads
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+
+# Size of each body chunk handed to the app, similar to what uvicorn delivers
+CHUNK_SIZE = 64 * 1024
+
+
+async def stream_through_app(app, line: bytes, count: int) -> int:
+    """
+    Drive the ASGI app directly with a chunked NDJSON upload of `count` lines.
+
+    The test client buffers whole request and response bodies, which would hide
+    the memory behaviour being measured, so this feeds receive() chunk by chunk
+    and only counts the output lines sent back.
+    """
+    lines_per_chunk = max(1, CHUNK_SIZE // len(line))
+    remaining = count
+    received = 0
+
+    async def receive():
+        nonlocal remaining
+        batch = min(lines_per_chunk, remaining)
+        remaining -= batch
+        return {"type": "http.request", "body": line * batch, "more_body": remaining > 0}
+
+    async def send(message):
+        nonlocal received
+        if message["type"] == "http.response.body":
+            received += message.get("body", b"").count(b"\n")
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/api/v1/calculate/stream",
+        "raw_path": b"/api/v1/calculate/stream",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/x-ndjson")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    await app(scope, receive, send)
+    return received
+
+
+def run_benchmark(counts=(1000, 5000, 20000)):
+    """Stream increasingly large NDJSON uploads and report throughput and peak memory"""
+    app = make_client().app
+    line = json.dumps(make_payloads(1)[0]).encode("utf-8") + b"\n"
+
+    for count in counts:
+        # Time without tracing first, tracemalloc slows allocation-heavy code a lot
+        start = time.perf_counter()
+        received = asyncio.run(stream_through_app(app, line, count))
+        elapsed = time.perf_counter() - start
+        assert received == count
+
+        tracemalloc.start()
+        asyncio.run(stream_through_app(app, line, count))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        logging.info(
+            f"{count:>6} lines: {elapsed:6.2f} s ({count / elapsed:6.0f} lines/s), "
+            f"peak traced memory {peak / 1024 / 1024:6.2f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    run_benchmark(tuple(int(arg) for arg in sys.argv[1:]) or (1000, 5000, 20000))
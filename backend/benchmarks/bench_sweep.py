@@ -0,0 +1,87 @@
+import datetime
+import itertools
+import logging
+import random
+import time
+from app.schemas.calculator import ScenarioSweepRequest
+from app.services import calculator
+from app.services.scenarios import scenario_axes, scenario_request, sweep_scenarios
+from benchmarks.bench_batch import json_payload, make_client
+from benchmarks.bench_calculator import make_request
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def make_sweep_payload(prices: int = 25, construction_dates: int = 20, asset_mixes: int = 10, seed: int = 0) -> dict:
+    """
+    A sweep over purchase price x construction date x new/established x asset
+    mix; the defaults give 25 * 20 * 2 * 10 = 10,000 cells.
+    """
+    rng = random.Random(seed)
+    return {
+        "base": json_payload(make_request(20, seed=seed)),
+        "axes": {
+            "purchase_price": [round(rng.uniform(200000, 2000000), 2) for _ in range(prices)],
+            "construction_date": [
+                datetime.date(1975 + index, 1 + index % 12, 1).isoformat() for index in range(construction_dates)
+            ],
+            "is_new_property": [True, False],
+            "assets": [
+                json_payload(make_request(rng.randint(5, 40), seed=seed + index))["assets"]
+                for index in range(asset_mixes)
+            ],
+        },
+        "breakdown_cells": [0, 1, 2],
+    }
+
+
+def run_benchmark():
+    """A 10,000-cell sweep, against calculating every cell as its own request"""
+    calculator.result_cache = None
+    payload = make_sweep_payload()
+    request = ScenarioSweepRequest.parse_obj(payload)
+
+    start = time.perf_counter()
+    result = sweep_scenarios(request)
+    sweep_seconds = time.perf_counter() - start
+
+    axes = scenario_axes(request.axes)
+    cells = [
+        scenario_request(request.base, axes, list(coordinates))
+        for coordinates in itertools.product(*(range(len(values)) for _, values in axes))
+    ]
+    start = time.perf_counter()
+    expected = calculator.calculate_depreciation_batch(cells)
+    batch_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    singles = [calculator.calculate_depreciation(cell) for cell in cells[:500]]
+    single_seconds = (time.perf_counter() - start) / 500 * len(cells)
+
+    # Every cell must match calculating it on its own, exactly
+    mismatches = sum(
+        1 for index, response in itertools.chain(enumerate(expected), enumerate(singles))
+        if (response.first_year_depreciation, response.five_year_depreciation, round(sum(response.total), 2))
+        != (result.first_year_depreciation[index], result.five_year_depreciation[index], result.total_depreciation[index])
+    )
+    logging.info(f"{len(cells)} cells, {mismatches} differ from calculate_depreciation")
+    assert mismatches == 0
+    logging.info(f"sweep_scenarios:                        {sweep_seconds * 1000:8.1f} ms")
+    logging.info(f"calculate_depreciation_batch over cells: {batch_seconds * 1000:8.1f} ms")
+    logging.info(f"calculate_depreciation per cell (est.):  {single_seconds * 1000:8.1f} ms")
+
+    client = make_client()
+    client.post("/api/v1/calculate/sweep", json=payload).raise_for_status()
+    start = time.perf_counter()
+    response = client.post("/api/v1/calculate/sweep", json=payload)
+    response.raise_for_status()
+    logging.info(
+        f"POST /calculate/sweep:                   {(time.perf_counter() - start) * 1000:8.1f} ms "
+        f"({len(response.content)} bytes)"
+    )
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,70 @@
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+from jinja2 import Environment, FileSystemLoader
+from app.services import calculator
+from app.services.templates import templates, template_dir, EMAIL_TEMPLATE, PDF_TEMPLATE
+from benchmarks.bench_calculator import make_request
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+
+
+def render_per_call(environment: Environment, report, name: str) -> str:
+    """The previous behaviour: check the files and rebuild the context on every render"""
+    if not (template_dir / name).exists():
+        raise FileNotFoundError(name)
+    duo_group_logo_path = Path(template_dir) / "assets" / "duo-group-logo.svg"
+    if not duo_group_logo_path.exists():
+        duo_group_logo_path = ""
+    template = environment.get_template(name)
+    context = {
+        "name": "Property Investor",
+        "report": report,
+        "current_year": datetime.now().year,
+        "formatted_date": datetime.now().strftime("%d %B %Y"),
+        "duo_group_logo_path": str(duo_group_logo_path) if duo_group_logo_path else "",
+    }
+    return template.render(**context)
+
+
+def time_renders(render, repeat: int) -> float:
+    """Return the mean seconds per render"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        render()
+    return (time.perf_counter() - start) / repeat
+
+
+def run_benchmark(repeat: int = 200):
+    """Compare per-call template rendering with the shared template registry"""
+    templates.load()
+    report = calculator.calculate_depreciation(make_request(20))
+    # auto_reload (Jinja's default) stats the template file on every get_template
+    environment = Environment(loader=FileSystemLoader(str(template_dir)))
+
+    for name in (EMAIL_TEMPLATE, PDF_TEMPLATE):
+        assert render_per_call(environment, report, name) == templates.render(name, name="Property Investor", report=report)
+        per_call = time_renders(lambda: render_per_call(environment, report, name), repeat)
+        registry = time_renders(lambda: templates.render(name, name="Property Investor", report=report), repeat)
+        logging.info(
+            f"{name:<26} per-call {per_call * 1000:7.3f} ms, registry {registry * 1000:7.3f} ms "
+            f"(overhead saved {(per_call - registry) * 1e6:7.1f} us/render)"
+        )
+
+    # Overhead without the template body: an empty render isolates lookup and context costs
+    empty = Environment(loader=FileSystemLoader(str(template_dir))).from_string("")
+    per_call_overhead = time_renders(lambda: (
+        (template_dir / PDF_TEMPLATE).exists(),
+        environment.get_template(PDF_TEMPLATE),
+        datetime.now().strftime("%d %B %Y"),
+        empty.render(),
+    ), repeat * 10)
+    registry_overhead = time_renders(lambda: (templates.get(PDF_TEMPLATE), templates.context(), empty.render()), repeat * 10)
+    logging.info(
+        f"per-render overhead: per-call {per_call_overhead * 1e6:.1f} us, registry {registry_overhead * 1e6:.1f} us"
+    )
+
+if __name__ == "__main__":
+    run_benchmark()
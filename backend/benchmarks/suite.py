@@ -0,0 +1,363 @@
+"""
+Benchmark suite with JSON results and baseline comparison.
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --baseline results.json --threshold 0.15
+
+Suites: calculator (calculate_depreciation across asset counts), api
+(/api/v1/calculate throughput and latency under concurrency, in-process over
+the ASGI transport or against --url), pdf (generate_pdf_report) and
+send_report (render, assemble and deliver a report email to a local SMTP
+sink), startup (python -X importtime of app.main with and without the
+email stack) and sweep (a 10,000-cell /calculate/sweep). With --baseline, every metric is compared against the saved run and
+the exit status is 1 if any got worse by more than the threshold.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+import httpx
+from app.services import calculator
+from benchmarks.bench_batch import make_client, make_payloads
+from benchmarks.bench_calculator import make_request
+from benchmarks.bench_sweep import make_sweep_payload
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logging.getLogger("weasyprint").setLevel(logging.ERROR)
+logging.getLogger("mail.log").setLevel(logging.WARNING)
+
+SINK_HOST = "127.0.0.1"
+SINK_PORT = 8028
+DEFAULT_THRESHOLD = 0.10
+
+
+def metric(value: float, unit: str, better: str = "lower") -> Dict[str, Any]:
+    """A result value; `better` says which direction is an improvement"""
+    return {"value": round(value, 6), "unit": unit, "better": better}
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Mean, p50 and p95 in seconds, unrounded so sub-millisecond timings still compare"""
+    values = sorted(samples)
+    return {
+        "mean": sum(values) / len(values),
+        "p50": values[len(values) // 2],
+        "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+    }
+
+
+def time_calls(call: Callable[[], Any], repeat: int) -> List[float]:
+    """Seconds taken by each of `repeat` calls, after one warm-up call"""
+    call()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_calculator(quick: bool) -> Dict[str, Dict[str, Any]]:
+    """calculate_depreciation with the configured engine, result cache off"""
+    original_cache = calculator.result_cache
+    calculator.result_cache = None
+    results = {}
+    try:
+        for asset_count in (10, 100, 500, 1000):
+            request = make_request(asset_count)
+            repeat = max(5, (200 if quick else 2000) // asset_count)
+            latency = summarize(time_calls(lambda: calculator.calculate_depreciation(request), repeat))
+            results[f"calculator.assets_{asset_count}.p50_ms"] = metric(latency["p50"] * 1000, "ms")
+            results[f"calculator.assets_{asset_count}.mean_ms"] = metric(latency["mean"] * 1000, "ms")
+    finally:
+        calculator.result_cache = original_cache
+    return results
+
+
+async def _drive(client: httpx.AsyncClient, payloads: list, concurrency: int, requests: int) -> List[float]:
+    """Post `requests` payloads to /calculate from `concurrency` concurrent users"""
+    latencies = []
+
+    async def user(offset: int):
+        for index in range(offset, requests, concurrency):
+            start = time.perf_counter()
+            response = await client.post("/api/v1/calculate", json=payloads[index % len(payloads)])
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(user(offset) for offset in range(concurrency)))
+    return latencies
+
+
+async def _api_run(url: Optional[str], payloads: list, concurrency: int, requests: int):
+    if url:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        client = httpx.AsyncClient(base_url=url, limits=limits, timeout=30)
+    else:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=make_client().app), base_url="http://bench")
+    async with client:
+        await _drive(client, payloads, concurrency, concurrency)  # warm up
+        start = time.perf_counter()
+        latencies = await _drive(client, payloads, concurrency, requests)
+        return latencies, time.perf_counter() - start
+
+
+def bench_api(quick: bool, url: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    /api/v1/calculate under concurrency. In-process the result cache is off;
+    against a live server (--url) start it with RESULT_CACHE_ENABLED=false.
+    """
+    original_cache = calculator.result_cache
+    calculator.result_cache = None
+    payloads = make_payloads(200)
+    results = {}
+    try:
+        for concurrency in (1, 16) if quick else (1, 16, 64):
+            requests = max(concurrency * 4, 100 if quick else 500)
+            latencies, elapsed = asyncio.run(_api_run(url, payloads, concurrency, requests))
+            latency = summarize(latencies)
+            prefix = f"api.calculate.concurrency_{concurrency}"
+            results[f"{prefix}.requests_per_second"] = metric(len(latencies) / elapsed, "req/s", "higher")
+            results[f"{prefix}.p50_ms"] = metric(latency["p50"] * 1000, "ms")
+            results[f"{prefix}.p95_ms"] = metric(latency["p95"] * 1000, "ms")
+    finally:
+        calculator.result_cache = original_cache
+    return results
+
+
+def bench_pdf(quick: bool) -> Dict[str, Dict[str, Any]]:
+    """generate_pdf_report with the configured PDF_BACKEND, bypassing the PDF cache"""
+    from app.services.email_service import generate_pdf_report
+    from app.services.templates import templates
+
+    templates.load()
+    results = {}
+    for asset_count in (20, 200):
+        report = calculator.calculate_depreciation(make_request(asset_count))
+        assert generate_pdf_report(report).startswith(b"%PDF"), "PDF rendering fell back to HTML"
+        latency = summarize(time_calls(lambda: generate_pdf_report(report), 3 if quick else 10))
+        results[f"pdf.assets_{asset_count}.p50_ms"] = metric(latency["p50"] * 1000, "ms")
+    return results
+
+
+async def _send_reports(count: int, concurrency: int) -> List[float]:
+    from app.services import email_service
+    from app.services.smtp_pool import SMTPConnectionPool
+
+    report = calculator.calculate_depreciation(make_request(20))
+    pool = SMTPConnectionPool(SINK_HOST, SINK_PORT, start_tls=False, max_connections=concurrency)
+    original_pool, original_cache = email_service.smtp_pool, email_service.pdf_cache
+    # Every send renders its own PDF, as the first send of a report does
+    email_service.smtp_pool, email_service.pdf_cache = pool, None
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def send(index: int):
+        async with slots:
+            start = time.perf_counter()
+            await email_service.send_email_with_report(
+                to_email=f"client{index}@example.com", name="Property Investor", report=report
+            )
+            latencies.append(time.perf_counter() - start)
+
+    try:
+        await send(-1)  # warm up the connection, templates and renderer
+        latencies.clear()
+        await asyncio.gather(*(send(index) for index in range(count)))
+    finally:
+        email_service.smtp_pool, email_service.pdf_cache = original_pool, original_cache
+        await pool.close()
+    return latencies
+
+
+def bench_send_report(quick: bool) -> Dict[str, Dict[str, Any]]:
+    """send_email_with_report with a PDF attachment, delivered to an aiosmtpd sink"""
+    from aiosmtpd.controller import Controller
+    from aiosmtpd.handlers import Sink
+
+    controller = Controller(Sink(), hostname=SINK_HOST, port=SINK_PORT)
+    controller.start()
+    try:
+        count = 10 if quick else 50
+        start = time.perf_counter()
+        latencies = asyncio.run(_send_reports(count, concurrency=4))
+        elapsed = time.perf_counter() - start
+    finally:
+        controller.stop()
+    latency = summarize(latencies)
+    return {
+        "send_report.emails_per_second": metric(count / elapsed, "emails/s", "higher"),
+        "send_report.p50_ms": metric(latency["p50"] * 1000, "ms"),
+        "send_report.p95_ms": metric(latency["p95"] * 1000, "ms"),
+    }
+
+
+def import_time(env: Dict[str, str], module: str = "app.main") -> float:
+    """
+    Seconds spent importing `module` in a fresh interpreter, from -X importtime.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=dict(os.environ, **env),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # Lines look like "import time:   self [us] | cumulative | imported package"
+    for line in completed.stderr.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1e6
+    raise RuntimeError(f"No import time reported for {module}")
+
+
+def bench_startup(quick: bool) -> Dict[str, Dict[str, Any]]:
+    """Cold import time of the app, with and without the email/PDF stack"""
+    results = {}
+    for label, env in (("full", {"EMAIL_ENABLED": "true"}), ("calculator_only", {"EMAIL_ENABLED": "false"})):
+        # Best of several runs; the first one also pays for cold file system caches
+        seconds = min(import_time(env) for _ in range(2 if quick else 5))
+        results[f"startup.import_app_main.{label}_ms"] = metric(seconds * 1000, "ms")
+    return results
+
+
+def bench_sweep(quick: bool) -> Dict[str, Dict[str, Any]]:
+    """A 10,000-cell what-if sweep through /api/v1/calculate/sweep, result cache off"""
+    original_cache = calculator.result_cache
+    calculator.result_cache = None
+    try:
+        client = make_client()
+        payload = make_sweep_payload()
+        latency = summarize(time_calls(
+            lambda: client.post("/api/v1/calculate/sweep", json=payload).raise_for_status(), 5 if quick else 20
+        ))
+    finally:
+        calculator.result_cache = original_cache
+    return {
+        "sweep.cells_10000.p50_ms": metric(latency["p50"] * 1000, "ms"),
+        "sweep.cells_10000.mean_ms": metric(latency["mean"] * 1000, "ms"),
+    }
+
+
+SUITES = {
+    "calculator": bench_calculator,
+    "api": bench_api,
+    "pdf": bench_pdf,
+    "send_report": bench_send_report,
+    "startup": bench_startup,
+    "sweep": bench_sweep,
+}
+
+
+def environment() -> Dict[str, Any]:
+    """Where the numbers came from; results are only comparable on the same machine"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "calculator_engine": calculator.CALCULATOR_ENGINE,
+    }
+
+
+def run_suites(names: List[str], quick: bool = False, url: Optional[str] = None) -> Dict[str, Any]:
+    results: Dict[str, Dict[str, Any]] = {}
+    errors: Dict[str, str] = {}
+    for name in names:
+        logging.info(f"Running {name} benchmarks")
+        try:
+            results.update(SUITES[name](quick, url) if name == "api" else SUITES[name](quick))
+        except Exception as e:
+            # A suite that can't run here (no SMTP sink, no PDF libraries) shouldn't sink the rest
+            logging.error(f"{name} benchmarks failed: {str(e)}")
+            errors[name] = str(e)
+    return {"environment": environment(), "quick": quick, "results": results, "errors": errors}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Relative change of every metric present in both runs. A metric regresses
+    when it moved in its worse direction by more than `threshold`.
+    """
+    rows = []
+    for name, result in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None or not previous["value"]:
+            continue
+        change = (result["value"] - previous["value"]) / previous["value"]
+        worse = -change if result["better"] == "higher" else change
+        rows.append({
+            "metric": name,
+            "baseline": previous["value"],
+            "current": result["value"],
+            "unit": result["unit"],
+            "change": round(change, 4),
+            "regression": worse > threshold,
+        })
+    return rows
+
+
+def log_results(results: Dict[str, Any], comparison: Optional[List[Dict[str, Any]]]):
+    if comparison is None:
+        for name, result in results["results"].items():
+            logging.info(f"{name:<50} {result['value']:12.3f} {result['unit']}")
+        return
+    for row in comparison:
+        flag = "REGRESSION" if row["regression"] else ""
+        logging.info(
+            f"{row['metric']:<50} {row['baseline']:12.3f} -> {row['current']:12.3f} {row['unit']:<9} "
+            f"{row['change'] * 100:+7.1f}% {flag}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the API benchmark suite")
+    parser.add_argument("suites", nargs="*", help=f"suites to run: {', '.join(SUITES)} (default: all)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against results saved earlier with --output")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed relative slowdown")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, for a smoke run")
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app (api suite)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.suites if name not in SUITES]
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(unknown)}")
+
+    results = run_suites(args.suites or list(SUITES), quick=args.quick, url=args.url)
+    comparison = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            comparison = compare(results, json.load(f), args.threshold)
+        results["comparison"] = {"baseline": args.baseline, "threshold": args.threshold, "metrics": comparison}
+    log_results(results, comparison)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        logging.info(f"Results written to {args.output}")
+
+    regressions = [row["metric"] for row in comparison or [] if row["regression"]]
+    if regressions:
+        logging.error(f"{len(regressions)} metrics regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
-import uvicorn
+from app.server import run
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
+    # Development server with auto-reload; production runs python -m app.server
+    run(dev=True)
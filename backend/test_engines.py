@@ -0,0 +1,131 @@
+import logging
+import pickle
+import random
+from datetime import date
+from app.schemas.calculator import DepreciationRequest, AssetItem, AssetOperation, AssetOperationType
+from app.services import calculator
+from app.services.parallel import CalculationPool
+from app.services.sessions import CalculationSessionStore
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+
+# Compare the engines, not results served from the cache
+calculator.result_cache = None
+
+ENGINES = ("reference", "python", "numpy")
+
+# Lives around the memoized table's bounds, plus ones whose rates barely differ from 0
+EFFECTIVE_LIVES = [None, 0, 1, 2, 3, 5, 7, 10, 15, 20, 40, 99, 100, 101, 250, 2 ** 40, 2 ** 70]
+
+
+def random_asset(rng: random.Random, index: int) -> AssetItem:
+    value = rng.choice([
+        round(rng.uniform(0, 50000), 2),
+        rng.uniform(-5000, 5000),
+        float(rng.randint(1, 10 ** 7)),
+        0.0,
+    ])
+    return AssetItem(
+        name=f"Asset {index}",
+        category=rng.choice(["plant_equipment"] * 4 + ["capital_works"]),
+        value=value,
+        effective_life=rng.choice(EFFECTIVE_LIVES + [rng.randint(1, 60)] * 5)
+    )
+
+
+def random_request(rng: random.Random) -> DepreciationRequest:
+    """A request with random assets, including edge cases (no life, negative values, huge lives)"""
+    asset_count = rng.choice([0, 1, 2, 5, 20, 60, 300])
+    return DepreciationRequest(
+        property_type=rng.choice(["residential", "commercial", "industrial"]),
+        construction_date=rng.choice([date(1980, 1, 1), date(1985, 9, 14), date(1985, 9, 15), date(2015, 6, 1)]),
+        purchase_date=date(2023, 1, 1),
+        purchase_price=rng.choice([0.0, 650000.0, round(rng.uniform(1e5, 5e6), 2)]),
+        is_new_property=rng.random() < 0.5,
+        assets=[random_asset(rng, index) for index in range(asset_count)]
+    )
+
+
+def calculate_with(engine: str, requests):
+    calculator.CALCULATOR_ENGINE = engine
+    return [result.to_json() for result in calculator.calculate_depreciation_batch(requests)]
+
+
+def schedules_with(engine: str, requests):
+    """Unrounded yearly plant and equipment totals; a last-bit difference rarely shows in cents"""
+    calculator.CALCULATOR_ENGINE = engine
+    return [
+        ([repr(float(value)) for value in dv_by_year], [repr(float(value)) for value in pc_by_year])
+        for dv_by_year, pc_by_year in calculator.plant_equipment_schedules([request.assets for request in requests])
+    ]
+
+
+def test_engines_match_reference(count: int = 400):
+    """Every engine gives byte-identical results to the reference loop, alone and in any batch"""
+    original = calculator.CALCULATOR_ENGINE
+    try:
+        rng = random.Random(0)
+        requests = [random_request(rng) for _ in range(count)]
+        expected = [calculate_with("reference", [request])[0] for request in requests]
+        expected_schedules = [schedules_with("reference", [request])[0] for request in requests]
+        for engine in ENGINES[1:]:
+            single = [calculate_with(engine, [request])[0] for request in requests]
+            assert single == expected, f"{engine} differs from the reference loop"
+            schedules = [schedules_with(engine, [request])[0] for request in requests]
+            assert schedules == expected_schedules, f"{engine} yearly totals differ from the reference loop"
+            assert schedules_with(engine, requests) == expected_schedules, f"{engine} batch yearly totals differ"
+            # The NumPy engine groups a batch's assets; results must not depend on the other requests
+            batch_rng = random.Random(engine)
+            for _ in range(20):
+                indexes = batch_rng.sample(range(count), batch_rng.randint(2, 40))
+                batch = calculate_with(engine, [requests[index] for index in indexes])
+                assert batch == [expected[index] for index in indexes], f"{engine} batch differs"
+    finally:
+        calculator.CALCULATOR_ENGINE = original
+
+
+def test_batch_items_match_reference(count: int = 100):
+    """Raw batch items (the /calculate/batch and worker pool path) give the same results"""
+    original = calculator.CALCULATOR_ENGINE
+    try:
+        rng = random.Random(1)
+        requests = [random_request(rng) for _ in range(count)]
+        expected = calculate_with("reference", requests)
+        calculator.CALCULATOR_ENGINE = "numpy"
+        pool = CalculationPool(max_workers=0, chunk_size=10, serial_threshold=2)
+        outcomes = pool.calculate_items([request.dict() for request in requests])
+        assert [error for _, error in outcomes] == [None] * count
+        # Results are pickled on their way back from worker processes
+        results = [pickle.loads(pickle.dumps(result)).to_json() for result, _ in outcomes]
+        assert results == expected
+    finally:
+        calculator.CALCULATOR_ENGINE = original
+
+
+def test_sessions_match_engine(sessions: int = 5, edits: int = 120):
+    """Session results after random single-asset edits equal a full calculation of the same assets"""
+    original = calculator.CALCULATOR_ENGINE
+    try:
+        rng = random.Random(2)
+        store = CalculationSessionStore(max_sessions=sessions, ttl_seconds=600, max_assets=1000)
+        for _ in range(sessions):
+            request = random_request(rng)
+            session = store.create(request)
+            for index in range(edits):
+                op = rng.choice(list(AssetOperationType)) if session.assets else AssetOperationType.ADD
+                asset_id = rng.choice(list(session.assets)) if op != AssetOperationType.ADD else None
+                asset = random_asset(rng, index) if op != AssetOperationType.REMOVE else None
+                store.edit(session, [AssetOperation(op=op, asset_id=asset_id, asset=asset)])
+                assets = list(session.assets.values())
+                for engine in ENGINES:
+                    expected = calculate_with(engine, [request.copy(update={"assets": assets})])[0]
+                    assert session.result().to_json() == expected, f"session differs from {engine}"
+    finally:
+        calculator.CALCULATOR_ENGINE = original
+
+
+if __name__ == "__main__":
+    for test in (test_engines_match_reference, test_batch_items_match_reference, test_sessions_match_engine):
+        test()
+        logging.info(f"{test.__name__} passed")